@@ -0,0 +1,80 @@
+'''
+Benchmark of the columnar parameter store.
+
+Compares the memory footprint (tracemalloc) and the table/macro generation times of a plain
+parameter dictionary and of dict2tex.ColumnarParameters, and checks that both produce
+identical LaTeX code and that the conversion to and from the plain form is lossless.
+
+Usage:
+
+    python bench_columnar.py [--sizes 100000 1000000] [--sections 100]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters, synthetic_sections
+
+##################################################
+
+def measure_memory(build):
+    '''
+    Returns the object created by build() and the memory (MB) it retains.
+    '''
+
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size / 2**20
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of the columnar parameter store.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='numbers of parameters')
+    parser.add_argument('--sections', type=int, default=100, help='number of sections')
+    args = parser.parse_args()
+
+    table_columns = COLUMN_SPECS['params']
+    table_sections = synthetic_sections(args.sections)
+
+    for n_parameters in args.sizes:
+        ## both representations are built from freshly parsed json (as after loading from file)
+        json_str = json.dumps(synthetic_parameters(n_parameters, args.sections))
+        pars, mb_dict = measure_memory(lambda: json.loads(json_str))
+        columnar, mb_columnar = measure_memory(lambda: dict2tex.ColumnarParameters(json.loads(json_str)))
+        del json_str
+
+        if columnar.to_dict() != pars or list(columnar) != list(pars):
+            raise SystemExit("Error: conversion to and from the columnar form is not lossless.")
+
+        t_table_dict, table_dict = timed(lambda: dict2tex.tex_table_string(pars, table_columns, table_sections))
+        t_table_columnar, table_columnar = timed(lambda: dict2tex.tex_table_string(columnar, table_columns, table_sections))
+        t_macros_dict, macros_dict = timed(lambda: dict2tex.tex_macros_string(pars))
+        t_macros_columnar, macros_columnar = timed(lambda: dict2tex.tex_macros_string(columnar))
+        if table_dict != table_columnar or macros_dict != macros_columnar:
+            raise SystemExit("Error: LaTeX code generated from the columnar form differs.")
+
+        print("%d parameters, %d sections" % (n_parameters, args.sections))
+        print("  memory:  dict %8.1f MB   columnar %8.1f MB   (%.2fx smaller)" % (mb_dict, mb_columnar, mb_dict / mb_columnar))
+        print("  table:   dict %8.3f s    columnar %8.3f s" % (t_table_dict, t_table_columnar))
+        print("  macros:  dict %8.3f s    columnar %8.3f s" % (t_macros_dict, t_macros_columnar), flush=True)
+
+        del pars, columnar, table_dict, table_columnar, macros_dict, macros_columnar
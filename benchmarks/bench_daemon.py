@@ -0,0 +1,118 @@
+'''
+Benchmark of the build daemon.
+
+Creates a synthetic parameter file and a configuration file (two tables and macro definitions),
+and compares the time per build request of
+
+- cold command-line runs ('python -m dict2tex build config.yml'), each paying for the interpreter
+  startup, the import of dict2tex, parsing the configuration and loading the parameters,
+- command-line runs sending the request to a running daemon ('dict2tex build config.yml --daemon'),
+- runs of the thin client ('python dict2tex/daemon.py config.yml'), which does not import dict2tex,
+- daemon round-trips from a running python process (dict2tex.request_build()).
+
+Requests are timed with unchanged parameters (the typical case in make or latexmk rules), and
+after a change of one parameter value.
+
+Usage:
+
+    python bench_daemon.py [--sizes 1000 100000] [--repeat 10]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters, synthetic_sections
+
+##################################################
+
+def write_config(directory,n_parameters,n_sections):
+    pars = synthetic_parameters(n_parameters,n_sections)
+    with open(os.path.join(directory, 'params.json'), 'w') as f:
+        json.dump(pars, f)
+    config = {'params_file': 'params.json',
+              'params_table_tex_file': 'params_table.tex',
+              'params_table_columns': COLUMN_SPECS['params'],
+              'params_table_sections': synthetic_sections(n_sections)[::2],
+              'macros_table_tex_file': 'macros_table.tex',
+              'macros_table_columns': COLUMN_SPECS['macros'],
+              'macros_table_sections': synthetic_sections(n_sections)[1::2],
+              'macros_tex_file': 'macros.tex',
+              'macros_prefix': 'P'}
+    config_file = os.path.join(directory, 'config.yml')
+    with open(config_file, 'w') as f:
+        json.dump(config, f)   ## json is valid yaml
+    return config_file, pars
+
+def touch_parameter(directory,pars,value):
+    ## changes the value of one parameter (as an edit of the parameter file would)
+    pars['par_0']['value'] = value
+    with open(os.path.join(directory, 'params.json'), 'w') as f:
+        json.dump(pars, f)
+
+def median_time(func,repeat,setup=None):
+    times = []
+    for n in range(repeat):
+        if setup is not None:
+            setup(n)
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+def run(args):
+    subprocess.run([sys.executable, '-m', 'dict2tex'] + args, check=True, env=ENV)
+
+##################################################
+
+ENV = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in [os.path.dirname(os.path.dirname(dict2tex.__file__)),
+                                                               os.environ.get('PYTHONPATH')] if p))
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of the build daemon.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000], help='numbers of parameters')
+    parser.add_argument('--sections', type=int, default=100, help='number of sections')
+    parser.add_argument('--repeat', type=int, default=10, help='number of requests per measurement')
+    args = parser.parse_args()
+
+    for n_parameters in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            config_file, pars = write_config(directory, n_parameters, args.sections)
+            socket_path = os.path.join(directory, 'daemon.sock')
+            ENV[dict2tex.SOCKET_VARIABLE] = socket_path
+
+            t_cold = median_time(lambda: run(['build', config_file, '-q']), args.repeat)
+
+            daemon = subprocess.Popen([sys.executable, '-m', 'dict2tex', 'daemon', '-q'], env=ENV)
+            try:
+                while not dict2tex.daemon.ping(socket_path):
+                    time.sleep(0.05)
+                dict2tex.request_build(config_file, socket_path)   ## first (full) build
+
+                t_client = median_time(lambda: run(['build', config_file, '--daemon', '-q']), args.repeat)
+                t_thin = median_time(lambda: subprocess.run([sys.executable, dict2tex.daemon.__file__, config_file, '-q'],
+                                                            check=True, env=ENV), args.repeat)
+                t_request = median_time(lambda: dict2tex.request_build(config_file, socket_path), args.repeat)
+
+                def changed():
+                    response = dict2tex.request_build(config_file, socket_path)
+                    assert response['status'] == 0 and response['report']['written']
+                t_changed = median_time(changed, args.repeat, lambda n: touch_parameter(directory, pars, n))
+            finally:
+                dict2tex.daemon.request({'command': 'shutdown'}, socket_path)
+                daemon.wait()
+
+            print("%7d parameters: cold CLI %7.1f ms   CLI via daemon %5.1f ms   thin client %5.1f ms   round-trip %5.2f ms   "
+                  "round-trip after change %7.1f ms" % (
+                n_parameters, 1e3 * t_cold, 1e3 * t_client, 1e3 * t_thin, 1e3 * t_request, 1e3 * t_changed), flush=True)
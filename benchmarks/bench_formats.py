@@ -0,0 +1,104 @@
+'''
+Benchmark of parameter file formats.
+
+Stores synthetic parameter sets (see synthetic.py) as json and yaml files, and compares
+the loading times of
+
+- json:          dict2tex.load_parameters('params.json')
+- yaml (libyaml): dict2tex.load_parameters('params.yml') (yaml.CSafeLoader)
+- yaml (python): yaml.load(..., Loader=yaml.SafeLoader), i.e., the fallback without libyaml
+- cached:        dict2tex.load_parameters(..., cache=True) with an up-to-date cache (same for both formats)
+
+Usage:
+
+    python bench_formats.py [--sizes 10000 100000] [--repeat 3] [--no-pure-python]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import yaml
+
+import dict2tex
+
+from synthetic import synthetic_parameters
+
+##################################################
+
+def best_time(func,repeat):
+    times = []
+    for r in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+def write_files(pars,out_dir):
+    '''
+    Writes a parameter dictionary as json and yaml file.
+
+    Returns:
+    --------
+    json_file, yaml_file: str
+    Names of the json and the yaml file.
+
+    '''
+
+    json_file = os.path.join(out_dir, 'params.json')
+    yaml_file = os.path.join(out_dir, 'params.yml')
+    with open(json_file, 'w') as fp:
+        json.dump(pars, fp, indent=4)
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    with open(yaml_file, 'w') as fp:
+        yaml.dump(pars, fp, Dumper=dumper, sort_keys=False)
+    ## back-date the files, such that caches are trusted without hashing the files
+    for filename in (json_file, yaml_file):
+        os.utime(filename, ns=(0, 0))
+    return json_file, yaml_file
+
+def run(sizes,repeat,pure_python=True):
+    print("libyaml available: %s" % (hasattr(yaml, 'CSafeLoader')))
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n_parameters in sizes:
+            pars = synthetic_parameters(n_parameters)
+            json_file, yaml_file = write_files(pars, out_dir)
+
+            cases = [('json', lambda: dict2tex.load_parameters(json_file)),
+                     ('yaml (libyaml)', lambda: dict2tex.load_parameters(yaml_file))]
+            if pure_python:
+                def load_pure_python():
+                    with open(yaml_file, 'r') as fp:
+                        return yaml.load(fp, Loader=yaml.SafeLoader)
+                cases.append(('yaml (python)', load_pure_python))
+            cases += [('json, cached', lambda: dict2tex.load_parameters(json_file, cache=True)),
+                      ('yaml, cached', lambda: dict2tex.load_parameters(yaml_file, cache=True))]
+
+            print("\n%d parameters (json: %.1f MB, yaml: %.1f MB)" % (
+                n_parameters, os.path.getsize(json_file) / 2**20, os.path.getsize(yaml_file) / 2**20))
+            t_json = None
+            for name, func in cases:
+                t, result = best_time(func, repeat if name != 'yaml (python)' else 1)
+                if result != pars:
+                    raise SystemExit("Error: %s: loaded parameters differ from the original ones." % (name))
+                if t_json is None:
+                    t_json = t
+                print("%-16s %9.4f s %12.0f rows/s %8.2fx json" % (name, t, n_parameters / t, t / t_json), flush=True)
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of parameter file formats.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='numbers of parameters')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions (best time is reported)')
+    parser.add_argument('--no-pure-python', action='store_true',
+                        help='skip the (slow) pure-python yaml loader')
+    args = parser.parse_args()
+
+    run(args.sizes, args.repeat, not args.no_pure_python)
@@ -0,0 +1,92 @@
+'''
+Import-time benchmark for dict2tex.
+
+Runs "python -X importtime -c 'import dict2tex'" in a fresh interpreter (several times),
+and reports the cumulative import time of the package. That no heavy module (numpy, json,
+yaml, ...) is imported eagerly is checked by tests/test_import.py.
+
+Usage:
+
+    python bench_import.py [--repeat 5] [--max-ms 50]
+
+The script exits with a non-zero status if the median import time exceeds the limit given
+by --max-ms.
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+
+##################################################
+
+def measure_import(python=sys.executable):
+    '''
+    Imports dict2tex in a fresh interpreter and parses the output of "-X importtime".
+
+    Arguments:
+    ----------
+    python: str
+    Python interpreter (optional; default: current interpreter).
+
+    Returns:
+    --------
+    cumulative_us: int
+    Cumulative import time of the dict2tex package (in microseconds).
+
+    modules: list(str)
+    Names of all modules imported as a consequence of "import dict2tex"
+    (modules imported by the bare interpreter at startup are excluded).
+
+    '''
+
+    startup = _importtime(python, 'pass')
+    imported = _importtime(python, 'import dict2tex')
+
+    modules = [name for name in imported if name not in startup]
+    return imported['dict2tex'], modules
+
+def _importtime(python, code):
+    env = dict(os.environ)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = package_dir + os.pathsep + env.get('PYTHONPATH', '')
+
+    result = subprocess.run([python, '-X', 'importtime', '-c', code],
+                            env=env, capture_output=True, text=True, check=True)
+
+    cumulative_us = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        cumulative_us[name.strip()] = int(cum_us)
+    return cumulative_us
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Import-time benchmark for dict2tex.')
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreter runs')
+    parser.add_argument('--max-ms', type=float, default=None, help='maximum accepted median import time (ms)')
+    args = parser.parse_args()
+
+    times = []
+    for r in range(args.repeat):
+        cumulative_us, modules = measure_import()
+        times.append(cumulative_us)
+    times.sort()
+    median_ms = times[len(times)//2] * 1e-3
+
+    print("import dict2tex: median %.2f ms (min %.2f ms, max %.2f ms, %d runs)"
+          % (median_ms, times[0]*1e-3, times[-1]*1e-3, len(times)))
+
+    status = 0
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print("Error: import time exceeds limit of %.2f ms." % (args.max_ms))
+        status = 1
+
+    sys.exit(status)
@@ -0,0 +1,80 @@
+'''
+Benchmark of rendering from nested in-memory parameter dictionaries.
+
+Compares two ways of documenting a nested parameter dictionary (as kept by simulation code):
+writing it to a flat json file and reading it back (as example/create_params_file.py and
+dict2tex.load_parameters_from_json() do), and wrapping it in a dict2tex.NestedParameters view.
+Both are followed by the generation of a parameter table and macro definitions, and are
+checked to produce identical LaTeX code.
+
+Usage:
+
+    python bench_nested.py [--sizes 10000 100000] [--sections 100]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters
+
+##################################################
+
+def nested_parameters(pars):
+    '''
+    Nests a flat parameter dictionary by section (e.g. 'section_12' -> {'section_1': {'2': {...}}}),
+    and removes the section field of the entries.
+    '''
+
+    nested = {}
+    for key, entry in pars.items():
+        entry = dict(entry)
+        section = entry.pop('section')
+        nested.setdefault(section[:-1], {}).setdefault(section[-1], {})[key] = entry
+    return nested
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of rendering from nested parameter dictionaries.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='numbers of parameters')
+    parser.add_argument('--sections', type=int, default=100, help='number of sections')
+    args = parser.parse_args()
+
+    for n_parameters in args.sizes:
+        nested = nested_parameters(synthetic_parameters(n_parameters, args.sections))
+        view = dict2tex.NestedParameters(nested)
+        table_sections = [{'section': section, 'title': section} for section in view.sections()]
+
+        def render(pars):
+            return (dict2tex.tex_table_string(pars, COLUMN_SPECS['params'], table_sections),
+                    dict2tex.tex_macros_string(pars))
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'params.json')
+
+            def round_trip():
+                with open(filename, 'w') as f:
+                    json.dump(dict2tex.NestedParameters(nested).to_dict(), f)
+                return render(dict2tex.load_parameters_from_json(filename))
+            t_json, via_json = timed(round_trip)
+
+        t_view, via_view = timed(lambda: render(dict2tex.NestedParameters(nested)))
+        if via_view != via_json:
+            raise SystemExit("Error: outputs of NestedParameters differ from outputs via json.")
+
+        print("%8d parameters: json round-trip + rendering %7.3f s   view + rendering %7.3f s   (%.2fx)" % (
+            n_parameters, t_json, t_view, t_json / t_view), flush=True)
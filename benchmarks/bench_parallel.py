@@ -0,0 +1,74 @@
+'''
+Benchmark of parallel multi-output builds.
+
+Builds a set of outputs (several parameter tables with different column and section
+specifications, plus macro definitions) from one synthetic parameter set, serially
+(dict2tex.build_outputs()) and in parallel (dict2tex.build_outputs_parallel() with thread
+and process pools). That all modes produce byte-identical files is checked by
+tests/test_parallel.py.
+
+Usage:
+
+    python bench_parallel.py [--parameters 100000] [--outputs 8] [--workers 4]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import os
+import tempfile
+import time
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters, synthetic_sections
+
+##################################################
+
+def output_specs(n_outputs,n_sections,out_dir):
+    '''
+    Creates output specifications (see dict2tex/build.py): tables cycling through the column
+    specifications of synthetic.py and subsets of sections, and one macro file.
+    '''
+
+    table_sections = synthetic_sections(n_sections)
+    columns = sorted(COLUMN_SPECS)
+    specs = [{'type': 'macros', 'tex_file': os.path.join(out_dir, 'macros.tex'), 'macros_prefix': 'P'}]
+    for i in range(n_outputs - 1):
+        specs.append({'type': 'table',
+                      'tex_file': os.path.join(out_dir, 'table_%d.tex' % (i)),
+                      'table_columns': COLUMN_SPECS[columns[i % len(columns)]],
+                      'table_sections': table_sections[i % 2::1 + i % 3],
+                      'macro_prefix': 'P'})
+    return specs
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of parallel multi-output builds.')
+    parser.add_argument('--parameters', type=int, default=100000, help='number of parameters')
+    parser.add_argument('--sections', type=int, default=100, help='number of sections')
+    parser.add_argument('--outputs', type=int, default=8, help='number of outputs (tables + 1 macro file)')
+    parser.add_argument('--workers', type=int, default=None, help='number of workers (default: number of CPUs)')
+    args = parser.parse_args()
+
+    pars = synthetic_parameters(args.parameters, args.sections)
+
+    t_serial = None
+    for mode in ['serial', 'thread', 'process']:
+        with tempfile.TemporaryDirectory() as out_dir:
+            specs = output_specs(args.outputs, args.sections, out_dir)
+            t0 = time.perf_counter()
+            if mode == 'serial':
+                dict2tex.build_outputs(pars, specs)
+            else:
+                dict2tex.build_outputs_parallel(pars, specs, mode=mode, max_workers=args.workers)
+            t = time.perf_counter() - t0
+            size = sum(os.path.getsize(spec['tex_file']) for spec in specs)
+
+        if t_serial is None:
+            t_serial = t
+        print("%-8s %8.3f s  (%.2fx vs. serial, %d outputs, %.1f MB)" % (
+            mode, t, t_serial / t, len(specs), size / 2**20), flush=True)
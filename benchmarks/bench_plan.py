@@ -0,0 +1,53 @@
+'''
+Benchmark of single-pass multi-output builds.
+
+Renders a set of outputs (several parameter tables referring to overlapping sections, some with
+identical column specifications, plus macro definitions) from one synthetic parameter set,
+output by output (dict2tex.render_output()) and in a single pass (dict2tex.BuildPlan), and
+checks that both produce identical LaTeX code.
+
+Usage:
+
+    python bench_plan.py [--parameters 100000] [--outputs 2 4 8 16]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import time
+
+import dict2tex
+
+from synthetic import synthetic_parameters
+from bench_parallel import output_specs
+
+##################################################
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of single-pass multi-output builds.')
+    parser.add_argument('--parameters', type=int, default=100000, help='number of parameters')
+    parser.add_argument('--sections', type=int, default=100, help='number of sections')
+    parser.add_argument('--outputs', type=int, nargs='+', default=[2, 4, 8, 16], help='numbers of outputs (tables + 1 macro file)')
+    args = parser.parse_args()
+
+    pars = synthetic_parameters(args.parameters, args.sections)
+    pset = dict2tex.ParameterSet(pars)
+
+    for n_outputs in args.outputs:
+        specs = output_specs(n_outputs, args.sections, '.')
+        for name, p in [('dict', pars), ('ParameterSet', pset)]:
+            t_separate, separate = timed(lambda: [dict2tex.render_output(p, spec) for spec in specs])
+            t_plan, planned = timed(lambda: dict2tex.BuildPlan(specs).render(p))
+            if planned != separate:
+                raise SystemExit("Error: outputs of BuildPlan differ from separately rendered outputs.")
+            print("%2d outputs, %-12s  separate %7.3f s   plan %7.3f s   (%.2fx, %.1f MB)" % (
+                n_outputs, name, t_separate, t_plan, t_separate / t_plan, sum(len(s) for s in planned) / 2**20), flush=True)
@@ -0,0 +1,93 @@
+'''
+Benchmark of table row rendering.
+
+Compares the per-cell rendering of table rows (as implemented in tex_subtable() of
+dict2tex 1.0.0, reproduced below as legacy_row_string()) with rows rendered by a
+renderer compiled once per table section (dict2tex.compile_row_renderer()).
+
+Usage:
+
+    python bench_row_renderer.py [--rows 100000] [--repeat 3]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import time
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters
+
+TABLE_COLUMNS = COLUMN_SPECS['wide']
+
+##################################################
+
+def legacy_row_string(k,entry,table_columns,color='black',macro_prefix='P'):
+    '''
+    Row rendering of dict2tex 1.0.0 (cell by cell, with all decisions taken per cell).
+    '''
+
+    n_columns = len(table_columns)
+    out = []
+    for c in range(n_columns):
+        field = table_columns[c]['field']
+        if type(field)!=list:
+            field = [field]
+        for cf,fld in enumerate(field):
+            prefix = ''
+            if fld == 'key':
+                value = k
+            elif fld == 'macro':
+                value = k
+                prefix = macro_prefix
+            else:
+                value = entry[fld]
+            fld_str = dict2tex.convert_field_to_tex_string(value, fld, prefix=prefix)
+            out.append(r"{\noindent\color{%s}{}%s}" % (color,fld_str))
+            if cf<len(field)-1:
+                out.append(r"\,")
+        if c<n_columns-1:
+            out.append(r"  &  ")
+    out.append(r"\\" + "\n")
+    out.append(r"\hline" + "\n")
+    return ''.join(out)
+
+def best_time(func,repeat):
+    times = []
+    for r in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of table row rendering.')
+    parser.add_argument('--rows', type=int, default=100000, help='number of table rows')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    pars = synthetic_parameters(args.rows, n_sections=100)
+    items = list(pars.items())
+
+    def legacy():
+        return [legacy_row_string(k,entry,TABLE_COLUMNS) for k, entry in items]
+
+    def compiled():
+        render_row = dict2tex.compile_row_renderer(TABLE_COLUMNS)
+        return [render_row(k,entry) for k, entry in items]
+
+    if legacy() != compiled():
+        raise SystemExit("Error: compiled row renderer output differs from legacy output.")
+
+    t_legacy = best_time(legacy, args.repeat)
+    t_compiled = best_time(compiled, args.repeat)
+
+    print("%d rows, %d columns" % (args.rows, len(TABLE_COLUMNS)))
+    print("legacy (per cell):  %.3f s  (%.2f us/row)" % (t_legacy, 1e6 * t_legacy / args.rows))
+    print("compiled renderer:  %.3f s  (%.2f us/row)" % (t_compiled, 1e6 * t_compiled / args.rows))
+    print("speedup:            %.2fx" % (t_legacy / t_compiled))
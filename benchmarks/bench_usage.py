@@ -0,0 +1,115 @@
+'''
+Benchmark of macro usage scanning.
+
+Creates a synthetic manuscript (a tree of LaTeX files referencing a few hundred parameter
+macros) and a synthetic parameter set, and compares the time needed to determine the macros
+used in the manuscript by one search per macro and by dict2tex.scan_macro_usage() (a single
+pass over the files). The macro definitions restricted to the used macros
+(dict2tex.tex_macros_string(..., sources=...)) are compared to the full definitions.
+
+The per-macro search is timed for a sample of the macros and extrapolated.
+
+Usage:
+
+    python bench_usage.py [--parameters 50000] [--files 100 300] [--file-size 50000]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+import warnings
+
+import dict2tex
+
+from synthetic import synthetic_parameters
+
+##################################################
+
+def letters(i):
+    ## parameter names without digits (macros of names containing digits are not detectable)
+    name = ''
+    while True:
+        name = chr(ord('a') + i % 26) + name
+        i //= 26
+        if i == 0:
+            return name
+
+def letter_parameters(n_parameters,n_sections):
+    pars = synthetic_parameters(n_parameters,n_sections)
+    return dict(('par' + letters(i), entry) for i, entry in enumerate(pars.values()))
+
+def write_manuscript(directory,names,n_files,file_size,n_used,seed=1234):
+    '''
+    Writes n_files LaTeX files of about file_size characters each, referencing n_used of the
+    given macro names (and some comments and standard commands).
+    '''
+
+    rng = random.Random(seed)
+    used = rng.sample(names, n_used)
+    sentence = r"The \emph{model} has $\Phi$ and %s parameters (100\%% of them), see \cite{ref}.\\" + "\n"
+    for n in range(n_files):
+        os.makedirs(os.path.join(directory, 'section%d' % (n % 10)), exist_ok=True)
+        lines, size = [], 0
+        while size < file_size:
+            line = sentence % ("\\" + rng.choice(used)) if rng.random() < 0.3 else \
+                "%% comment mentioning \\%s\nplain text without macros, $x_i = y^2$ and more words\n" % (rng.choice(names))
+            lines.append(line)
+            size += len(line)
+        with open(os.path.join(directory, 'section%d' % (n % 10), 'file%d.tex' % (n)), 'w') as f:
+            f.write(''.join(lines))
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark of macro usage scanning.')
+    parser.add_argument('--parameters', type=int, default=50000, help='number of parameters')
+    parser.add_argument('--files', type=int, nargs='+', default=[100, 300], help='numbers of LaTeX files')
+    parser.add_argument('--file-size', type=int, default=50000, help='size of each LaTeX file (characters)')
+    parser.add_argument('--used', type=int, default=300, help='number of macros used in the manuscript')
+    parser.add_argument('--sample', type=int, default=200, help='number of macros searched one by one')
+    args = parser.parse_args()
+
+    pars = letter_parameters(args.parameters, 100)
+    names = ['P' + k for k in pars]
+
+    for n_files in args.files:
+        with tempfile.TemporaryDirectory() as directory:
+            write_manuscript(directory, names, n_files, args.file_size, args.used)
+            files = dict2tex.source_files(directory)
+            mb = sum(os.path.getsize(filename) for filename in files) / 2**20
+
+            ## one search per macro (comments removed beforehand), timed for a sample
+            def search_sample():
+                text = ''
+                for filename in files:
+                    with open(filename, 'r') as f:
+                        text += re.sub(r"(?<!\\)%.*", "", f.read())
+                return [name for name in names[:args.sample] if re.search(r"\\%s(?![A-Za-z])" % (name), text)]
+            t_sample, found = timed(search_sample)
+            t_search = t_sample * len(names) / args.sample
+
+            t_scan, used = timed(lambda: dict2tex.scan_macro_usage(directory))
+            if set(found) != used & set(names[:args.sample]):
+                raise SystemExit("Error: scan_macro_usage() and per-macro search disagree.")
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                t_pruned, pruned = timed(lambda: dict2tex.tex_macros_string(pars, sources=directory))
+            t_full, full = timed(lambda: dict2tex.tex_macros_string(pars))
+
+            print("%4d files (%.1f MB): per-macro search %8.2f s (extrapolated)   scan %6.3f s (%.0fx)   "
+                  "macros %d -> %d (%.0f kB -> %.0f kB, %.3f s -> %.3f s)" % (
+                n_files, mb, t_search, t_scan, t_search / t_scan, len(pars), pruned.count('\n'),
+                len(full) / 2**10, len(pruned) / 2**10, t_full, t_pruned), flush=True)
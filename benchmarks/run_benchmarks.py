@@ -0,0 +1,220 @@
+'''
+Benchmark suite for dict2tex.
+
+Generates synthetic parameter sets (see synthetic.py) of different sizes, numbers of sections
+and column specifications, and measures the individual processing stages
+
+- load:     dict2tex.load_parameters_from_json()
+- cached:   dict2tex.load_parameters_from_json(..., cache=True) with an up-to-date cache
+- sections: dict2tex.get_section_subdict() (once per table section)
+- format:   dict2tex.convert_field_to_tex_string() (all table fields of all parameters)
+- table:    dict2tex.tex_table()
+- macros:   dict2tex.tex_macros()
+
+For each stage, the wall-clock time (best of several repetitions), the throughput (rows/s and MB/s)
+and the peak memory allocated by python (tracemalloc; measured in a separate run) are reported.
+Results are stored as json, such that different versions can be compared locally.
+
+Usage:
+
+    python run_benchmarks.py [--sizes 100 1000 10000 100000 1000000] [--sections 10 100]
+                             [--columns params macros] [--repeat 3] [--output results.json]
+                             [--compare previous_results.json]
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import dict2tex
+
+from synthetic import COLUMN_SPECS, synthetic_parameters, synthetic_sections
+
+STAGES = ['load', 'cached', 'sections', 'format', 'table', 'macros']
+
+##################################################
+
+def stage_functions(pars,params_file,table_columns,table_sections,out_dir):
+    '''
+    Returns the functions to be benchmarked, one per stage.
+
+    Each function returns the number of bytes processed (input bytes for 'load',
+    output bytes otherwise).
+
+    '''
+
+    fields = []
+    for column in table_columns:
+        field = column['field']
+        fields += field if type(field) == list else [field]
+
+    def load():
+        dict2tex.load_parameters_from_json(params_file)
+        return os.path.getsize(params_file)
+
+    def cached():
+        dict2tex.load_parameters_from_json(params_file, cache=True)
+        return os.path.getsize(params_file)
+
+    def sections():
+        for table_section in table_sections:
+            dict2tex.get_section_subdict(pars, table_section['section'])
+        return 0
+
+    def format_fields():
+        n_bytes = 0
+        convert = dict2tex.convert_field_to_tex_string
+        for k, entry in pars.items():
+            for fld in fields:
+                if fld == 'key' or fld == 'macro':
+                    n_bytes += len(convert(k, fld, prefix='P'))
+                else:
+                    n_bytes += len(convert(entry[fld], fld))
+        return n_bytes
+
+    def table():
+        tex_file = os.path.join(out_dir, 'table.tex')
+        if os.path.exists(tex_file):
+            os.unlink(tex_file)  ## measure a full write
+        dict2tex.tex_table(pars, tex_file, table_columns, table_sections)
+        return os.path.getsize(tex_file)
+
+    def macros():
+        tex_file = os.path.join(out_dir, 'macros.tex')
+        if os.path.exists(tex_file):
+            os.unlink(tex_file)
+        dict2tex.tex_macros(pars, tex_file)
+        return os.path.getsize(tex_file)
+
+    return {'load': load, 'cached': cached, 'sections': sections, 'format': format_fields, 'table': table, 'macros': macros}
+
+def measure(func,repeat):
+    '''
+    Measures the best wall-clock time of func over several repetitions, and its peak memory
+    (in a separate run with tracemalloc enabled).
+
+    Returns:
+    --------
+    result: dict
+    Dictionary with entries 'time_s', 'bytes' and 'peak_memory_mb'.
+
+    '''
+
+    times = []
+    for r in range(repeat):
+        t0 = time.perf_counter()
+        n_bytes = func()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'time_s': min(times), 'bytes': n_bytes, 'peak_memory_mb': peak / 2**20}
+
+def run(sizes,section_counts,column_specs,repeat,stages=STAGES):
+    '''
+    Runs all benchmarks.
+
+    Returns:
+    --------
+    results: list(dict)
+    One dictionary per benchmark case and stage.
+
+    '''
+
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for n_parameters in sizes:
+            for n_sections in section_counts:
+                pars = synthetic_parameters(n_parameters, n_sections)
+                table_sections = synthetic_sections(n_sections)
+                params_file = os.path.join(out_dir, 'params.json')
+                with open(params_file, 'w') as fp:
+                    json.dump(pars, fp, indent=4)
+                ## back-date the parameter file, such that the cache is trusted without hashing the file
+                os.utime(params_file, ns=(0, 0))
+
+                for columns in column_specs:
+                    funcs = stage_functions(pars, params_file, COLUMN_SPECS[columns], table_sections, out_dir)
+                    for stage in stages:
+                        if columns != column_specs[0] and stage in ('load', 'cached', 'sections', 'macros'):
+                            continue  ## independent of the column specification
+                        result = measure(funcs[stage], repeat)
+                        result.update({'stage': stage,
+                                       'parameters': n_parameters,
+                                       'sections': n_sections,
+                                       'columns': columns,
+                                       'rows_per_s': n_parameters / result['time_s'] if result['time_s'] > 0 else None,
+                                       'mb_per_s': result['bytes'] / 2**20 / result['time_s'] if result['time_s'] > 0 else None})
+                        results.append(result)
+                        print_result(result)
+    return results
+
+##################################################
+
+def print_result(result,reference=None):
+    line = "%-8s n=%-8d sections=%-4d columns=%-7s %9.4f s %12.0f rows/s" % (
+        result['stage'], result['parameters'], result['sections'], result['columns'],
+        result['time_s'], result['rows_per_s'] or 0.)
+    if result['bytes']:
+        line += " %8.2f MB/s" % (result['mb_per_s'])
+    else:
+        line += " %13s" % ('')
+    line += " %8.1f MB peak" % (result['peak_memory_mb'])
+    if reference is not None:
+        line += "   %5.2fx vs. reference" % (reference['time_s'] / result['time_s'])
+    print(line, flush=True)
+
+def compare(results,reference_results):
+    '''
+    Prints the speedup of each benchmark case relative to a reference result file.
+    '''
+
+    def case(result):
+        return (result['stage'], result['parameters'], result['sections'], result['columns'])
+
+    reference = {case(result): result for result in reference_results}
+    print("\nComparison with reference:")
+    for result in results:
+        if case(result) in reference:
+            print_result(result, reference[case(result)])
+
+##################################################
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmark suite for dict2tex.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                        help='numbers of parameters (default: 100 1000 10000 100000; add 1000000 for the largest scale)')
+    parser.add_argument('--sections', type=int, nargs='+', default=[10, 100], help='numbers of sections')
+    parser.add_argument('--columns', nargs='+', default=['params', 'macros'], choices=sorted(COLUMN_SPECS),
+                        help='column specifications (see synthetic.py)')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES, help='stages to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions (best time is reported)')
+    parser.add_argument('--output', default='bench_results.json', help='result file (json)')
+    parser.add_argument('--compare', default=None, help='result file of a previous run to compare with')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.sections, args.columns, args.repeat, args.stages)
+
+    with open(args.output, 'w') as fp:
+        json.dump({'dict2tex_version': dict2tex.__version__,
+                   'python': sys.version,
+                   'platform': platform.platform(),
+                   'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'results': results}, fp, indent=2)
+    print("Results written to %s" % (args.output))
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as fp:
+            compare(results, json.load(fp)['results'])
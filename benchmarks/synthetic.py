@@ -0,0 +1,111 @@
+'''
+Synthetic parameter sets for benchmarks.
+
+Parameters follow the schema of example/create_params_file.py, i.e., each parameter is a
+dictionary with the fields 'latex', 'value', 'unit', 'description' and 'section'.
+
+(Tom Tetzlaff, 2025)
+
+'''
+
+import random
+
+## column specifications used in benchmarks
+COLUMN_SPECS = {
+    ## parameter table of example/config.yml
+    'params': [
+        {'field': 'latex', 'title': 'Name'},
+        {'field': ['value', 'unit'], 'title': 'Value'},
+        {'field': 'description', 'title': 'Description'},
+    ],
+    ## macros table of example/config.yml
+    'macros': [
+        {'field': 'latex', 'title': 'Name (LaTeX)'},
+        {'field': 'key', 'title': 'Name (code)'},
+        {'field': 'macro', 'title': 'Macro'},
+        {'field': 'description', 'title': 'Description'},
+    ],
+    ## both of the above
+    'wide': [
+        {'field': 'latex', 'title': 'Name'},
+        {'field': ['value', 'unit'], 'title': 'Value'},
+        {'field': 'key', 'title': 'Name (code)'},
+        {'field': 'macro', 'title': 'Macro'},
+        {'field': 'description', 'title': 'Description'},
+    ],
+}
+
+UNITS = ['', 'ms', 'mV', 'pA', 'spikes/s', 'M$\\Omega$']
+
+##################################################
+
+def synthetic_parameters(n_parameters,n_sections=10,seed=1234):
+    '''
+    Creates a synthetic parameter dictionary.
+
+    Values are a mix of floats, integers, strings and short lists (as in
+    example/create_params_file.py).
+
+    Arguments:
+    ----------
+    n_parameters: int
+    Number of parameters.
+
+    n_sections: int
+    Number of sections (optional; default: 10).
+
+    seed: int
+    Seed of the random number generator (optional; default: 1234).
+
+    Returns:
+    --------
+    pars: dict
+    Parameter dictionary.
+
+    '''
+
+    rng = random.Random(seed)
+
+    pars = {}
+    for i in range(n_parameters):
+        kind = i % 10
+        if kind < 6:
+            value = rng.uniform(-100., 100.)
+        elif kind < 8:
+            value = rng.randrange(10**6)
+        elif kind == 8:
+            value = 'option_%d' % (rng.randrange(100))
+        else:
+            value = [rng.uniform(0., 2.) for n in range(4)]
+        pars['par_%d' % (i)] = {
+            'latex': '$p_\\text{%d}$' % (i),
+            'value': value,
+            'unit': UNITS[i % len(UNITS)],
+            'description': 'synthetic parameter number %d of section %d' % (i, i % n_sections),
+            'section': 'section_%d' % (i % n_sections),
+        }
+    return pars
+
+def synthetic_sections(n_sections):
+    '''
+    Creates table section definitions (as in example/config.yml) for all sections of synthetic_parameters().
+
+    Arguments:
+    ----------
+    n_sections: int
+    Number of sections.
+
+    Returns:
+    --------
+    table_sections: list(dict)
+    List of table section definitions.
+
+    '''
+
+    table_sections = []
+    for s in range(n_sections):
+        table_section = {'section': 'section_%d' % (s), 'title': 'Section %d' % (s)}
+        if s % 2:
+            table_section['color'] = 'gray'
+        table_sections.append(table_section)
+    return table_sections
@@ -5,7 +5,21 @@ Converting parameter dictionaries to LaTeX code
 """
 
 from .dict2tex import *
+from .escape import *
+from .parameter_set import *
+from .derived import *
+from .columnar import *
+from .nested import *
+from .output import *
+from .sweep import *
+from .fragments import *
+from .plan import *
+from .shards import *
+from .section_macros import *
+from .usage import *
+from .build import *
+from .daemon import *
+from .stats import *
 
 __version__ = "1.0.0"
 __author__ = 'Tom Tetzlaff'
-
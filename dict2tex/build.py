@@ -0,0 +1,644 @@
+'''
+Configuration-driven builds.
+
+A configuration file (see templates/config.yml and example/config.yml) defines the parameter
+file, one or more parameter tables, and a file of LaTeX macro definitions. This module turns
+such a configuration into a list of output specifications, renders them, and keeps track of
+which outputs are affected by changes of the parameter or configuration files (used by the
+watch mode of the command-line interface).
+
+Output specifications are dictionaries of the form
+
+    {'type': 'table', 'tex_file': ..., 'table_columns': ..., 'table_sections': ...,
+     'section_text_color': ..., 'section_title_color': ..., 'macro_prefix': ...,
+     'table_column_widths': ..., 'max_rows': ..., 'max_bytes': ..., 'input_path': ...}
+
+or
+
+    {'type': 'macros', 'tex_file': ..., 'macros_prefix': ..., 'macros_sections': ...,
+     'by_section': ..., 'lazy': ..., 'input_path': ..., 'sources': ...}
+
+Tables with 'max_rows' or 'max_bytes' are split into shard files (see shards.py). Macro
+definitions with 'by_section' are split into one file per section (see section_macros.py).
+Such outputs consist of several files, and are written by build_outputs() (not render_output()).
+Macro definitions with 'sources' are restricted to the macros referenced in the given LaTeX
+sources (see usage.py).
+
+'''
+
+import os
+
+from .dict2tex import load_parameters, tex_table_string, tex_macros_string, index_sections
+from .output import write_if_changed, WriteReport
+from .escape import _escaping_rules, _set_escaping_rules
+from .fragments import FragmentCache
+from .parameter_set import ParameterSet
+from .plan import BuildPlan
+from .shards import tex_table_sharded
+from .section_macros import tex_macros_by_section
+
+__all__ = ['load_config', 'config_outputs', 'render_output', 'build_outputs', 'build_outputs_parallel',
+           'output_sections', 'changed_sections', 'affected_outputs', 'ConfigBuild']
+
+##################################################
+
+def load_config(config_file):
+    '''
+    Reads a yaml configuration file.
+
+    Arguments:
+    ----------
+    config_file: str
+    Name of the configuration file.
+
+    Returns:
+    --------
+    config: dict
+    Configuration dictionary.
+
+    '''
+
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)  ## libyaml, if available
+    with open(config_file, 'r') as stream:
+        try:
+            config = yaml.load(stream, Loader=loader)
+        except yaml.YAMLError as error:
+            raise ValueError("%s: %s" % (config_file, error)) from error
+
+    if not isinstance(config, dict):
+        raise ValueError("%s: configuration must be a mapping." % (config_file))
+    return config
+
+##################################################
+
+def config_outputs(config,base_dir=None):
+    '''
+    Extracts the output specifications from a configuration dictionary.
+
+    Every key ending in 'table_tex_file' defines a parameter table; the corresponding columns
+    and sections are defined by the keys with the same prefix and the endings 'table_columns'
+    and 'table_sections', optional fixed column widths by the ending 'table_column_widths', and
+    optional bounds of the size of shard files (see shards.py) by the endings 'table_max_rows'
+    and 'table_max_bytes' (e.g. 'table_tex_file', 'table_columns', 'table_sections' in
+    templates/config.yml, or 'params_table_tex_file', 'params_table_columns', ... in
+    example/config.yml). The key 'macros_tex_file' defines the file of macro definitions, which
+    is split into one file per section if 'macros_by_section' is true (loaded lazily unless
+    'macros_lazy' is false), and restricted to the macros used in the LaTeX sources listed
+    under 'macros_sources' (if any).
+
+    Arguments:
+    ----------
+    config: dict
+    Configuration dictionary.
+
+    base_dir: str or None
+    Directory relative to which file names are interpreted (optional; default: None,
+    i.e., the current working directory).
+
+    Returns:
+    --------
+    specs: list(dict)
+    List of output specifications (see module documentation).
+
+    '''
+
+    def path(filename):
+        if base_dir is None:
+            return filename
+        return os.path.join(base_dir, filename)
+
+    macros_prefix = config.get('macros_prefix', 'P')
+    section_text_color = config.get('section_text_color', 'black')
+    section_title_color = config.get('section_title_color', 'lightgray')
+
+    specs = []
+    for key in config:
+        if not key.endswith('table_tex_file'):
+            continue
+        prefix = key[:-len('table_tex_file')]
+        for required in ('table_columns', 'table_sections'):
+            if prefix + required not in config:
+                raise ValueError("Configuration defines '%s', but not '%s'." % (key, prefix + required))
+        specs.append({'type': 'table',
+                      'tex_file': path(config[key]),
+                      'table_columns': config[prefix + 'table_columns'],
+                      'table_sections': config[prefix + 'table_sections'],
+                      'section_text_color': section_text_color,
+                      'section_title_color': section_title_color,
+                      'macro_prefix': macros_prefix,
+                      'table_column_widths': config.get(prefix + 'table_column_widths', None),
+                      'max_rows': config.get(prefix + 'table_max_rows', None),
+                      'max_bytes': config.get(prefix + 'table_max_bytes', None),
+                      ## shards are included relative to the directory of the LaTeX document
+                      ## (assumed to be the directory of the configuration file)
+                      'input_path': os.path.dirname(config[key])})
+
+    if 'macros_tex_file' in config:
+        specs.append({'type': 'macros',
+                      'tex_file': path(config['macros_tex_file']),
+                      'macros_prefix': macros_prefix,
+                      'macros_sections': config.get('macros_sections', None),
+                      'by_section': config.get('macros_by_section', False),
+                      'lazy': config.get('macros_lazy', True),
+                      'input_path': os.path.dirname(config['macros_tex_file']),
+                      'sources': _source_paths(config.get('macros_sources', None), path)})
+
+    return specs
+
+def _source_paths(sources,path):
+    if sources is None:
+        return None
+    if isinstance(sources, str):
+        sources = [sources]
+    return [path(source) for source in sources]
+
+##################################################
+
+def render_output(pars,spec,stats=None,fragments=None):
+    '''
+    Renders the LaTeX code of a single output (except for outputs consisting of several files,
+    see module documentation).
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    spec: dict
+    Output specification (see module documentation).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    fragments: FragmentCache or None
+    Cache of rendered table sections; only sections whose parameters or specification changed
+    are re-rendered (optional; default: None, i.e., tables are rendered from scratch).
+
+    Returns:
+    --------
+    tex_str: str
+    LaTeX code.
+
+    '''
+
+    if _is_multi_file(spec):
+        raise ValueError("Output '%s' consists of several files (see build_outputs())." % (spec['tex_file']))
+    elif spec['type'] == 'table' and fragments is not None:
+        return fragments.tex_table_string(pars,spec['table_columns'],spec['table_sections'],
+                                          spec.get('section_text_color', 'black'),
+                                          spec.get('section_title_color', 'lightgray'),
+                                          spec.get('macro_prefix', 'P'),table=spec['tex_file'],stats=stats,
+                                          table_column_widths=spec.get('table_column_widths'))
+    elif spec['type'] == 'table':
+        return tex_table_string(pars,spec['table_columns'],spec['table_sections'],
+                                spec.get('section_text_color', 'black'),
+                                spec.get('section_title_color', 'lightgray'),
+                                spec.get('macro_prefix', 'P'),stats,spec.get('table_column_widths'))
+    elif spec['type'] == 'macros':
+        return tex_macros_string(pars,spec.get('macros_prefix', 'P'),spec.get('macros_sections', None),stats,spec.get('sources'))
+    else:
+        raise ValueError("Unknown output type '%s'." % (spec['type']))
+
+def build_outputs(pars,specs,report=None,stats=None,fragments=None):
+    '''
+    Renders a list of outputs and writes them to file (only if their content changed).
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    specs: list(dict)
+    List of output specifications (see module documentation).
+
+    report: WriteReport or None
+    Report in which the outcome is recorded (optional; default: None, i.e., a new report is created).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    fragments: FragmentCache or None
+    Cache of rendered table sections (optional; default: None; see render_output()).
+
+    Returns:
+    --------
+    report: WriteReport
+    Report listing the files written and skipped (unchanged).
+
+    '''
+
+    if report is None:
+        report = WriteReport()
+    for spec in specs:
+        if _is_multi_file(spec):
+            _build_multi_file(pars,spec,report,stats)
+        else:
+            write_if_changed(spec['tex_file'],render_output(pars,spec,stats,fragments),report,stats=stats)
+    return report
+
+def build_outputs_parallel(pars,specs,report=None,stats=None,mode='process',max_workers=None):
+    '''
+    Same as build_outputs(), but renders the outputs in parallel, and writes them in a thread pool.
+
+    The outputs are identical to those of build_outputs(), and are recorded in the report in
+    the order of specs, independently of the order in which they are completed.
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    specs: list(dict)
+    List of output specifications (see module documentation).
+
+    report: WriteReport or None
+    Report in which the outcome is recorded (optional; default: None, i.e., a new report is created).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+    Timings are summed over all workers (i.e., they measure CPU time rather than wall-clock time).
+
+    mode: str
+    'process': rendering in a process pool (the parameters are sent to each worker process once),
+    'thread': rendering in a thread pool (no transfer of parameters, but limited by the GIL),
+    'serial': rendering in the calling thread (optional; default: 'process').
+
+    max_workers: int or None
+    Maximum number of worker processes or threads (optional; default: None, i.e., the number of CPUs).
+
+    Returns:
+    --------
+    report: WriteReport
+    Report listing the files written and skipped (unchanged).
+
+    '''
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if report is None:
+        report = WriteReport()
+    if mode not in ('process', 'thread', 'serial'):
+        raise ValueError("Unknown mode '%s' (expected 'process', 'thread' or 'serial')." % (mode))
+
+    ## outputs consisting of several files, after all other outputs (sections of sharded tables
+    ## are rendered in parallel, see tex_table_sharded())
+    multi_file = [spec for spec in specs if _is_multi_file(spec)]
+    if multi_file:
+        specs = [spec for spec in specs if not _is_multi_file(spec)]
+        build_outputs_parallel(pars,specs,report,stats,mode,max_workers)
+        for spec in multi_file:
+            _build_multi_file(pars,spec,report,stats,(max_workers or os.cpu_count()) if mode == 'process' else None)
+        return report
+    if not specs:
+        return report
+
+    if mode == 'process':
+        ## derived parameters, ColumnarParameters etc. are sent as plain dictionary, together with
+        ## the escaping rules (see configure_escaping())
+        plain_pars = pars.to_dict() if hasattr(pars, 'to_dict') else dict(pars)
+        n_workers = min(len(specs), max_workers or os.cpu_count() or 1)
+        render_pool = ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(plain_pars,_escaping_rules()))
+        render = _render_in_worker
+    elif mode == 'thread':
+        render_pool = ThreadPoolExecutor(max_workers)
+        render = lambda spec, with_stats: _render(pars, spec, with_stats)
+    else:
+        render_pool = None
+        render = lambda spec, with_stats: _render(pars, spec, with_stats)
+
+    write_pool = ThreadPoolExecutor(max_workers)
+    try:
+        ## each task has its own statistics object (merged below), as BuildStats is not thread-safe
+        with_stats = stats is not None
+        if render_pool is None:
+            renderings = [render(spec, with_stats) for spec in specs]
+        else:
+            renderings = render_pool.map(render, specs, [with_stats] * len(specs))
+        writes = []
+        for spec, (tex_str, task_stats) in zip(specs, renderings):
+            write_stats = _new_stats() if with_stats else None
+            writes.append((write_pool.submit(write_if_changed, spec['tex_file'], tex_str, stats=write_stats), task_stats, write_stats))
+        for spec, (write, task_stats, write_stats) in zip(specs, writes):
+            report.add(spec['tex_file'], write.result())
+            if with_stats:
+                stats.merge(task_stats)
+                stats.merge(write_stats)
+    finally:
+        write_pool.shutdown()
+        if render_pool is not None:
+            render_pool.shutdown()
+    return report
+
+## parameters of a worker process (see build_outputs_parallel())
+_worker_pars = None
+
+def _init_worker(pars,escaping_rules):
+    global _worker_pars
+    _worker_pars = pars
+    _set_escaping_rules(escaping_rules)
+
+def _render_in_worker(spec,with_stats):
+    return _render(_worker_pars, spec, with_stats)
+
+def _render(pars,spec,with_stats):
+    stats = _new_stats() if with_stats else None
+    return render_output(pars,spec,stats), stats
+
+def _new_stats():
+    from .stats import BuildStats
+    return BuildStats()
+
+def _is_multi_file(spec):
+    if spec['type'] == 'table':
+        return bool(spec.get('max_rows') or spec.get('max_bytes'))
+    return bool(spec.get('by_section'))
+
+def _build_multi_file(pars,spec,report,stats,max_workers=None):
+    if spec['type'] == 'macros':
+        tex_macros_by_section(pars,spec['tex_file'],spec.get('macros_prefix', 'P'),spec.get('macros_sections', None),
+                              spec.get('lazy', True),report,stats,spec.get('input_path'),spec.get('sources'))
+        return
+    tex_table_sharded(pars,spec['tex_file'],spec['table_columns'],spec['table_sections'],
+                      spec.get('section_text_color', 'black'),spec.get('section_title_color', 'lightgray'),
+                      spec.get('macro_prefix', 'P'),spec.get('max_rows'),spec.get('max_bytes'),report,stats,
+                      spec.get('table_column_widths'),max_workers,spec.get('input_path'))
+
+##################################################
+
+def output_sections(spec):
+    '''
+    Returns the parameter sections an output depends on.
+
+    Arguments:
+    ----------
+    spec: dict
+    Output specification (see module documentation).
+
+    Returns:
+    --------
+    sections: set(str) or None
+    Set of section names, or None if the output depends on all parameters.
+
+    '''
+
+    if spec['type'] == 'table':
+        return set(table_section['section'] for table_section in spec['table_sections'])
+    if spec.get('macros_sections') is not None:
+        return set(spec['macros_sections'])
+    return None
+
+def changed_sections(pars_old,pars_new):
+    '''
+    Determines the sections whose parameters (or their order) differ between two parameter dictionaries.
+
+    Arguments:
+    ----------
+    pars_old: dict
+    Old parameter dictionary.
+
+    pars_new: dict
+    New parameter dictionary.
+
+    Returns:
+    --------
+    sections: set(str)
+    Set of modified section names.
+
+    '''
+
+    if list(pars_old) == list(pars_new):
+        ## same keys in the same order (e.g. after editing values): only modified entries matter
+        sections = set()
+        for k, entry_new in pars_new.items():
+            entry_old = pars_old[k]
+            if entry_old != entry_new:
+                sections.add(entry_old['section'])
+                sections.add(entry_new['section'])
+        return sections
+
+    index_old = index_sections(pars_old)
+    index_new = index_sections(pars_new)
+
+    sections = set()
+    for section in set(index_old) | set(index_new):
+        keys_old = list(index_old.get(section, ()))
+        keys_new = list(index_new.get(section, ()))
+        if keys_old != keys_new or any(pars_old[k] != pars_new[k] for k in keys_new):
+            sections.add(section)
+    return sections
+
+def affected_outputs(specs,pars_old,pars_new):
+    '''
+    Selects the outputs affected by a change of the parameter dictionary.
+
+    Arguments:
+    ----------
+    specs: list(dict)
+    List of output specifications.
+
+    pars_old: dict
+    Old parameter dictionary.
+
+    pars_new: dict
+    New parameter dictionary.
+
+    Returns:
+    --------
+    specs: list(dict)
+    List of affected output specifications.
+
+    '''
+
+    sections = changed_sections(pars_old,pars_new)
+    all_changed = bool(sections) or list(pars_old) != list(pars_new)
+
+    affected = []
+    for spec in specs:
+        spec_sections = output_sections(spec)
+        if spec_sections is None:
+            if all_changed:
+                affected.append(spec)
+        elif spec_sections & sections:
+            affected.append(spec)
+    return affected
+
+##################################################
+
+class ConfigBuild:
+    '''
+    Build defined by a configuration file.
+
+    Keeps the configuration, the output specifications and the parameters in memory, and
+    regenerates only the outputs affected by changes of the configuration or parameter file.
+    Within affected tables, only the sections whose parameters changed are re-rendered
+    (see FragmentCache).
+
+    The parameters are kept in a ParameterSet. When the parameter file changes, only modified
+    entries are replaced (if no parameter was added, removed or reordered), such that the
+    FragmentCache recognizes unchanged sections by their versions, without inspecting their
+    parameters.
+
+    File names in the configuration are interpreted relative to the directory of the
+    configuration file.
+
+    Arguments:
+    ----------
+    config_file: str
+    Name of the configuration file.
+
+    stats: BuildStats or None
+    Statistics object accumulating timings and counters of all (re-)builds (optional; default: None, i.e., no instrumentation).
+
+    jobs: int
+    Number of worker processes rendering the outputs of a full build (optional; default: 1,
+    i.e., all outputs are rendered in a single pass over the parameters, see BuildPlan; with
+    jobs > 1, see build_outputs_parallel()). Partial rebuilds (see update()) are always rendered
+    serially, reusing cached table sections (the cache is filled by the first partial rebuild
+    of each table).
+
+    '''
+
+    def __init__(self,config_file,stats=None,jobs=1):
+        self.config_file = os.path.abspath(config_file)
+        self.base_dir = os.path.dirname(self.config_file)
+        self.config = None
+        self.specs = []
+        self.params_file = None
+        self.pars = None
+        self._stamps = {}
+        self.stats = stats
+        self.fragments = FragmentCache()
+        self.jobs = jobs
+
+    def build(self):
+        '''
+        (Re-)loads configuration and parameters, and renders all outputs.
+
+        Returns:
+        --------
+        report: WriteReport
+        Report listing the files written and skipped (unchanged).
+
+        '''
+
+        self._load_config()
+        self._load_parameters()
+        self._record_sources(self.specs)
+        if self.jobs > 1 and len(self.specs) > 1:
+            return build_outputs_parallel(self.pars,self.specs,stats=self.stats,max_workers=self.jobs)
+        ## outputs consisting of several files are built separately
+        plan = BuildPlan([spec for spec in self.specs if not _is_multi_file(spec)])
+        report = plan.build(self.pars,stats=self.stats)
+        return build_outputs(self.pars,[spec for spec in self.specs if _is_multi_file(spec)],report,self.stats)
+
+    def update(self):
+        '''
+        Checks the configuration and parameter files for changes, and regenerates affected outputs.
+
+        Outputs whose file no longer exists (e.g. after 'make clean'), and macro definitions whose
+        LaTeX sources (see config_outputs()) changed are regenerated as well.
+
+        Returns:
+        --------
+        report: WriteReport or None
+        Report listing the files written and skipped, or None if no file changed.
+
+        '''
+
+        if self.config is None or self.pars is None:
+            ## no complete build yet: a failed attempt is only repeated after the configuration
+            ## or parameter file changed
+            if self._stamps and not (self._changed(self.config_file) or
+                                     (self.params_file is not None and self._changed(self.params_file))):
+                return None
+            return self.build()
+
+        config_changed = self._changed(self.config_file)
+        params_changed = self._changed(self.params_file)
+        stale = [spec for spec in self.specs if not os.path.exists(spec['tex_file']) or self._sources_changed(spec)]
+        if not (config_changed or params_changed or stale):
+            return None
+
+        specs = []
+        if config_changed:
+            old_specs = self.specs
+            old_params_file = self.params_file
+            self._load_config()
+            params_changed = params_changed or self.params_file != old_params_file
+            ## outputs with new or modified specification
+            specs = [spec for spec in self.specs if spec not in old_specs]
+
+        if params_changed:
+            pars_old = self.pars
+            pars_new = self._read_parameters()
+            affected = affected_outputs(self.specs,pars_old,pars_new)
+            self.pars = _update_parameter_set(pars_old,pars_new)
+            specs = [spec for spec in self.specs if spec in specs or spec in affected]
+
+        specs = [spec for spec in self.specs if spec in specs or spec in stale]
+        self._record_sources(specs)
+        return build_outputs(self.pars,specs,stats=self.stats,fragments=self.fragments)
+
+    def _load_config(self):
+        ## the time stamp is recorded first, such that a failed attempt is only repeated after the next change
+        self._stamps[self.config_file] = _file_stamp(self.config_file)
+        config = load_config(self.config_file)
+        try:
+            specs = config_outputs(config, self.base_dir)
+            params_file = os.path.join(self.base_dir, config['params_file'])
+        except KeyError as error:
+            raise ValueError("%s: missing configuration key %s." % (self.config_file, error)) from error
+        self.config = config
+        self.specs = specs
+        self.params_file = params_file
+
+    def _load_parameters(self):
+        self.pars = ParameterSet(self._read_parameters())
+
+    def _read_parameters(self):
+        self._stamps[self.params_file] = _file_stamp(self.params_file)
+        try:
+            return load_parameters(self.params_file,self.stats)
+        except ValueError as error:
+            raise ValueError("%s: %s" % (self.params_file, error)) from error
+
+    def _changed(self,filename):
+        return _file_stamp(filename) != self._stamps.get(filename)
+
+    def _record_sources(self,specs):
+        ## time stamps of the LaTeX sources of macro definitions restricted to used macros
+        for spec in specs:
+            if spec.get('sources') is not None:
+                self._stamps[('sources', spec['tex_file'])] = _sources_stamp(spec['sources'])
+
+    def _sources_changed(self,spec):
+        if spec.get('sources') is None:
+            return False
+        return _sources_stamp(spec['sources']) != self._stamps.get(('sources', spec['tex_file']))
+
+def _update_parameter_set(pars,pars_new):
+    ## replaces the modified entries of a ParameterSet, such that the versions of unchanged
+    ## sections are kept; if keys were added, removed or reordered, a new set is returned
+    if list(pars) != list(pars_new):
+        return ParameterSet(pars_new)
+    for k, entry_new in pars_new.items():
+        if pars[k] != entry_new:
+            pars[k] = entry_new
+    return pars
+
+def _sources_stamp(sources):
+    from .usage import source_files
+
+    try:
+        return [(filename, _file_stamp(filename)) for filename in source_files(sources)]
+    except FileNotFoundError:
+        return None
+
+def _file_stamp(filename):
+    try:
+        st = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
@@ -0,0 +1,166 @@
+'''
+On-disk cache of parsed parameter files.
+
+Parsing large parameter files (json, yaml) is the dominant cost of loading. With caching
+enabled (argument cache=True of the loading functions), the parsed parameters are stored next
+to the source file (e.g. ".params.json.dict2tex-cache" for "params.json") in python's compact
+binary marshal format, and subsequent loads of the unchanged file skip parsing entirely.
+
+The cache is keyed on the size, the modification time (ns) and a sha256 hash of the source file.
+If size and modification time match, the cache is used without reading the source. If the source
+was modified shortly before it was cached (within RACY_WINDOW_NS), a later modification might not
+change its modification time; in this case, the source is hashed and compared as well.
+Cache files are replaced atomically, such that concurrent builds never read partial caches;
+unreadable, outdated or foreign (other python version) caches are ignored and rewritten.
+Caches are not written if the source changes while it is being read, or if the directory is not writable.
+
+'''
+
+import os
+
+__all__ = ['cache_filename', 'load_cached']
+
+## cache format version (increase on changes of the header or data layout)
+CACHE_VERSION = 1
+
+## magic bytes at the start of each cache file
+CACHE_MAGIC = b'D2TC'
+
+## sources modified less than RACY_WINDOW_NS before they were cached are verified by their hash
+RACY_WINDOW_NS = 2 * 10**9
+
+##################################################
+
+def cache_filename(filename):
+    '''
+    Returns the name of the cache file belonging to a parameter file.
+
+    Arguments:
+    ----------
+    filename: str or path-like
+    Name of the parameter file.
+
+    Returns:
+    --------
+    cache_file: str
+    Name of the cache file (in the same directory as the parameter file).
+
+    '''
+
+    directory, basename = os.path.split(os.fspath(filename))
+    return os.path.join(directory, '.%s.dict2tex-cache' % (basename))
+
+def load_cached(filename,parse,format_name,stats=None):
+    '''
+    Loads a parameter file via its on-disk cache, and (re-)creates the cache if needed.
+
+    Arguments:
+    ----------
+    filename: str or path-like
+    Name of the parameter file.
+
+    parse: callable
+    Parser converting the file content (bytes) into the parameter dictionary.
+
+    format_name: str
+    Name of the file format (e.g. 'json'); part of the cache key.
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    Returns:
+    --------
+    pars: dict
+    Parameter dictionary.
+
+    '''
+
+    import sys
+    import marshal
+
+    cache_file = cache_filename(filename)
+    tag = (CACHE_VERSION, sys.implementation.cache_tag, marshal.version, format_name)
+
+    st = os.stat(filename)
+    stamp = (st.st_size, st.st_mtime_ns)
+
+    ## magic, header length (4 bytes), header (tag, stamp, digest, cached_at), and the parameter data (read only on a hit)
+    try:
+        f = open(cache_file, 'rb')
+    except OSError:
+        f = None
+    if f is not None:
+        with f:
+            try:
+                header = None
+                prefix = f.read(len(CACHE_MAGIC) + 4)
+                if prefix[:len(CACHE_MAGIC)] == CACHE_MAGIC:
+                    header = marshal.loads(f.read(int.from_bytes(prefix[len(CACHE_MAGIC):], 'little')))
+                if header is not None and header[0] == tag and header[1] == stamp:
+                    if header[3] - stamp[1] >= RACY_WINDOW_NS:
+                        pars = _unmarshal(f.read())
+                        if stats is not None:
+                            stats.count('cache_hits')
+                        return pars
+                    ## racy stamp: verify the content hash before using the cache
+                    if _digest(_read(filename)) == header[2]:
+                        pars = _unmarshal(f.read())
+                        if stats is not None:
+                            stats.count('cache_hits')
+                        ## refresh the time stamp, such that the next load does not need to hash the source
+                        _write_cache(cache_file, tag, stamp, header[2], pars)
+                        return pars
+            except (EOFError, ValueError, TypeError, IndexError):
+                pass  ## corrupt or foreign cache file
+
+    if stats is not None:
+        stats.count('cache_misses')
+
+    data = _read(filename)
+    pars = parse(data)
+
+    ## do not cache content which was modified while being read
+    st_after = os.stat(filename)
+    if (st_after.st_size, st_after.st_mtime_ns) == stamp and len(data) == stamp[0]:
+        _write_cache(cache_file, tag, stamp, _digest(data), pars)
+    return pars
+
+##################################################
+
+def _read(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+def _unmarshal(data):
+    import gc
+    import marshal
+
+    ## the cyclic garbage collector is paused while the (many) containers are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return marshal.loads(data)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _digest(data):
+    import hashlib
+    return hashlib.sha256(data).digest()
+
+def _write_cache(cache_file,tag,stamp,digest,pars):
+    import time
+    import marshal
+
+    from .output import atomic_write
+
+    cached_at = time.time_ns()
+    try:
+        header = marshal.dumps((tag, stamp, digest, cached_at))
+        data = CACHE_MAGIC + len(header).to_bytes(4, 'little') + header + marshal.dumps(pars)
+    except ValueError:
+        return  ## parameters contain objects not supported by marshal
+    try:
+        atomic_write(cache_file, data)
+    except OSError:
+        pass  ## e.g. read-only directory: caching is an optimization only
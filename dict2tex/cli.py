@@ -0,0 +1,180 @@
+'''
+Command-line interface.
+
+Usage:
+
+    dict2tex build config.yml            ## generate all outputs defined in config.yml
+    dict2tex build config.yml --watch    ## stay resident, regenerate affected outputs on changes
+    dict2tex build config.yml --stats    ## print timings per stage and section, and counters
+    dict2tex build config.yml --jobs 4   ## render outputs in 4 worker processes
+    dict2tex daemon                      ## run the build daemon (see daemon.py)
+    dict2tex build config.yml --daemon   ## build via the daemon (locally if no daemon is running)
+    dict2tex daemon --stop               ## stop the build daemon
+
+The configuration schema is the same as in templates/config.yml (see also example/config.yml).
+
+'''
+
+import sys
+
+from .build import ConfigBuild
+
+##################################################
+
+def main(argv=None):
+    '''
+    Entry point of the dict2tex command.
+
+    Arguments:
+    ----------
+    argv: list(str) or None
+    Command-line arguments (optional; default: None, i.e., sys.argv[1:]).
+
+    Returns:
+    --------
+    status: int
+    Exit status.
+
+    '''
+
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='dict2tex', description='Converting parameter dictionaries to LaTeX code.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='generate LaTeX tables and macros defined in a configuration file')
+    build_parser.add_argument('config', help='configuration file (yaml; see templates/config.yml)')
+    build_parser.add_argument('--watch', action='store_true',
+                              help='stay resident and regenerate affected outputs when the configuration or parameter file changes')
+    build_parser.add_argument('--interval', type=float, default=0.2,
+                              help='polling interval of watch mode in seconds (default: 0.2)')
+    build_parser.add_argument('-j', '--jobs', type=int, default=1,
+                              help='number of worker processes rendering the outputs (default: 1)')
+    build_parser.add_argument('-q', '--quiet', action='store_true', help='do not print written/unchanged files')
+    build_parser.add_argument('--stats', action='store_true',
+                              help='print timings per stage and table section, and counters (rows, cells, bytes, files)')
+    build_parser.add_argument('--stats-json', default=None, metavar='FILE',
+                              help='write timings and counters to a json file')
+    build_parser.add_argument('--daemon', action='store_true',
+                              help='send the build request to the build daemon (the outputs are built locally if no daemon is running)')
+    build_parser.add_argument('--socket', default=None, help='socket of the build daemon (default: $DICT2TEX_SOCKET, or a per-user socket in $XDG_RUNTIME_DIR or in the temporary directory)')
+
+    daemon_parser = subparsers.add_parser('daemon', help='run the build daemon, keeping configurations and parameters in memory')
+    daemon_parser.add_argument('--socket', default=None, help='socket of the build daemon (default: $DICT2TEX_SOCKET, or a per-user socket in $XDG_RUNTIME_DIR or in the temporary directory)')
+    daemon_parser.add_argument('--idle-timeout', type=float, default=None, metavar='SECONDS',
+                               help='terminate after SECONDS without requests (default: never)')
+    daemon_parser.add_argument('--stop', action='store_true', help='stop a running daemon')
+    daemon_parser.add_argument('--status', action='store_true', help='check whether a daemon is running')
+    daemon_parser.add_argument('-q', '--quiet', action='store_true', help='do not log requests')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'build' and args.daemon:
+        if args.watch or args.stats or args.stats_json:
+            parser.error("--daemon cannot be combined with --watch, --stats or --stats-json.")
+        return _build_by_daemon(args)
+    if args.command == 'build':
+        return _build(args)
+    if args.command == 'daemon':
+        return _daemon(args)
+
+def _build(args):
+    stats = None
+    if args.stats or args.stats_json:
+        from .stats import BuildStats
+        stats = BuildStats()
+
+    build = ConfigBuild(args.config,stats,args.jobs)
+    try:
+        report = build.build()
+    except (OSError, ValueError, KeyError) as error:
+        print("Error: %s" % (error), file=sys.stderr)
+        if not args.watch:
+            return 1
+        report = None
+    except Exception as error:
+        ## e.g. a malformed configuration (TypeError): in watch mode, reported and retried after a change
+        if not args.watch:
+            raise
+        print("Error: %s: %s" % (type(error).__name__, error), file=sys.stderr, flush=True)
+        report = None
+    if report is not None and not args.quiet:
+        print(report, flush=True)
+
+    if not args.watch:
+        _report_stats(stats,args)
+        return 0
+
+    import time
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            try:
+                report = build.update()
+            except (OSError, ValueError, KeyError) as error:
+                ## e.g. file saved incompletely by an editor: report and retry on next change
+                print("Error: %s" % (error), file=sys.stderr, flush=True)
+                continue
+            except Exception as error:
+                ## e.g. a malformed configuration (TypeError): watch mode keeps running
+                print("Error: %s: %s" % (type(error).__name__, error), file=sys.stderr, flush=True)
+                continue
+            if report is not None and (report.written or report.skipped or report.removed) and not args.quiet:
+                print(report, flush=True)
+    except KeyboardInterrupt:
+        ## in watch mode, statistics are accumulated over all (re-)builds
+        _report_stats(stats,args)
+        return 0
+
+def _build_by_daemon(args):
+    from .daemon import request_build, print_response
+
+    try:
+        response = request_build(args.config,args.socket,args.jobs)
+    except (ConnectionRefusedError, FileNotFoundError):
+        ## no daemon running
+        return _build(args)
+    except OSError as error:
+        print("Error: dict2tex daemon: %s" % (error), file=sys.stderr)
+        return 1
+    return print_response(response,args.quiet)
+
+def _daemon(args):
+    from .daemon import serve, request, ping, default_socket_path
+
+    socket_path = args.socket or default_socket_path()
+    if args.status or args.stop:
+        if not ping(socket_path):
+            print("No dict2tex daemon is listening on %s." % (socket_path))
+            return 1 if args.status else 0
+        if args.stop:
+            request({'command': 'shutdown'},socket_path,timeout=5.)
+            print("Stopped dict2tex daemon on %s." % (socket_path))
+        else:
+            print("dict2tex daemon listening on %s." % (socket_path))
+        return 0
+
+    if not args.quiet:
+        print("dict2tex daemon listening on %s." % (socket_path), flush=True)
+    try:
+        serve(socket_path,args.idle_timeout,None if args.quiet else sys.stdout)
+    except (RuntimeError, PermissionError) as error:
+        print("Error: %s" % (error), file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def _report_stats(stats,args):
+    if stats is None:
+        return
+    if args.stats:
+        print(stats, flush=True)
+    if args.stats_json:
+        stats.to_json(args.stats_json)
+
+##################################################
+
+if __name__ == "__main__":
+    sys.exit(main())
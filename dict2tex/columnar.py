@@ -0,0 +1,300 @@
+'''
+Compact columnar parameter store.
+
+In a plain parameter dictionary, each parameter is a separate dictionary with its own field
+names, value object, and copies of the section and unit strings. For millions of parameters,
+this per-entry overhead dominates the memory footprint. A ColumnarParameters object stores the
+same data column by column:
+
+- numeric values (float, int) in an array of doubles, other values (strings, lists, arrays, ...)
+  in a sparse dictionary,
+- sections and units as categorical columns (one code per parameter, each distinct name stored once),
+- LaTeX names and descriptions as utf-8 encoded text columns (one buffer per column, without per-string overhead).
+
+Entries are returned as lightweight read-only views (ParameterEntry), which behave like the
+entry dictionaries of a plain parameter dictionary. A ColumnarParameters object can therefore
+be passed to tex_table(), tex_macros(), get_section_subdict() etc. in place of a parameter
+dictionary. Like ParameterSet, it maintains a section index (see section_index()).
+
+The footprint is about half that of a plain parameter dictionary loaded from json (see
+benchmarks/bench_columnar.py); in turn, field access via the views makes table and macro
+generation slower (by a factor of about 1.5-3).
+
+'''
+
+from array import array
+from collections.abc import Mapping, ItemsView
+
+__all__ = ['ColumnarParameters']
+
+## fields of a parameter entry
+FIELDS = ('latex', 'value', 'unit', 'description', 'section')
+
+## value kinds
+_FLOAT = 0
+_INT = 1
+_OBJECT = 2     ## value stored in _objects
+_IRREGULAR = 3  ## entry with other fields, or other field order, stored as dictionary in _objects
+
+## largest integer represented exactly by a double
+_MAX_EXACT_INT = 2**53
+
+##################################################
+
+class ColumnarParameters(Mapping):
+    '''
+    Read-only parameter dictionary with columnar storage.
+
+    Entries with exactly the fields 'latex', 'value', 'unit', 'description' and 'section'
+    (in the field order of the first entry) are stored column by column. Other entries are
+    stored unchanged, such that the conversion to and from a plain parameter dictionary is lossless.
+
+    Arguments:
+    ----------
+    pars: dict or iterable
+    Parameter dictionary, or iterable over (key, entry) pairs (e.g. from iter_parameters_from_json();
+    optional; default: empty).
+
+    '''
+
+    def __init__(self, pars=()):
+        self._keys = []
+        self._positions = {}
+        self._fields = None
+        self._kinds = bytearray()
+        self._values = array('d')
+        self._objects = {}
+        self._latex = _TextColumn()
+        self._descriptions = _TextColumn()
+        self._units = _Categories()
+        self._sections = _Categories()
+        self._index = None
+        self._getters = {'value': self._value, 'section': self._sections.name, 'unit': self._units.name,
+                         'latex': self._latex.get, 'description': self._descriptions.get}
+
+        items = pars.items() if hasattr(pars, 'keys') else pars
+        for key, entry in items:
+            self._append(key, entry)
+
+    def _append(self, key, entry):
+        if key in self._positions:
+            raise ValueError("Duplicate parameter key '%s'." % (key))
+        row = len(self._keys)
+        self._keys.append(key)
+        self._positions[key] = row
+
+        if self._fields is None and set(entry) == set(FIELDS):
+            self._fields = tuple(entry)
+
+        self._sections.append(entry['section'])
+        if (self._fields is None or tuple(entry) != self._fields
+            or type(entry['latex']) is not str or type(entry['description']) is not str):
+            self._kinds.append(_IRREGULAR)
+            self._objects[row] = dict(entry)
+            self._values.append(0.)
+            self._latex.append('')
+            self._descriptions.append('')
+            self._units.append('')
+            return
+
+        value = entry['value']
+        if type(value) is float:
+            self._kinds.append(_FLOAT)
+            self._values.append(value)
+        elif type(value) is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+            self._kinds.append(_INT)
+            self._values.append(value)
+        else:
+            self._kinds.append(_OBJECT)
+            self._objects[row] = value
+            self._values.append(0.)
+        self._latex.append(entry['latex'])
+        self._descriptions.append(entry['description'])
+        self._units.append(entry['unit'])
+
+    ##################################################
+    ## mapping interface
+
+    def __getitem__(self, key):
+        row = self._positions[key]
+        if self._kinds[row] == _IRREGULAR:
+            return self._objects[row]
+        return ParameterEntry(self, row)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def items(self):
+        return _ColumnarItems(self)
+
+    def __repr__(self):
+        return "%s(<%d parameters, %d sections>)" % (type(self).__name__, len(self), len(self.section_index()))
+
+    def __reduce__(self):
+        return (type(self), (self.to_dict(),))
+
+    def to_dict(self):
+        '''
+        Converts the parameters into a plain parameter dictionary.
+
+        Returns:
+        --------
+        pars: dict
+        Parameter dictionary (key -> dictionary of fields).
+
+        '''
+
+        return {key: self._entry_dict(row) for row, key in enumerate(self._keys)}
+
+    def _entry_dict(self, row):
+        if self._kinds[row] == _IRREGULAR:
+            return dict(self._objects[row])
+        getters = self._getters
+        return {fld: getters[fld](row) for fld in self._fields}
+
+    def _value(self, row):
+        kind = self._kinds[row]
+        if kind == _FLOAT:
+            return self._values[row]
+        if kind == _INT:
+            return int(self._values[row])
+        return self._objects[row]
+
+    ##################################################
+    ## section index
+
+    def section_index(self):
+        '''
+        Returns the section index.
+
+        Returns:
+        --------
+        index: dict
+        Dictionary mapping each section name to a dictionary whose keys are the parameter keys
+        of this section (in insertion order). The returned object must not be modified.
+
+        '''
+
+        if self._index is None:
+            keys = self._keys
+            names = self._sections.names
+            index = {name: {} for name in names}
+            for row, code in enumerate(self._sections.codes):
+                index[names[code]][keys[row]] = None
+            self._index = index
+        return self._index
+
+    def section_keys(self, section):
+        '''
+        Returns the keys of all parameters of a given section (in insertion order).
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        keys: list(str)
+        List of parameter keys.
+
+        '''
+
+        return list(self.section_index().get(section, ()))
+
+    def sections(self):
+        '''
+        Returns the names of all sections (in order of first appearance).
+
+        Returns:
+        --------
+        sections: list(str)
+        List of section names.
+
+        '''
+
+        return list(self._sections.names)
+
+class ParameterEntry(Mapping):
+    '''
+    Read-only view of a single parameter entry of a ColumnarParameters object.
+
+    Behaves like the entry dictionary of a plain parameter dictionary (fields 'latex', 'value',
+    'unit', 'description', 'section'). Use dict(entry) to obtain a modifiable copy.
+
+    '''
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, fld):
+        return self._store._getters[fld](self._row)
+
+    def __iter__(self):
+        return iter(self._store._fields)
+
+    def __len__(self):
+        return len(self._store._fields)
+
+    def __repr__(self):
+        return repr(self._store._entry_dict(self._row))
+
+class _ColumnarItems(ItemsView):
+    ## iteration by row, without key lookups
+
+    __slots__ = ()
+
+    def __iter__(self):
+        store = self._mapping
+        kinds = store._kinds
+        objects = store._objects
+        for row, key in enumerate(store._keys):
+            if kinds[row] == _IRREGULAR:
+                yield key, objects[row]
+            else:
+                yield key, ParameterEntry(store, row)
+
+class _TextColumn:
+    ## strings stored as one utf-8 buffer plus offsets ('surrogatepass' keeps lone surrogates from json intact)
+
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+
+    def append(self, text):
+        self.data += text.encode('utf-8', 'surrogatepass')
+        self.offsets.append(len(self.data))
+
+    def get(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].decode('utf-8', 'surrogatepass')
+
+class _Categories:
+    ## categorical column: one code per row, each distinct name stored once
+
+    __slots__ = ('codes', 'names', '_lookup')
+
+    def __init__(self):
+        self.codes = array('I')
+        self.names = []
+        self._lookup = {}
+
+    def append(self, name):
+        code = self._lookup.get(name)
+        if code is None:
+            code = self._lookup[name] = len(self.names)
+            self.names.append(name)
+        self.codes.append(code)
+
+    def name(self, row):
+        return self.names[self.codes[row]]
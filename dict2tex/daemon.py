@@ -0,0 +1,378 @@
+'''
+Build daemon.
+
+Build rules of make or latexmk often run dict2tex many times per document build. Each run
+pays for the interpreter startup, the import of dict2tex, parsing the configuration and
+loading the full parameter file. The daemon (serve(), or 'dict2tex daemon') stays resident
+and keeps a ConfigBuild (see build.py) per configuration file in memory, i.e., the parsed
+configuration, the parameters and the rendered table sections (FragmentCache). Build
+requests are sent by a thin client (request(), or 'dict2tex build config.yml --daemon') over a
+Unix domain socket.
+
+For each request, the daemon checks the configuration file, the parameter file and the LaTeX
+sources of the macro definitions (if any) for changes, and regenerates only the affected
+outputs (see ConfigBuild.update()); outputs whose files were removed are regenerated as well.
+The first request for a configuration builds all outputs.
+
+Requests are served one at a time, in the order in which they arrive. The protocol is one line
+of json per request and response:
+
+    request:  {"command": "build", "config": "/abs/path/config.yml", "jobs": 1}
+              {"command": "ping"}  or  {"command": "shutdown"}
+    response: {"status": 0, "report": {"written": [...], "skipped": [...], "removed": [...]},
+               "warnings": [...]}  or  {"status": 1, "error": "..."}
+
+The socket is only accessible by the user running the daemon. By default, it is created in
+the runtime directory of the user ($XDG_RUNTIME_DIR), or else in a directory accessible by the
+user only ('dict2tex-<user id>' in the directory for temporary files). The daemon does not
+replace, and the client does not connect to, sockets owned by other users.
+
+As the client of the command-line interface imports the whole dict2tex package, this module can
+also be run as a script, which serves as a thin client importing only the python modules needed
+for the request (falling back to a local build if no daemon is running):
+
+    python path/to/dict2tex/daemon.py config.yml [--socket PATH] [-q]
+
+'''
+
+import os
+
+__all__ = ['SOCKET_VARIABLE', 'default_socket_path', 'request_build']
+
+## environment variable overriding the default socket path
+SOCKET_VARIABLE = 'DICT2TEX_SOCKET'
+
+## maximum time (in seconds) for receiving a request and sending the response
+_TRANSFER_TIMEOUT = 10.
+
+##################################################
+
+def default_socket_path():
+    '''
+    Returns the socket path used if none is given: the value of the environment variable
+    DICT2TEX_SOCKET, 'dict2tex.sock' in the runtime directory of the user ($XDG_RUNTIME_DIR),
+    or 'daemon.sock' in the directory 'dict2tex-<user id>' in the directory for temporary files.
+
+    Returns:
+    --------
+    path: str
+    Socket path.
+
+    '''
+
+    if os.environ.get(SOCKET_VARIABLE):
+        return os.environ[SOCKET_VARIABLE]
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'dict2tex.sock')
+    return os.path.join(_private_directory(), 'daemon.sock')
+
+def serve(socket_path=None,idle_timeout=None,log=None):
+    '''
+    Runs the build daemon until it receives a shutdown request, or stays idle for idle_timeout seconds.
+
+    Arguments:
+    ----------
+    socket_path: str or None
+    Path of the Unix domain socket (optional; default: None, i.e., default_socket_path()).
+
+    idle_timeout: float or None
+    Time (in seconds) without requests after which the daemon terminates (optional;
+    default: None, i.e., no timeout).
+
+    log: file-like or None
+    Text stream to which requests and their outcome are logged (optional; default: None, i.e., no logging).
+
+    Returns:
+    --------
+    -
+
+    '''
+
+    import socket
+
+    socket_path = socket_path or default_socket_path()
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    if directory == _private_directory():
+        ## the directory for temporary files is shared with other users
+        try:
+            os.mkdir(directory, 0o700)
+        except FileExistsError:
+            _check_owner(directory)
+            if os.lstat(directory).st_mode & 0o077:
+                raise PermissionError("'%s' is accessible by other users." % (directory))
+    if ping(socket_path):
+        raise RuntimeError("A dict2tex daemon is already listening on '%s'." % (socket_path))
+    if os.path.lexists(socket_path):
+        ## left over by a daemon which was killed
+        _check_owner(socket_path)
+        os.remove(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)   ## socket accessible by the owner only
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen(64)
+    server.settimeout(idle_timeout)
+
+    builds = {}
+    try:
+        while True:
+            try:
+                connection, address = server.accept()
+            except socket.timeout:
+                return
+            with connection:
+                connection.settimeout(_TRANSFER_TIMEOUT)
+                stream = connection.makefile('rwb')
+                try:
+                    response, stop = _handle(stream.readline(),builds,log)
+                    stream.write(_encode(response))
+                    stream.flush()
+                except OSError:
+                    ## client disconnected
+                    stop = False
+                finally:
+                    stream.close()
+            if stop:
+                return
+    finally:
+        server.close()
+        try:
+            os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+
+def request(message,socket_path=None,timeout=None):
+    '''
+    Sends a request to the build daemon, and returns its response (see module documentation).
+
+    Arguments:
+    ----------
+    message: dict
+    Request, e.g. {'command': 'build', 'config': os.path.abspath('config.yml')}.
+
+    socket_path: str or None
+    Path of the Unix domain socket (optional; default: None, i.e., default_socket_path()).
+
+    timeout: float or None
+    Maximum time (in seconds) to wait for the response (optional; default: None, i.e., no limit).
+
+    Returns:
+    --------
+    response: dict
+    Response of the daemon.
+
+    Raises OSError (e.g. ConnectionRefusedError, FileNotFoundError) if no daemon is listening,
+    and PermissionError if the socket is owned by another user.
+
+    '''
+
+    import json
+    import socket
+
+    socket_path = socket_path or default_socket_path()
+    _check_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        with client.makefile('rwb') as stream:
+            stream.write(_encode(message))
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("The dict2tex daemon closed the connection without response.")
+    return json.loads(line)
+
+def request_build(config_file,socket_path=None,jobs=1,timeout=None):
+    '''
+    Asks the build daemon to (re-)build the outputs of a configuration file.
+
+    Arguments:
+    ----------
+    config_file: str
+    Name of the configuration file (relative to the current working directory of the client).
+
+    socket_path: str or None
+    Path of the Unix domain socket (optional; default: None, i.e., default_socket_path()).
+
+    jobs: int
+    Number of worker processes rendering the outputs of a full build (optional; default: 1).
+
+    timeout: float or None
+    Maximum time (in seconds) to wait for the response (optional; default: None, i.e., no limit).
+
+    Returns:
+    --------
+    response: dict
+    Response of the daemon (see module documentation).
+
+    '''
+
+    return request({'command': 'build', 'config': os.path.abspath(config_file), 'jobs': jobs},socket_path,timeout)
+
+def ping(socket_path=None):
+    '''
+    Checks whether a build daemon is listening.
+
+    Arguments:
+    ----------
+    socket_path: str or None
+    Path of the Unix domain socket (optional; default: None, i.e., default_socket_path()).
+
+    Returns:
+    --------
+    listening: bool
+    True if a daemon answered.
+
+    '''
+
+    try:
+        return request({'command': 'ping'},socket_path,timeout=5.).get('status') == 0
+    except (OSError, ValueError):
+        return False
+
+def print_response(response,quiet=False):
+    '''
+    Prints the response to a build request (files as printed by the command-line interface,
+    warnings and errors to stderr).
+
+    Arguments:
+    ----------
+    response: dict
+    Response of the daemon (see request_build()).
+
+    quiet: bool
+    If True, the files written and unchanged are not printed (optional; default: False).
+
+    Returns:
+    --------
+    status: int
+    Exit status (0 if the build succeeded).
+
+    '''
+
+    import sys
+
+    for warning in response.get('warnings', ()):
+        print("Warning: %s" % (warning), file=sys.stderr)
+    if response['status'] != 0:
+        print("Error: %s" % (response['error']), file=sys.stderr)
+        return 1
+    report = response['report']
+    lines = ["written: %s" % (f) for f in report['written']]
+    lines += ["unchanged: %s" % (f) for f in report['skipped']]
+    lines += ["removed: %s" % (f) for f in report['removed']]
+    if lines and not quiet:
+        print("\n".join(lines), flush=True)
+    return 0
+
+##################################################
+
+def _private_directory():
+    ## per-user directory for the socket if there is no runtime directory (see default_socket_path())
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), 'dict2tex-%d' % (os.getuid()))
+
+def _check_owner(path):
+    ## raises PermissionError if the file (not followed if it is a symbolic link) belongs to another user
+    if os.lstat(path).st_uid != os.getuid():
+        raise PermissionError("'%s' is owned by another user." % (path))
+
+def _encode(message):
+    import json
+    return (json.dumps(message) + "\n").encode('utf-8')
+
+def _handle(line,builds,log):
+    ## Returns the response to a request, and whether the daemon is to stop.
+    import json
+
+    try:
+        message = json.loads(line)
+        command = message['command']
+    except (ValueError, KeyError, TypeError):
+        return {'status': 1, 'error': "Malformed request."}, False
+
+    if command == 'ping':
+        return {'status': 0, 'pid': os.getpid(), 'configs': sorted(builds)}, False
+    if command == 'shutdown':
+        return {'status': 0}, True
+    if command != 'build':
+        return {'status': 1, 'error': "Unknown command '%s'." % (command)}, False
+
+    import time
+    import warnings
+
+    config_file = message.get('config')
+    if not isinstance(config_file, str) or not os.path.isabs(config_file):
+        return {'status': 1, 'error': "Build requests require the absolute path of the configuration file."}, False
+
+    t0 = time.perf_counter()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            report = _build(config_file,builds,message.get('jobs', 1))
+        except (OSError, ValueError, KeyError) as error:
+            ## the next request starts from scratch
+            builds.pop(config_file, None)
+            response = {'status': 1, 'error': str(error)}
+        except Exception as error:
+            ## e.g. a malformed configuration (TypeError): reported to the client, the daemon keeps running
+            builds.pop(config_file, None)
+            response = {'status': 1, 'error': "%s: %s" % (type(error).__name__, error)}
+        else:
+            response = {'status': 0, 'report': report.as_dict()}
+    response['warnings'] = [str(warning.message) for warning in caught]
+
+    if log is not None:
+        outcome = response.get('error') or "%d written, %d unchanged" % (len(response['report']['written']), len(response['report']['skipped']))
+        print("%s: %s (%.1f ms)" % (config_file, outcome, 1e3 * (time.perf_counter() - t0)), file=log, flush=True)
+    return response, False
+
+def _build(config_file,builds,jobs):
+    from .build import ConfigBuild
+    from .output import WriteReport
+
+    build = builds.get(config_file)
+    if build is None or build.jobs != jobs:
+        build = builds[config_file] = ConfigBuild(config_file,jobs=jobs)
+        return build.build()
+    report = build.update()
+    if report is None:
+        ## nothing changed
+        report = WriteReport()
+        for spec in build.specs:
+            report.add(spec['tex_file'], False)
+    return report
+
+def _client(argv):
+    ## thin client (see module documentation)
+    import sys
+
+    if not argv or argv[0].startswith('-'):
+        print("Usage: python daemon.py config.yml [--socket PATH] [-q]", file=sys.stderr)
+        return 2
+    config_file = argv[0]
+    socket_path = argv[argv.index('--socket') + 1] if '--socket' in argv else None
+    quiet = '-q' in argv or '--quiet' in argv
+
+    try:
+        response = request_build(config_file,socket_path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        ## no daemon running: local build
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from dict2tex.cli import main
+        return main(['build'] + argv)
+    except OSError as error:
+        print("Error: dict2tex daemon: %s" % (error), file=sys.stderr)
+        return 1
+    return print_response(response,quiet)
+
+##################################################
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(_client(sys.argv[1:]))
@@ -0,0 +1,180 @@
+'''
+Derived parameters.
+
+A derived parameter is defined by a function of other parameters (e.g. NE = int(gamma*N)),
+rather than by a fixed value. Derived entries are stored in a ParameterSet (see
+ParameterSet.derive()) and behave like ordinary parameter entries, except that their value is
+
+- evaluated lazily, i.e., only when it is accessed (e.g. by tex_table() for the sections it
+  renders; tex_macros() does not need values, and never evaluates derivations),
+- evaluated in dependency order (inputs may themselves be derived parameters),
+- memoized, and recomputed only after one of its (direct or indirect) inputs changed.
+
+Cyclic dependencies are detected at evaluation time, or explicitly by ParameterSet.check_cycles().
+
+'''
+
+from collections.abc import Mapping
+
+__all__ = ['DerivedEntry']
+
+## fields of a derived entry (same order as in example/create_params_file.py)
+DERIVED_FIELDS = ('latex', 'value', 'unit', 'description', 'section')
+
+##################################################
+
+class DerivedEntry(Mapping):
+    '''
+    Parameter entry whose value is a function of other parameters.
+
+    The entry becomes usable once it is added to a ParameterSet (see ParameterSet.derive()).
+
+    Arguments:
+    ----------
+    func: callable
+    Function computing the value from the values of the input parameters (passed as positional
+    arguments, in the order of inputs).
+
+    inputs: list(str)
+    Keys of the input parameters.
+
+    unit, description, section, latex:
+    Remaining fields of the entry (see example/create_params_file.py).
+
+    '''
+
+    __slots__ = ('func', 'inputs', 'latex', 'unit', 'description', 'section', '_pars', '_value', '_valid')
+
+    def __init__(self, func, inputs, unit, description, section, latex):
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.latex = latex
+        self.unit = unit
+        self.description = description
+        self.section = section
+        self._pars = None
+        self._value = None
+        self._valid = False
+
+    def __getitem__(self, fld):
+        if fld == 'value':
+            if self._valid:
+                return self._value
+            if self._pars is None:
+                raise ValueError("Derived parameter is not part of a ParameterSet.")
+            return self._pars._evaluate(self)
+        if fld in ('latex', 'unit', 'description', 'section'):
+            return getattr(self, fld)
+        raise KeyError(fld)
+
+    def __iter__(self):
+        return iter(DERIVED_FIELDS)
+
+    def __len__(self):
+        return len(DERIVED_FIELDS)
+
+    def __repr__(self):
+        return "DerivedEntry(%s <- %s, section=%r)" % (getattr(self.func, '__name__', 'func'), ', '.join(self.inputs), self.section)
+
+    def copy(self):
+        '''
+        Returns an unevaluated copy of the entry, not bound to any ParameterSet.
+        '''
+
+        return DerivedEntry(self.func, self.inputs, self.unit, self.description, self.section, self.latex)
+
+##################################################
+
+def evaluate_derived(pars,entry):
+    '''
+    Evaluates a derived entry and all derived entries it depends on (in dependency order).
+
+    The dependency graph is traversed iteratively, such that long chains of derivations do
+    not exhaust the recursion limit.
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary containing the entry and its inputs.
+
+    entry: DerivedEntry
+    Derived entry.
+
+    Returns:
+    --------
+    value:
+    Value of the entry.
+
+    '''
+
+    stack = [entry]
+    expanded = set()   ## ids of entries whose inputs are on the stack (i.e., on the current path)
+    while stack:
+        current = stack[-1]
+        if current._valid:
+            stack.pop()
+            continue
+        if id(current) in expanded:
+            ## all inputs are evaluated
+            stack.pop()
+            expanded.discard(id(current))
+            current._value = current.func(*[pars[k]['value'] for k in current.inputs])
+            current._valid = True
+            continue
+        expanded.add(id(current))
+        for k in current.inputs:
+            if k not in pars:
+                raise KeyError("Input '%s' of derived parameter '%s' is not defined." % (k, _key_of(pars, current)))
+            dependency = pars[k]
+            if isinstance(dependency, DerivedEntry) and not dependency._valid:
+                if id(dependency) in expanded:
+                    path = [_key_of(pars, e) for e in stack if id(e) in expanded] + [k]
+                    raise ValueError("Cyclic dependency of derived parameters: %s." % (' -> '.join(path[path.index(k):])))
+                stack.append(dependency)
+    return entry._value
+
+def find_cycle(pars):
+    '''
+    Searches the dependency graph of the derived entries of a parameter dictionary for cycles.
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    Returns:
+    --------
+    cycle: list(str) or None
+    Keys forming a cycle (first key = last key), or None if there is no cycle.
+
+    '''
+
+    done = set()
+    for root, root_entry in pars.items():
+        if root in done or not isinstance(root_entry, DerivedEntry):
+            continue
+        ## iterative depth-first search; path holds (key, iterator over its inputs)
+        path = [(root, iter(root_entry.inputs))]
+        on_path = {root}
+        while path:
+            k, inputs = path[-1]
+            for dependency in inputs:
+                if dependency in on_path:
+                    keys = [key for key, it in path]
+                    return keys[keys.index(dependency):] + [dependency]
+                if dependency not in done and isinstance(pars.get(dependency), DerivedEntry):
+                    path.append((dependency, iter(pars[dependency].inputs)))
+                    on_path.add(dependency)
+                    break
+            else:
+                path.pop()
+                on_path.discard(k)
+                done.add(k)
+    return None
+
+def _key_of(pars,entry):
+    ## key of a derived entry (only needed for error messages)
+    for k, e in pars.items():
+        if e is entry:
+            return k
+    return '?'
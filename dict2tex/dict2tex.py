@@ -3,13 +3,17 @@ Collection of functions used to convert parameter dictionaries into LaTeX code.
 
 (Tom Tetzlaff, 2022)
 
+Note: To keep "import dict2tex" cheap, only lightweight standard-library modules are imported
+at module level. Heavier modules (json, yaml, numpy, ...) are imported inside the functions using them.
+
 '''
 
-import numpy as np
+from .output import write_if_changed
+from .escape import get_sanitizer, sanitize, tex_verb
 
 ##################################################
 
-def load_parameters_from_json(filename):
+def load_parameters_from_json(filename,stats=None,cache=False):
     '''
     Reads parameter data from json file into a python dictionary.
 
@@ -18,6 +22,13 @@ def load_parameters_from_json(filename):
     filename: str
     Name of json file containing parameter definitions.
 
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    cache: bool
+    If True, the parsed parameters are cached in a binary file next to the json file, and
+    loaded from there as long as the json file is unchanged (see dict2tex/cache.py; optional; default: False).
+
     Returns:
     --------
     pars: dict
@@ -26,12 +37,224 @@ def load_parameters_from_json(filename):
     '''
 
     import json
+
+    if cache:
+        from .cache import load_cached
+        if stats is None:
+            return load_cached(filename,json.loads,'json')
+        with stats.timer('load'):
+            return load_cached(filename,json.loads,'json',stats)
+
+    if stats is not None:
+        with stats.timer('load'):
+            pars = load_parameters_from_json(filename)
+        stats.count('files_opened')
+        return pars
     
     with open(filename, 'r') as fp:
         pars = json.load(fp)
         
     return pars
 
+## parameter file formats, by file extension
+PARAMETER_FORMATS = {'.json': 'json', '.yml': 'yaml', '.yaml': 'yaml'}
+
+def load_parameters(filename,stats=None,cache=False):
+    '''
+    Reads parameter data from a json or yaml file into a python dictionary.
+
+    The file format is determined by the file extension (see PARAMETER_FORMATS). Yaml files are
+    parsed with the libyaml-based loader (yaml.CSafeLoader) if available, and with the (much slower)
+    pure-python yaml.SafeLoader otherwise.
+
+    Arguments:
+    ----------
+    filename: str
+    Name of json or yaml file containing parameter definitions.
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    cache: bool
+    If True, the parsed parameters are cached in a binary file next to the parameter file, and
+    loaded from there as long as the parameter file is unchanged (see dict2tex/cache.py; optional; default: False).
+
+    Returns:
+    --------
+    pars: dict
+    Parameter dictionary.
+
+    '''
+
+    import os
+
+    extension = os.path.splitext(os.fspath(filename))[1].lower()
+    if extension not in PARAMETER_FORMATS:
+        raise ValueError("%s: unknown parameter file format (supported extensions: %s)."
+                         % (filename, ', '.join(sorted(PARAMETER_FORMATS))))
+    format_name = PARAMETER_FORMATS[extension]
+    parse = _parse_json_parameters if format_name == 'json' else _parse_yaml_parameters
+
+    if stats is None:
+        return _load_parameters(filename,parse,format_name,cache)
+
+    with stats.timer('load'):
+        pars = _load_parameters(filename,parse,format_name,cache,stats)
+    stats.count('files_opened')
+    return pars
+
+def _load_parameters(filename,parse,format_name,cache,stats=None):
+    if cache:
+        from .cache import load_cached
+        return load_cached(filename,parse,format_name,stats)
+    with open(filename, 'rb') as fp:
+        return parse(fp.read())
+
+def _parse_json_parameters(data):
+    import json
+    return _check_parameters(json.loads(data))
+
+def _parse_yaml_parameters(data):
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)  ## libyaml, if available
+    try:
+        pars = yaml.load(data, Loader=loader)
+    except yaml.YAMLError as error:
+        raise ValueError(str(error)) from error
+    return _check_parameters(pars)
+
+def _check_parameters(pars):
+    ## minimal validation (shared by all formats): parameters are a mapping of parameter keys to entries
+    if not isinstance(pars, dict):
+        raise ValueError("parameters must be a mapping (found %s)." % (type(pars).__name__))
+    return pars
+
+def iter_parameters_from_json(filename,chunk_size=1<<16):
+    '''
+    Reads parameter data from json file incrementally.
+
+    The top-level json object is parsed entry by entry, and (key, entry) pairs are yielded
+    as soon as they are complete. Memory consumption is therefore bounded by the size of the
+    largest single entry, rather than by the size of the full file.
+
+    The returned iterator can be passed directly to tex_table(), tex_macros(), get_section_subdict()
+    and group_sections() instead of a parameter dictionary (it can be consumed only once).
+
+    Arguments:
+    ----------
+    filename: str
+    Name of json file containing parameter definitions.
+
+    chunk_size: int
+    Number of characters read from the file at once (optional; default: 65536).
+
+    Returns:
+    --------
+    items: iterator
+    Iterator over (key, entry) pairs, in the order of the file.
+
+    '''
+
+    import json
+
+    decoder = json.JSONDecoder()
+    whitespace = ' \t\n\r'
+
+    with open(filename, 'r') as fp:
+        ## opening brace of the top-level object
+        buf = ''
+        eof = False
+        while not buf and not eof:
+            chunk = fp.read(chunk_size)
+            eof = not chunk
+            buf = chunk.lstrip(whitespace)
+        if not buf.startswith('{'):
+            raise ValueError("%s: top-level json value must be an object." % (filename))
+        pos = 1
+
+        first = True
+        n_read = chunk_size
+        while True:
+            member = _parse_json_member(decoder, buf, pos, first, eof)
+            if member is None:
+                ## incomplete member: read more data (increase read size geometrically to
+                ## avoid quadratic cost for entries larger than chunk_size)
+                if eof:
+                    raise ValueError("%s: unexpected end of json data." % (filename))
+                chunk = fp.read(n_read)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                n_read = max(n_read, len(buf))
+                continue
+            n_read = chunk_size
+            key, entry, pos = member
+            if key is None:
+                break
+            first = False
+            yield key, entry
+
+        ## only whitespace may follow the top-level object
+        rest = buf[pos:]
+        while not rest.strip(whitespace) and not eof:
+            rest = fp.read(chunk_size)
+            eof = not rest
+        if rest.strip(whitespace):
+            raise ValueError("%s: extra data after top-level json object." % (filename))
+
+def _parse_json_member(decoder,buf,pos,first,eof):
+    ## Parses the member ('"key": value' plus the following delimiter) starting at pos.
+    ## Returns (key, value, end) with key None at the end of the object, or None if buf
+    ## does not (yet) contain the complete member.
+    import json
+
+    skip = json.decoder.WHITESPACE.match
+    n = len(buf)
+
+    pos = skip(buf, pos).end()
+    if pos == n:
+        return None
+    if buf[pos] == '}':
+        return None, None, pos + 1
+    if not first:
+        if buf[pos] != ',':
+            raise ValueError("Invalid json: expected ',' at position %d." % (pos))
+        pos = skip(buf, pos + 1).end()
+
+    try:
+        key, pos = decoder.raw_decode(buf, pos)
+        if type(key) != str:
+            raise ValueError("Invalid json: object keys must be strings.")
+        pos = skip(buf, pos).end()
+        if pos == n:
+            return None
+        if buf[pos] != ':':
+            raise ValueError("Invalid json: expected ':' at position %d." % (pos))
+        value, pos = decoder.raw_decode(buf, skip(buf, pos + 1).end())
+    except json.JSONDecodeError:
+        if eof:
+            raise
+        return None
+
+    ## a number followed by the beginning of a fraction or exponent at the end of the buffer
+    ## (e.g. '1.' or '1e-' of '1.5' or '1e-3') is truncated: it was decoded without them
+    if not eof and type(value) in (int, float):
+        tail = pos
+        while tail < n and buf[tail] in '0123456789.eE+-':
+            tail += 1
+        if tail == n:
+            return None
+
+    ## the member is only complete if the following delimiter has been read
+    ## (otherwise, e.g., a number may be truncated at the end of the buffer)
+    end = skip(buf, pos).end()
+    if end == n:
+        if eof:
+            raise ValueError("Invalid json: unexpected end of data.")
+        return None
+    return key, value, end
+
 ##################################################
 
 def get_section_subdict(pardict,section):
@@ -51,7 +274,15 @@ def get_section_subdict(pardict,section):
     subdict: dict
     Dictionary containing subset of parameters with matching section.
     '''
-    
+
+    if hasattr(pardict, 'section_index'):
+        ## indexed container (e.g. ParameterSet): no scan required
+        return {k: pardict[k] for k in pardict.section_index().get(section, ())}
+
+    if not hasattr(pardict, 'keys'):
+        ## iterator over (key, entry) pairs (e.g. from iter_parameters_from_json())
+        return {k: entry for k, entry in pardict if entry['section'] == section}
+
     subdict={}
     for k in pardict:
         if pardict[k]['section'] == section:
@@ -60,6 +291,84 @@ def get_section_subdict(pardict,section):
 
 ##################################################
 
+def index_sections(pardict):
+    '''
+    Groups the keys of a parameter dictionary by section in a single pass.
+
+    Containers maintaining their own section index (such as ParameterSet) provide a method
+    section_index(), which is used instead.
+
+    Arguments:
+    ----------
+    pardict: dict
+    Parameter dictionary.
+
+    Returns:
+    --------
+    index: dict
+    Dictionary mapping each section name to a dictionary whose keys are the parameter keys
+    of this section (in order of appearance in pardict).
+
+    '''
+
+    if hasattr(pardict, 'section_index'):
+        return pardict.section_index()
+
+    index = {}
+    for k in pardict:
+        section = pardict[k]['section']
+        if section in index:
+            index[section][k] = None
+        else:
+            index[section] = {k: None}
+    return index
+
+def group_sections(pars,sections=None):
+    '''
+    Groups parameters by section in a single pass.
+
+    In contrast to index_sections(), pars may also be an iterator over (key, entry) pairs
+    (e.g. as returned by iter_parameters_from_json()). If sections is given, only entries
+    of these sections are retained, such that memory consumption is bounded by the size of
+    the selected sections.
+
+    Arguments:
+    ----------
+    pars: dict or iterator
+    Parameter dictionary, or iterator over (key, entry) pairs.
+
+    sections: list(str) or None
+    Sections to be retained. If None, all sections are retained (optional; default: None).
+
+    Returns:
+    --------
+    groups: dict
+    Dictionary mapping each section name to a parameter subdictionary.
+
+    '''
+
+    if hasattr(pars, 'keys'):
+        index = index_sections(pars)
+        if sections is None:
+            sections = index
+        return {section: {k: pars[k] for k in index[section]} for section in sections if section in index}
+
+    if sections is not None:
+        sections = set(sections)
+
+    groups = {}
+    for k, entry in pars:
+        section = entry['section']
+        if sections is not None and section not in sections:
+            continue
+        if section in groups:
+            groups[section][k] = entry
+        else:
+            groups[section] = {k: entry}
+    return groups
+
+##################################################
+
 #def tex_table_header(texfile,table_columns,table_column_widths=None):
 def tex_table_header(texfile,table_columns):    
     '''
@@ -82,10 +391,30 @@ def tex_table_header(texfile,table_columns):
 
     '''
 
-    n_columns =  len(table_columns)
-    
-    f=open(texfile, 'w')
-        
+    with open(texfile, 'w') as f:
+        f.write(tex_table_header_string(table_columns))
+
+def tex_table_header_string(table_columns,column_spec=None):
+    '''
+    Returns the header of the LaTeX table as a string.
+
+    Arguments:
+    ----------
+    table_columns: list(dict)
+    List of dictionaries defining table columns (field and title).
+
+    column_spec: str or None
+    Column specification (see table_column_spec()). If given, the header starts the longtable
+    environment (optional; default: None, i.e., the table environment is defined in the
+    LaTeX document including the table).
+
+    Returns:
+    --------
+    header: str
+    LaTeX code of the table header.
+
+    '''
+
     # if table_column_widths == None:
     #     f.write(r"\begin{tabular}{|%s}" % (n_columns*"l|") + "\n")
     # else:
@@ -103,15 +432,11 @@ def tex_table_header(texfile,table_columns):
 
     # f.write(r"\hline" + "\n")
 
-    for c in range(n_columns):
-        f.write(r"\textbf{%s}" % (table_columns[c]['title'])) ## column title        
-        if c<n_columns-1:
-            f.write(r"  &  ")  ## column separator
-
-    f.write(r"\\" + "\n")
-    f.write(r"\endhead" + "\n")    
-    f.write(r"\hline" + "\n")
-    f.close()
+    titles = [r"\textbf{%s}" % (column['title']) for column in table_columns]  ## column titles
+    header = r"  &  ".join(titles) + r"\\" + "\n" + r"\endhead" + "\n" + r"\hline" + "\n"
+    if column_spec is not None:
+        header = r"\begin{longtable}{%s}" % (column_spec) + "\n" + r"\hline" + "\n" + header
+    return header
 
 def tex_table_footer(texfile):
     '''
@@ -132,6 +457,171 @@ def tex_table_footer(texfile):
     f.write(r"\end{tabular}\\" + "\n")
     f.close()
 
+def tex_table_footer_string(column_spec=None):
+    '''
+    Returns the footer of the LaTeX table as a string.
+
+    Arguments:
+    ----------
+    column_spec: str or None
+    Column specification passed to tex_table_header_string() (optional; default: None).
+
+    Returns:
+    --------
+    footer: str
+    LaTeX code closing the longtable environment if column_spec is given, '' otherwise.
+
+    '''
+
+    if column_spec is None:
+        return ''
+    return r"\end{longtable}" + "\n"
+
+def table_column_spec(table_columns,table_column_widths,table_body=None):
+    '''
+    Returns a LaTeX column specification with fixed column widths, e.g. '|p{0.200\\linewidth-2\\tabcolsep}|...|'.
+
+    With fixed column widths, longtable does not need to determine the widths of the columns
+    from their contents in several LaTeX runs. The specification requires the LaTeX package calc.
+
+    Arguments:
+    ----------
+    table_columns: list(dict)
+    List of dictionaries defining table columns (field and title).
+
+    table_column_widths: list(float) or str
+    List of relative column widths (one per column), or 'auto' (widths estimated from the
+    contents of the table, see estimate_column_widths()).
+
+    table_body: str or None
+    LaTeX code of the table rows (required for table_column_widths='auto'; optional; default: None).
+
+    Returns:
+    --------
+    column_spec: str
+    Column specification.
+
+    '''
+
+    n_columns = len(table_columns)
+    if table_column_widths == 'auto':
+        if table_body is None:
+            raise ValueError("Automatic column widths require the table rows.")
+        widths = estimate_column_widths(table_body,table_columns)
+    else:
+        if len(table_column_widths) != n_columns:
+            raise ValueError("Number of elements in 'table_column_widths' must match number of columns.")
+        total = float(sum(table_column_widths))
+        if not total > 0:
+            raise ValueError("Elements of 'table_column_widths' must be positive.")
+        widths = [w / total for w in table_column_widths]
+
+    return "|" + "".join([r"p{%.3f\linewidth-2\tabcolsep}|" % (w) for w in widths])
+
+def estimate_column_widths(table_body,table_columns,quantile=0.95):
+    '''
+    Estimates relative column widths from the contents of a table.
+
+    The width of a column is taken proportional to the (approximate) number of printed
+    characters of its cells (LaTeX commands, colors, braces and math delimiters removed).
+    To avoid that single long entries dominate, the given quantile of the cell lengths is used,
+    and the column title is a lower bound. Column padding is accounted for. The markup of each column is removed in a few
+    passes of regular expressions over the concatenated cells of the column, rather than cell by cell.
+
+    Arguments:
+    ----------
+    table_body: str
+    LaTeX code of the table rows.
+
+    table_columns: list(dict)
+    List of dictionaries defining table columns (field and title).
+
+    quantile: float
+    Quantile of the cell lengths defining the width of a column (optional; default: 0.95).
+
+    Returns:
+    --------
+    widths: list(float)
+    Relative column widths (summing up to 1).
+
+    '''
+
+    import re
+
+    n_columns = len(table_columns)
+    columns = [[] for column in table_columns]
+    for line in table_body.split("\n"):
+        ## table rows (skip \hline and section titles)
+        if not line.endswith("\\\\") or line.startswith(r"\multicolumn"):
+            continue
+        cells = line[:-2].split("  &  ")
+        if len(cells) == n_columns:
+            for column, cell in zip(columns, cells):
+                column.append(cell)
+
+    lengths = []
+    for column, cells in zip(table_columns, columns):
+        title_length = len(str(column['title']))
+        if not cells:
+            lengths.append(max(title_length, 1))
+            continue
+        text = "\n".join(cells)
+        text = re.sub(r"\\noindent\\color\{[^{}\n]*\}", "", text)       ## text color
+        text = re.sub(r"\\verb(.)(.*?)\1", _verbatim_text, text)          ## verbatim text (printed as is)
+        text = re.sub(r"\\(?:[a-zA-Z]+\*?|.)", "x", text)                 ## commands: about one character
+        text = re.sub(r"[{}$^_]", "", text)
+        cell_lengths = sorted(map(len, text.split("\n")))
+        lengths.append(max(cell_lengths[int(quantile * (len(cell_lengths) - 1))], title_length, 1))
+
+    ## column padding (2\tabcolsep, subtracted from each column width) of about two characters
+    lengths = [length + 2 for length in lengths]
+    total = float(sum(lengths))
+    return [length / total for length in lengths]
+
+def _verbatim_text(match):
+    ## backslashes of verbatim text are printed (and must not be taken for commands)
+    return match.group(2).replace("\\", "/")
+
+def _assemble_table(table_columns,table_body,table_column_widths=None):
+    ## Returns the complete LaTeX code of a table (header, rows and, for fixed column widths, the longtable environment).
+    if table_column_widths is None:
+        return tex_table_header_string(table_columns) + table_body
+    column_spec = table_column_spec(table_columns,table_column_widths,table_body)
+    return tex_table_header_string(table_columns,column_spec) + table_body + tex_table_footer_string(column_spec)
+
+##################################################
+
+def table_section_specs(table_sections,section_text_color='black',section_title_color='lightgray'):
+    '''
+    Resolves the table section definitions, i.e., fills in default titles and colors.
+
+    Arguments:
+    ----------
+    table_sections: list(dict)
+    List of dictionaries defining table sections to be printed, section titles, and text color.
+
+    section_text_color: str
+    Default LaTeX color for text fonts in table (optional; default: "black").
+
+    section_title_color: str
+    Default LaTeX background color for subtable title (optional; default: "lightgray").
+
+    Returns:
+    --------
+    specs: list(tuple)
+    List of tuples (section, section_title, color, title_color), one per table section.
+    section_title is None if no title is defined.
+
+    '''
+
+    specs = []
+    for table_section in table_sections:
+        specs.append((table_section['section'],
+                      table_section.get('title', None),
+                      table_section.get('color', section_text_color),
+                      table_section.get('title_color', section_title_color)))
+    return specs
+
 ##################################################
 def tex_table_core(pars,tex_file,table_columns,table_sections,section_text_color,section_title_color,macro_prefix='P'):
     '''
@@ -164,24 +654,52 @@ def tex_table_core(pars,tex_file,table_columns,table_sections,section_text_color
     -
 
     '''
-    
-    for cs in range(len(table_sections)):
-        section = table_sections[cs]['section']
-        if 'title' in table_sections[cs].keys():                
-            section_title = table_sections[cs]['title']
-        else:
-            section_title = None
-        if 'color' in table_sections[cs].keys():        
-            section_color = table_sections[cs]['color']
-        else:
-            section_color = section_text_color
-        if 'title_color' in table_sections[cs].keys():
-            section_title_color = table_sections[cs]['title_color']
-        else:
-            section_title_color = section_title_color
-        pars_section = get_section_subdict(pars,section)
-        
-        tex_subtable(pars_section,section_title,table_columns,tex_file,section_color,section_title_color,macro_prefix)
+
+    with open(tex_file, 'a') as f:
+        tex_table_core_stream(pars,f,table_columns,table_sections,section_text_color,section_title_color,macro_prefix)
+
+def tex_table_core_stream(pars,stream,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',stats=None):
+    '''
+    Same as tex_table_core(), but writes to a text stream.
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary (containing all parameter sections).
+
+    stream: file-like
+    Target text stream (any object with a write() method).
+
+    For the remaining arguments, see tex_table_core().
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    Returns:
+    --------
+    -
+
+    '''
+
+    specs = table_section_specs(table_sections,section_text_color,section_title_color)
+
+    if stats is None:
+        groups = group_sections(pars, [spec[0] for spec in specs])
+        for section, section_title, section_color, title_color in specs:
+            tex_subtable_stream(groups.get(section, {}),section_title,table_columns,stream,section_color,title_color,macro_prefix)
+        return
+
+    ## instrumented version
+    with stats.timer('group'):
+        groups = group_sections(pars, [spec[0] for spec in specs])
+    n_fields = sum(len(column['field']) if type(column['field'])==list else 1 for column in table_columns)
+    with stats.timer('format'):
+        for section, section_title, section_color, title_color in specs:
+            pars_section = groups.get(section, {})
+            with stats.section_timer(section):
+                tex_subtable_stream(pars_section,section_title,table_columns,stream,section_color,title_color,macro_prefix)
+            stats.count('rows', len(pars_section))
+            stats.count('cells', len(pars_section) * n_fields)
 
 ##################################################
 
@@ -218,71 +736,230 @@ def tex_subtable(pars_section,section_title,table_columns,texfile,color='black',
 
     '''
 
-    n_columns =  len(table_columns)
+    with open(texfile, 'a') as f:
+        tex_subtable_stream(pars_section,section_title,table_columns,f,color,section_title_color,macro_prefix)
+
+def tex_subtable_stream(pars_section,section_title,table_columns,stream,color='black',section_title_color='lightgray',macro_prefix='P'):
+    '''
+    Same as tex_subtable(), but writes to a text stream (one write per table row).
+
+    Arguments:
+    ----------
+    stream: file-like
+    Target text stream (any object with a write() method).
+
+    For the remaining arguments, see tex_subtable().
+
+    Returns:
+    --------
+    -
+
+    '''
 
-    f=open(texfile, 'a')
     if section_title!=None:
-        f.write(r"\multicolumn{%d}{|>{\columncolor{%s}}c|}{\textbf{%s}}\\" % (n_columns,section_title_color,section_title) + "\n")
-        f.write(r"\hline" + "\n")
+        stream.write(tex_subtable_title_string(len(table_columns),section_title,section_title_color))
 
+    render_row = compile_row_renderer(table_columns,color,macro_prefix)
     for k in pars_section:
-        for c in range(n_columns):
-            field = table_columns[c]['field']
-
-            ## turn field into a list unless it is already a list to avoid redundant code
-            if type(field)!=list:
-                field = [field]
-            
-            for cf,fld in enumerate(field):  ## necessary to handle case where column consist of multiple fields
-
-                ## field specific text formatting
-                prefix = ''
-                if fld == 'key':
-                    value = k
-                elif fld == 'macro':
-                    value = k
-                    prefix = macro_prefix
-                else:
-                    value = pars_section[k][fld]
-                fld_str = convert_field_to_tex_string(value, fld, prefix=prefix)
-                
-                ## define text color
-                #f.write(r"\textcolor{%s}{%s}" % (color,fld_str))  ## not working with \verb
-                f.write(r"{\noindent\color{%s}{}%s}" % (color,fld_str))
-
-                ## add space between fields combined in one column
-                if cf<len(field)-1:
-                    f.write(r"\,") 
-
-            ## add column separator
-            if c<n_columns-1:
-                f.write(r"  &  ")  
-                
-        f.write(r"\\" + "\n")
- 
-        f.write(r"\hline" + "\n")        
-    f.close()
+        stream.write(render_row(k,pars_section[k]))
+
+def tex_subtable_title_string(n_columns,section_title,section_title_color='lightgray'):
+    '''
+    Returns the LaTeX code of a subtable title row.
+
+    Arguments:
+    ----------
+    n_columns: int
+    Number of table columns.
+
+    section_title: str
+    (Sub-)table header.
+
+    section_title_color: str
+    Background color of section title (optional; default: 'lightgray').
+
+    Returns:
+    --------
+    title_str: str
+    LaTeX code of the title row.
+
+    '''
+
+    return r"\multicolumn{%d}{|>{\columncolor{%s}}c|}{\textbf{%s}}\\" % (n_columns,section_title_color,section_title) + "\n" + r"\hline" + "\n"
+
+def tex_table_row_string(key,entry,table_columns,color='black',macro_prefix='P'):
+    '''
+    Returns the LaTeX code of the table row describing a single parameter.
+
+    For rendering many rows with the same columns, use compile_row_renderer().
+
+    Arguments:
+    ----------
+    key: str
+    Parameter key.
+
+    entry: dict
+    Parameter definition (value, unit, description, ...).
+
+    table_columns: list(dict)
+    List of dictionaries defining table columns (field and title).
+
+    color: str
+    LaTeX color used for the corresponding text (optional; default: 'black').
+
+    macro_prefix: str
+    Prefix used for LaTeX macro names.
+
+    Returns:
+    --------
+    row_str: str
+    LaTeX code of the table row (including the terminating \\hline).
+
+    '''
+
+    return compile_row_renderer(table_columns,color,macro_prefix)(key,entry)
+
+def compile_row_renderer(table_columns,color='black',macro_prefix='P'):
+    '''
+    Compiles a table column specification into a function rendering a single table row.
+
+    Everything that does not depend on the parameter itself (field lists, column separators,
+    text color, macro prefix, and the choice of the field-specific formatting) is resolved once,
+    such that rendering a row requires a single string formatting operation.
+    The result is identical to the formatting by convert_field_to_tex_string().
+
+    Arguments:
+    ----------
+    table_columns: list(dict)
+    List of dictionaries defining table columns (field and title).
+
+    color: str
+    LaTeX color used for the corresponding text (optional; default: 'black').
+
+    macro_prefix: str
+    Prefix used for LaTeX macro names (optional; default: 'P').
+
+    Returns:
+    --------
+    render_row: function
+    Function render_row(key, entry) returning the LaTeX code of the table row
+    (see tex_table_row_string()).
+
+    '''
+
+    ## text color (not working with \verb: r"\textcolor{%s}{%s}")
+    field_open = (r"{\noindent\color{%s}{}" % (color)).replace('%', '%%')
+
+    cells = []
+    getters = []
+    for column in table_columns:
+        field = column['field']
+
+        ## turn field into a list unless it is already a list to avoid redundant code
+        if type(field)!=list:
+            field = [field]
+
+        fld_templates = []
+        for fld in field:  ## necessary to handle case where column consist of multiple fields
+            fld_template, getter = _compile_field(fld, macro_prefix, column)
+            fld_templates.append(field_open + fld_template + '}')
+            getters.append(getter)
+
+        ## add space between fields combined in one column
+        cells.append(r"\,".join(fld_templates))
+
+    ## add column separators
+    template = r"  &  ".join(cells) + r"\\" + "\n" + r"\hline" + "\n"
+    getters = tuple(getters)
+
+    def render_row(key,entry):
+        return template % tuple([getter(key,entry) for getter in getters])
+
+    return render_row
+
+def _compile_field(fld,macro_prefix,column):
+    ## Returns a %-template and a function getter(key, entry) providing the template argument.
+
+    ## verbatim (typewriter) for keys (with a delimiter not contained in the key, see tex_verb())
+    if fld == 'key':
+        sanitize_key = get_sanitizer('key')
+        if sanitize_key is None:
+            return "%s", _get_key
+        return "%s", lambda key, entry: tex_verb(sanitize_key(key))
+
+    ## verbatim for macros, remove characters such as "_", add prefixes, e.g., "\P"
+    elif fld == 'macro':
+        sanitize_macro = get_sanitizer('macro') or str
+        macro_start = '\\' + sanitize_macro(macro_prefix)
+        return "%s", lambda key, entry: tex_verb(macro_start + sanitize_macro(key))
+
+    elif fld == 'value':
+        array_format = column.get('array_format', 'full')
+        array_items = column.get('array_items', 3)
+        if array_format == 'full' and array_items == 3:
+            return "%s", _get_value
+        return "%s", lambda key, entry: _get_value(key, entry, array_format, array_items)
+
+    elif fld == 'description':
+        sanitize_description = get_sanitizer('description')
+        if sanitize_description is None:
+            return "%s", lambda key, entry: entry['description']
+        return "%s", lambda key, entry: _get_description(key, entry, sanitize_description)
+
+    elif fld == 'unit':
+        sanitize_unit = get_sanitizer('unit')
+        if sanitize_unit is None:
+            return "%s", lambda key, entry: entry['unit']
+        return "%s", lambda key, entry: _get_string(entry['unit'], sanitize_unit)
+
+    ## no special formatting (e.g. section)
+    else:
+        return "%s", lambda key, entry: entry[fld]
+
+def _get_key(key,entry):
+    ## fast path of tex_verb()
+    if '+' not in key:
+        return '\\verb+' + key + '+'
+    return tex_verb(key)
+
+def _get_value(key,entry,array_format='full',array_items=3):
+    value = entry['value']
+    ## fast path for the most common types
+    if type(value) is float or type(value) is int:
+        return "$%g$" % value
+    return convert_field_to_tex_string(value, 'value', array_format=array_format, array_items=array_items)
+
+def _get_description(key,entry,sanitize):
+    description = entry['description']
+    if type(description) is str:
+        return sanitize(description)   ## e.g. remove obsolete $'s
+    return convert_field_to_tex_string(description, 'description')
+
+def _get_string(field,sanitize):
+    return sanitize(field) if type(field) is str else field
 
 ##################################################
 
 #def tex_table(pars,params_tex_file,table_columns,table_column_widths,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P'):
-def tex_table(pars,params_tex_file,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P'):
+def tex_table(pars,params_tex_file,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',report=None,stats=None,table_column_widths=None):
     '''
     Creates LaTeX code for a parameter table from parameter definitions stored in a python dictionary, ad writes it to file.
 
+    The table is rendered in memory. The target file is only replaced (atomically) if its content
+    changes, such that an unchanged file keeps its modification time.
+
     Arguments:
     ----------
-    pars: dict
-    Parameter dictionary.
+    pars: dict or iterator
+    Parameter dictionary, or iterator over (key, entry) pairs (see iter_parameters_from_json()).
 
     params_tex_file: str
     Name of the target LaTeX file containing parameter table.
 
     table_columns: list(dict)
-    List of dictionaries defining table columns (field and title).
-
-    #table_column_widths: list(float) or None
-    #List of relative columns widths. If None, column widths are automatically chosen by LaTeX.
+    List of dictionaries defining table columns (field and title). Columns showing array-valued
+    parameters (lists, numpy arrays) may define 'array_format' ('full', 'ends' or 'stats') and
+    'array_items' (see format_array()).
 
     table_sections: list(dict)
     List of dictionaries defining table sections to be printed, section titles, and text color.
@@ -296,24 +973,90 @@ def tex_table(pars,params_tex_file,table_columns,table_sections,section_text_col
     macro_prefix: str
     Prefix used for LaTeX macro names (optional; default: "P").
 
+    report: WriteReport or None
+    Report in which it is recorded whether the file was written or skipped (optional; default: None).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    table_column_widths: list(float), str or None
+    List of relative column widths (one per column), or 'auto' (widths estimated from the
+    table contents). If given, the table is wrapped in a longtable environment with fixed
+    column widths (see table_column_spec()), which LaTeX typesets in a single run. If None,
+    the table environment is defined in the LaTeX document including the table
+    (optional; default: None).
+
+    Returns:
+    --------
+    written: bool
+    True if the file was written, False if it was left untouched (content unchanged).
+
+    '''
+
+    table_str = tex_table_string(pars,table_columns,table_sections,section_text_color,section_title_color,macro_prefix,stats,table_column_widths)
+    return write_if_changed(params_tex_file,table_str,report,stats=stats)
+
+def tex_table_stream(pars,stream,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',stats=None,table_column_widths=None):
+    '''
+    Same as tex_table(), but writes the LaTeX code to a text stream.
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    stream: file-like
+    Target text stream (any object with a write() method, e.g., an open file or io.StringIO).
+
+    For the remaining arguments, see tex_table().
+
     Returns:
     --------
     -
 
     '''
 
+    if table_column_widths is not None:
+        ## the header depends on the rows (table_column_widths='auto')
+        import io
+        body = io.StringIO()
+        tex_table_core_stream(pars, body, table_columns, table_sections,section_text_color,section_title_color,macro_prefix=macro_prefix,stats=stats)
+        stream.write(_assemble_table(table_columns,body.getvalue(),table_column_widths))
+        return
+
     #### prepare table and set table header
     #tex_table_header(params_tex_file, table_columns, table_column_widths)
-    tex_table_header(params_tex_file, table_columns)
+    stream.write(tex_table_header_string(table_columns))
     
     #### print core of the table for all sections
-    tex_table_core(pars, params_tex_file, table_columns, table_sections,section_text_color,section_title_color,macro_prefix=macro_prefix)                
+    tex_table_core_stream(pars, stream, table_columns, table_sections,section_text_color,section_title_color,macro_prefix=macro_prefix,stats=stats)                
     #### close table
     #tex_table_footer(params_tex_file)
 
+def tex_table_string(pars,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',stats=None,table_column_widths=None):
+    '''
+    Same as tex_table(), but returns the LaTeX code as a string.
+
+    Arguments:
+    ----------
+    See tex_table().
+
+    Returns:
+    --------
+    table_str: str
+    LaTeX code of the parameter table.
+
+    '''
+
+    import io
+
+    stream = io.StringIO()
+    tex_table_stream(pars,stream,table_columns,table_sections,section_text_color,section_title_color,macro_prefix,stats,table_column_widths)
+    return stream.getvalue()
+
 ##################################################
 
-def convert_field_to_tex_string(field, field_type, prefix=''):
+def convert_field_to_tex_string(field, field_type, prefix='', array_format='full', array_items=3):
     '''
     Converts a given parameter field into an appropriate LaTeX string with type dependent formatting.
 
@@ -328,6 +1071,13 @@ def convert_field_to_tex_string(field, field_type, prefix=''):
     prefix: str
     Prefix to be used for macros (optional; default: '').
 
+    array_format: str
+    Formatting of array-valued (list, tuple, numpy.ndarray) values (optional; default: 'full').
+    See format_array().
+
+    array_items: int
+    Number of leading and trailing elements shown for array_format 'ends' (optional; default: 3).
+
     Returns:
     --------
     field_str: str
@@ -335,8 +1085,12 @@ def convert_field_to_tex_string(field, field_type, prefix=''):
 
     '''
 
+    # arrays (lists, tuples, numpy arrays)
+    if field_type == 'value' and _is_array(field):
+        field_str = format_array(field, array_format, array_items)
+
     # math mode for numerical values, simple string else
-    if field_type == 'value' and type(field)!=str and type(field)!=bool and type(field)!=list:        
+    elif field_type == 'value' and type(field)!=str and type(field)!=bool and type(field)!=list:        
         field_str = r"$%g$" % field
 
 #    if field_type == 'value' and type(field)!=str and type(field)!=bool:
@@ -347,14 +1101,13 @@ def convert_field_to_tex_string(field, field_type, prefix=''):
     #if field_type == 'value' and type(field)==bool:    
     #    field_str = r"%s" % field
         
-    # verbatim (typewriter) for keys        
+    # verbatim (typewriter) for keys (see escape.py)
     elif field_type == 'key':                         
-        field_str = r"\verb+%s+" % field
+        field_str = tex_verb(sanitize(r"%s" % field, 'key'))
 
     # verbatim for macros, remove characters such as "_", add prefixes, e.g., "\P"         
     elif field_type == 'macro':                       
-        field_str = r"\verb+\%s%s+" % (prefix,field)
-        field_str = field_str.replace('_','')   ## remove underscores "_'
+        field_str = tex_verb(sanitize(r"\%s%s" % (prefix,field), 'macro'))
 
     # verbatim for string values
     #elif field_type == 'value' and type(field)==str:
@@ -362,32 +1115,120 @@ def convert_field_to_tex_string(field, field_type, prefix=''):
 
     # replace "_" in description
     elif field_type == 'description'  and type(field)==str:
-        field_str = r"%s" % (field)        
-        field_str = field_str.replace('$$','')   ## remove obsolete $'s
+        field_str = sanitize(field, 'description')   ## remove obsolete $'s
+
+    elif field_type == 'unit' and type(field)==str:
+        field_str = sanitize(field, 'unit')
          
     # no special formatting if
-    # field_type == 'unit': string, or
-    # field_type == 'description': string        
+    # field_type == 'section': string, or
+    # field_type == 'description': no string
 
     else:
         field_str = r"%s" % (field)
         
     return field_str
 
+def format_array(values, array_format='full', array_items=3):
+    '''
+    Converts an array-valued parameter (list, tuple or numpy.ndarray) into a LaTeX string.
+
+    Elements are formatted in a single batched operation (no per-element python code),
+    and numpy arrays are summarised with numpy's vectorized reductions.
+
+    Arguments:
+    ----------
+    values: list, tuple or numpy.ndarray
+    Array-valued parameter.
+
+    array_format: str
+    Formatting of the array (optional; default: 'full'):
+    'full':  all elements (lists are printed as python lists, as for scalar strings),
+    'ends':  first and last array_items elements, separated by an ellipsis (e.g. $[1, 2, \\ldots, 9]$),
+    'stats': minimum, mean and maximum, and the shape of the array.
+
+    array_items: int
+    Number of leading and trailing elements shown for array_format 'ends' (optional; default: 3).
+
+    Returns:
+    --------
+    array_str: str
+    LaTeX string.
+
+    '''
+
+    is_ndarray = hasattr(values, 'shape') and hasattr(values, 'dtype')
+
+    if array_format == 'full':
+        if is_ndarray:
+            values = values.tolist()
+        return r"%s" % (values,)
+
+    if is_ndarray:
+        shape = values.shape
+        flat = values.reshape(-1)
+    else:
+        shape = (len(values),)
+        flat = values
+    size = len(flat)
+
+    if array_format == 'ends':
+        if size > 2 * array_items:
+            head = _format_items(flat[:array_items])
+            tail = _format_items(flat[size - array_items:])
+            return r"$[%s, \ldots, %s]$" % (head, tail)
+        return r"$[%s]$" % (_format_items(flat))
+
+    elif array_format == 'stats':
+        shape_str = r"\times{}".join("%d" % (n) for n in shape)
+        if size == 0:
+            return r"shape $%s$" % (shape_str)
+        try:
+            if is_ndarray:
+                stats = (flat.min(), flat.mean(), flat.max())
+            else:
+                import math
+                stats = (min(flat), math.fsum(flat) / size, max(flat))
+            stats_str = r"min $%g$, mean $%g$, max $%g$" % stats
+        except TypeError:
+            ## non-numeric elements
+            return format_array(values, 'ends', array_items)
+        return r"%s, shape $%s$" % (stats_str, shape_str)
+
+    else:
+        raise ValueError("Unknown array format '%s' (must be 'full', 'ends' or 'stats')." % (array_format))
+
+def _format_items(items):
+    ## formats a (short) sequence of elements in one batched operation
+    if hasattr(items, 'tolist'):
+        items = items.tolist()
+    try:
+        return ", ".join(map("%g".__mod__, items))
+    except TypeError:
+        return ", ".join(map(str, items))
+
+def _is_array(field):
+    if type(field) is list or type(field) is tuple:
+        return True
+    ## numpy arrays (detected without importing numpy); 0-d arrays are treated as scalars
+    return bool(getattr(field, 'shape', None)) and hasattr(field, 'dtype')
+
 ##################################################
 
-def tex_macros(pars,macros_tex_file,macros_prefix='P'):
+def tex_macros(pars,macros_tex_file,macros_prefix='P',macros_sections=None,report=None,stats=None,sources=None):
     '''
     Creates LaTeX code for parameter macro definitions from parameter definitions stored in a python dictionary, and writes it to file.
 
+    The target file is only replaced (atomically) if its content changes.
+
     Note: LateX macros names match the key names in the parameter dictionary, 
     with prefix macros_prefix added to avoid collisions with existing LaTeX function names.
-    Underscores "_" are removed from macros names.
+    Underscores "_" and dots "." are removed from macros names.
 
     Arguments:
     ----------
-    pars: dict
-    Parameter dictionary.
+    pars: dict or iterator
+    Parameter dictionary, or iterator over (key, entry) pairs (see iter_parameters_from_json()).
 
     macros_tex_file: str
     Name of the target LaTeX file containg macro definitions.
@@ -395,27 +1236,166 @@ def tex_macros(pars,macros_tex_file,macros_prefix='P'):
     macros_prefix: str
     Prefix used for LaTeX macro names (optional; default: 'P').
 
+    macros_sections: list(str) or None
+    Sections for which macros are defined. If None, macros are defined for all parameters
+    (optional; default: None).
+
+    report: WriteReport or None
+    Report in which it is recorded whether the file was written or skipped (optional; default: None).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    sources: str or list(str) or None
+    LaTeX sources (files, glob patterns or directories) of the document. If given, only the
+    macros referenced in the sources are defined, and a warning lists macros which are referenced,
+    but not defined (see usage.py; optional; default: None, i.e., all macros are defined).
+
+    Returns:
+    --------
+    written: bool
+    True if the file was written, False if it was left untouched (content unchanged).
+
+    '''
+
+    macros_str = tex_macros_string(pars,macros_prefix,macros_sections,stats,sources)
+    return write_if_changed(macros_tex_file,macros_str,report,stats=stats)
+
+def tex_macros_stream(pars,stream,macros_prefix='P',macros_sections=None,stats=None,sources=None):
+    '''
+    Same as tex_macros(), but writes the macro definitions to a text stream (one write per macro).
+
+    Arguments:
+    ----------
+    pars: dict
+    Parameter dictionary.
+
+    stream: file-like
+    Target text stream (any object with a write() method, e.g., an open file or io.StringIO).
+
+    For the remaining arguments, see tex_macros().
+
     Returns:
     --------
     -
 
     '''
-        
-    f=open(macros_tex_file, 'w')
-    for key in pars:
 
-        key_str = r"%s" % key
-        key_str = key_str.replace('_','')   ## remove underscores "_'
+    used = None
+    if sources is not None:
+        from .usage import scan_macro_usage
+        if stats is not None:
+            with stats.timer('scan'):
+                used = scan_macro_usage(sources,macros_prefix)
+        else:
+            used = scan_macro_usage(sources,macros_prefix)
 
-        name_str = pars[key]['latex']
-        name_str = name_str.replace('$','')   ## remove dollar signs
-        
-        ## macro_prefix added to avoid collision with existing latex function names
-        #f.write(r"\newcommand{\P%s}{\ensuremath{%s}}     %%%% %s" % (key_str,name_str,pars[key]['description']) + "\n")  
-        f.write(r"\def\%s%s{\ensuremath{%s} }     %%%% %s" % (macros_prefix,key_str,name_str,pars[key]['description']) + "\n")
+    if stats is not None:
+        with stats.timer('format'):
+            n_macros = _write_macros(pars,stream,macros_prefix,macros_sections,used)
+        stats.count('macros', n_macros)
+    else:
+        _write_macros(pars,stream,macros_prefix,macros_sections,used)
 
+def _write_macros(pars,stream,macros_prefix,macros_sections,used=None):
+    if macros_sections is None:
+        ## parameter dictionary or iterator over (key, entry) pairs
+        items = pars.items() if hasattr(pars, 'keys') else pars
+    else:
+        groups = group_sections(pars, macros_sections)
+        items = [(k, entry) for section in macros_sections for k, entry in groups.get(section, {}).items()]
+
+    render_macro = _compile_macro_renderer(macros_prefix)
+    if used is not None:
+        is_used, defined = _compile_usage_filter(macros_prefix,used)
+        items = [(key, entry) for key, entry in items if is_used(key)]
+    n_macros = 0
+    for key, entry in items:
+        stream.write(render_macro(key,entry))
+        n_macros += 1
+    if used is not None:
+        _warn_undefined_macros(used,defined)
+    return n_macros
+
+def tex_macros_string(pars,macros_prefix='P',macros_sections=None,stats=None,sources=None):
+    '''
+    Same as tex_macros(), but returns the macro definitions as a string.
 
-    f.close()
+    Arguments:
+    ----------
+    See tex_macros().
+
+    Returns:
+    --------
+    macros_str: str
+    LaTeX code of the macro definitions.
+
+    '''
+
+    import io
+
+    stream = io.StringIO()
+    tex_macros_stream(pars,stream,macros_prefix,macros_sections,stats,sources)
+    return stream.getvalue()
+
+def tex_macro_string(key,entry,macros_prefix='P'):
+    '''
+    Returns the LaTeX macro definition for a single parameter.
+
+    Arguments:
+    ----------
+    key: str
+    Parameter key.
+
+    entry: dict
+    Parameter definition (latex, description, ...).
+
+    macros_prefix: str
+    Prefix used for LaTeX macro names (optional; default: 'P').
+
+    Returns:
+    --------
+    macro_str: str
+    LaTeX code of the macro definition (one line).
+
+    '''
+
+    return _compile_macro_renderer(macros_prefix)(key,entry)
+
+def _compile_macro_renderer(macros_prefix):
+    ## Returns a function render_macro(key, entry) equivalent to tex_macro_string(), with the
+    ## sanitisers (see escape.py) resolved once.
+    sanitize_key = get_sanitizer('macro') or str      ## remove underscores "_" and dots "."
+    sanitize_name = get_sanitizer('macro_latex') or str   ## remove dollar signs
+
+    ## macro_prefix added to avoid collision with existing latex function names
+    #return r"\newcommand{\P%s}{\ensuremath{%s}}     %%%% %s" % (key_str,name_str,entry['description']) + "\n"
+    def render_macro(key,entry):
+        return r"\def\%s%s{\ensuremath{%s} }     %%%% %s" % (macros_prefix,sanitize_key(r"%s" % key),sanitize_name(entry['latex']),entry['description']) + "\n"
+
+    return render_macro
+
+def _compile_usage_filter(macros_prefix,used):
+    ## Returns a function is_used(key) selecting the parameters whose macros are referenced
+    ## (see usage.py), and the set of macro names it was called for (filled by is_used()).
+    sanitize_key = get_sanitizer('macro') or str
+    defined = set()
+
+    def is_used(key):
+        name = macros_prefix + sanitize_key(r"%s" % key)
+        defined.add(name)
+        ## names which are not control words (e.g. containing digits) cannot be detected
+        return name in used or not (name.isascii() and name.isalpha())
+
+    return is_used, defined
+
+def _warn_undefined_macros(used,defined):
+    from .usage import undefined_macros
+
+    undefined = undefined_macros(used,defined)
+    if undefined:
+        import warnings
+        names = ", ".join("\\" + name for name in undefined[:20]) + (", ..." if len(undefined) > 20 else "")
+        warnings.warn("%d macro(s) referenced in the LaTeX sources are not defined: %s" % (len(undefined), names))
     
 ##################################################
-
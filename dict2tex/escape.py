@@ -0,0 +1,279 @@
+'''
+Escaping and sanitising of strings inserted into LaTeX code.
+
+Each kind of field is processed by a sanitiser compiled once from a rule, which consists of
+
+- 'delete':  characters to be removed (e.g. '_' for macro names),
+- 'replace': mapping of single characters to replacement strings (e.g. {'&': r'\\&'}),
+- 'remove':  substrings (of any length) to be removed (e.g. '$$' in descriptions).
+
+Character deletions and replacements are applied in a single pass (str.translate), or, for few
+characters, by chained str.replace() (which is faster for short tables, and equivalent if no
+replacement contains a replaced character). Substring removals are applied in a single pass of
+one compiled regular expression. Results for repeated strings (e.g. units) are cached.
+
+Field kinds and default rules (reproducing the formatting of previous versions):
+
+- 'key':         parameter keys in tables (default: no change; typeset with \\verb, see tex_verb()),
+- 'macro':       macro names derived from parameter keys (default: '_' and '.' deleted),
+- 'macro_latex': LaTeX names in macro definitions (default: '$' deleted, as names are wrapped in \\ensuremath),
+- 'unit':        units (default: no change),
+- 'description': descriptions (default: '$$' removed).
+
+The rules can be changed with configure_escaping(), e.g.
+
+    dict2tex.configure_escaping('unit', replace={'%': r'\\%'})
+
+TEX_SPECIAL_CHARACTERS provides replacements for all characters with a special meaning in LaTeX
+(except '$'), for fields containing plain text only.
+
+'''
+
+__all__ = ['TEX_SPECIAL_CHARACTERS', 'configure_escaping', 'reset_escaping', 'escaping_state', 'get_sanitizer',
+           'sanitize', 'tex_verb']
+
+## replacements of LaTeX special characters (for plain-text fields)
+TEX_SPECIAL_CHARACTERS = {
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+}
+
+## default rules (see module documentation)
+## (keys and macro names are unique, and are therefore not cached)
+DEFAULT_ESCAPING = {
+    'key': {'cache': False},
+    'macro': {'delete': '_.', 'cache': False},
+    'macro_latex': {'delete': '$', 'cache': False},
+    'unit': {},
+    'description': {'remove': ['$$']},
+}
+
+## delimiters tried (in this order) for \verb
+VERB_DELIMITERS = '+|!/@=:;"\'-^~*?.,<>'
+
+## maximum number of cached results per sanitiser
+_CACHE_SIZE = 1 << 16
+
+_rules = {}
+_sanitizers = {}
+
+##################################################
+
+def configure_escaping(kind,delete='',replace=None,remove=(),cache=None):
+    '''
+    Sets the escaping rule of a field kind.
+
+    The rule applies to all tables and macros rendered afterwards (row renderers compiled
+    before, e.g. by an existing TableSweep, keep the previous rule).
+
+    Arguments:
+    ----------
+    kind: str
+    Field kind ('key', 'macro', 'macro_latex', 'unit', 'description').
+
+    delete: str
+    Characters to be removed (optional; default: '').
+
+    replace: dict or None
+    Mapping of single characters to replacement strings (optional; default: None).
+
+    remove: list(str)
+    Substrings to be removed (optional; default: none).
+
+    cache: bool or None
+    Whether results are cached (useful for frequently repeated strings; optional; default: None,
+    i.e., as for the default rule).
+
+    Returns:
+    --------
+    -
+
+    '''
+
+    if kind not in DEFAULT_ESCAPING:
+        raise ValueError("Unknown field kind '%s' (expected one of %s)." % (kind, ', '.join(DEFAULT_ESCAPING)))
+    for char in (replace or {}):
+        if len(char) != 1:
+            raise ValueError("Replacements must be defined for single characters (got '%s')." % (char))
+    if cache is None:
+        cache = DEFAULT_ESCAPING[kind].get('cache', True)
+    _rules[kind] = {'delete': delete, 'replace': dict(replace or {}), 'remove': list(remove), 'cache': cache}
+    _sanitizers.pop(kind, None)
+
+def reset_escaping():
+    '''
+    Restores the default escaping rules (see DEFAULT_ESCAPING).
+    '''
+
+    _rules.clear()
+    _sanitizers.clear()
+
+def escaping_state():
+    '''
+    Returns a string identifying the current escaping rules (e.g. for cache keys; identical
+    rules give identical strings, also across processes).
+    '''
+
+    return repr(sorted((kind, sorted((k, sorted(v.items()) if type(v) is dict else v) for k, v in rule.items()))
+                       for kind, rule in _rules.items()))
+
+def _escaping_rules():
+    ## configured rules, e.g. for worker processes (which start with the default rules
+    ## under the 'spawn' and 'forkserver' start methods)
+    return {kind: dict(rule) for kind, rule in _rules.items()}
+
+def _set_escaping_rules(rules):
+    ## replaces the configured rules by rules returned by _escaping_rules()
+    _rules.clear()
+    _rules.update((kind, dict(rule)) for kind, rule in rules.items())
+    _sanitizers.clear()
+
+def get_sanitizer(kind):
+    '''
+    Returns the (compiled) sanitiser of a field kind.
+
+    Arguments:
+    ----------
+    kind: str
+    Field kind (see module documentation).
+
+    Returns:
+    --------
+    sanitize: function or None
+    Function mapping a string to its sanitised version, or None if the rule leaves strings unchanged.
+
+    '''
+
+    try:
+        return _sanitizers[kind]
+    except KeyError:
+        pass
+    rule = _rules.get(kind)
+    if rule is None:
+        rule = DEFAULT_ESCAPING[kind]
+    sanitize = _compile_rule(rule.get('delete', ''), rule.get('replace', {}), rule.get('remove', ()), rule.get('cache', True))
+    _sanitizers[kind] = sanitize
+    return sanitize
+
+def sanitize(text,kind):
+    '''
+    Sanitises a string according to the rule of a field kind.
+
+    Arguments:
+    ----------
+    text: str
+    String to be sanitised.
+
+    kind: str
+    Field kind (see module documentation).
+
+    Returns:
+    --------
+    text: str
+    Sanitised string.
+
+    '''
+
+    sanitizer = get_sanitizer(kind)
+    return text if sanitizer is None else sanitizer(text)
+
+def tex_verb(text):
+    '''
+    Typesets a string verbatim (\\verb), using a delimiter which does not occur in the string.
+
+    If all delimiters occur in the string, the string is typeset with \\texttt{} instead
+    (with special characters escaped).
+
+    Arguments:
+    ----------
+    text: str
+    String to be typeset.
+
+    Returns:
+    --------
+    tex_str: str
+    LaTeX code.
+
+    '''
+
+    if '+' not in text:
+        return '\\verb+' + text + '+'
+    for delimiter in VERB_DELIMITERS:
+        if delimiter not in text:
+            return '\\verb' + delimiter + text + delimiter
+    return '\\texttt{' + text.translate(_TEXT_TABLE) + '}'
+
+##################################################
+
+_TEXT_TABLE = str.maketrans(TEX_SPECIAL_CHARACTERS)
+
+## maximum number of characters handled by chained str.replace() rather than str.translate()
+## (str.replace() is considerably faster per character, str.translate() per pass)
+_MAX_REPLACE_CHAIN = 8
+
+def _compile_rule(delete,replace,remove,cache):
+    table = None
+    if delete or replace:
+        mapping = dict.fromkeys(delete, '')
+        mapping.update(replace)
+        ## chained replacements are equivalent to a single translation unless a replacement
+        ## string contains one of the replaced characters
+        if len(mapping) <= _MAX_REPLACE_CHAIN and not any(c in new for new in mapping.values() for c in mapping):
+            table = tuple(mapping.items())
+        else:
+            table = str.maketrans(mapping)
+    pattern = None
+    if remove:
+        import re
+        ## longest substrings first, such that overlapping alternatives are removed completely
+        pattern = re.compile('|'.join(re.escape(s) for s in sorted(remove, key=len, reverse=True)))
+
+    if table is None and pattern is None:
+        return None
+    elif pattern is None:
+        if type(table) is tuple and len(table) == 1:
+            (old, new), = table
+            def apply(text):
+                return text.replace(old, new)
+        elif type(table) is tuple:
+            def apply(text):
+                for old, new in table:
+                    text = text.replace(old, new)
+                return text
+        else:
+            def apply(text):
+                return text.translate(table)
+    elif table is None:
+        ## plain str.replace is faster than a regular expression for a single substring
+        if len(remove) == 1:
+            removed = remove[0]
+            def apply(text):
+                return text.replace(removed, '')
+        else:
+            def apply(text):
+                return pattern.sub('', text)
+    else:
+        translate = _compile_rule(delete,replace,(),False)
+        def apply(text):
+            return translate(pattern.sub('', text))
+
+    if not cache:
+        return apply
+
+    results = {}
+    def apply_cached(text):
+        try:
+            return results[text]
+        except KeyError:
+            if len(results) >= _CACHE_SIZE:
+                results.clear()
+            result = results[text] = apply(text)
+            return result
+    return apply_cached
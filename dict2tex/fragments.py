@@ -0,0 +1,229 @@
+'''
+Caching of rendered table sections.
+
+A parameter table consists of a header and one fragment (title row + parameter rows) per
+table section. A FragmentCache keeps the rendered fragment of each (table, section), together
+with a hash of the section's parameters and of the section's column/colour specification.
+When the table is rebuilt, only sections whose parameters or specification changed are
+re-rendered; the fragments of all other sections are reused. The result is identical to
+tex_table_string().
+
+For a ParameterSet, unchanged sections are detected via their version counters (see
+ParameterSet.section_version()) without inspecting their parameters, such that the cost of a
+rebuild after editing a single parameter is proportional to the size of its section. For other
+parameter dictionaries, the parameters of each section are hashed (which is considerably
+cheaper than rendering them).
+
+The cache can optionally be stored in a file (see FragmentCache.save()), such that separate
+processes (e.g. successive runs of a build script) can reuse it.
+
+'''
+
+from .dict2tex import tex_subtable_stream, table_section_specs, index_sections, _assemble_table
+from .output import write_if_changed
+from .escape import escaping_state
+
+__all__ = ['FragmentCache']
+
+## cache file format version (increase on changes of the layout)
+FRAGMENT_CACHE_VERSION = 1
+
+##################################################
+
+class FragmentCache:
+    '''
+    Cache of rendered table sections.
+
+    Arguments:
+    ----------
+    filename: str or None
+    Name of a cache file from which cached fragments are loaded (if it exists), and to which
+    save() writes them (optional; default: None, i.e., the cache is kept in memory only).
+
+    '''
+
+    def __init__(self,filename=None):
+        self.filename = filename
+        ## (table, section, spec digest) -> (section version, content digest, fragment)
+        self._fragments = {}
+        if filename is not None:
+            self.load(filename)
+
+    def tex_table_string(self,pars,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',table=None,stats=None,table_column_widths=None):
+        '''
+        Same as dict2tex.tex_table_string(), but reuses cached fragments of unchanged table sections.
+
+        Arguments:
+        ----------
+        table: str or None
+        Name identifying the table within the cache, e.g. the name of the LaTeX file (optional;
+        default: None). Tables with different names do not share fragments.
+
+        stats: BuildStats or None
+        Statistics object recording timings and counters (counters 'sections_rendered' and
+        'sections_cached'; optional; default: None, i.e., no instrumentation).
+
+        table_column_widths: list(float), str or None
+        Fixed column widths (see dict2tex.tex_table(); optional; default: None).
+
+        For the remaining arguments, see dict2tex.tex_table().
+
+        Returns:
+        --------
+        table_str: str
+        LaTeX code of the parameter table.
+
+        '''
+
+        import io
+
+        if not hasattr(pars, 'keys'):
+            pars = dict(pars)  ## iterator over (key, entry) pairs
+
+        index = None
+        has_versions = hasattr(pars, 'section_version')
+        columns_key = repr((table_columns, macro_prefix, escaping_state()))
+        fragments = []
+        used = set()
+        n_rendered = 0
+
+        for section, section_title, color, title_color in table_section_specs(table_sections,section_text_color,section_title_color):
+            cache_key = (table, section, _digest(repr((columns_key, section_title, color, title_color)).encode('utf-8')))
+            used.add(cache_key)
+            version = pars.section_version(section) if has_versions else None
+            cached = self._fragments.get(cache_key)
+
+            if cached is not None and version is not None and cached[0] == version:
+                fragments.append(cached[2])
+                continue
+
+            if index is None:
+                index = index_sections(pars)
+            pars_section = {k: pars[k] for k in index.get(section, ())}
+            content_digest = _content_digest(pars_section)
+
+            if cached is not None and cached[1] == content_digest:
+                fragment = cached[2]
+            else:
+                stream = io.StringIO()
+                tex_subtable_stream(pars_section,section_title,table_columns,stream,color,title_color,macro_prefix)
+                fragment = stream.getvalue()
+                n_rendered += 1
+            self._fragments[cache_key] = (version, content_digest, fragment)
+            fragments.append(fragment)
+
+        ## fragments of sections removed from the table, or with outdated specification
+        for cache_key in [cache_key for cache_key in self._fragments if cache_key[0] == table and cache_key not in used]:
+            del self._fragments[cache_key]
+
+        if stats is not None:
+            stats.count('sections_rendered', n_rendered)
+            stats.count('sections_cached', len(fragments) - n_rendered)
+
+        return _assemble_table(table_columns,''.join(fragments),table_column_widths)
+
+    def tex_table(self,pars,params_tex_file,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',report=None,stats=None,table_column_widths=None):
+        '''
+        Same as dict2tex.tex_table(), but reuses cached fragments of unchanged table sections.
+
+        The name of the LaTeX file identifies the table within the cache.
+
+        Arguments:
+        ----------
+        See dict2tex.tex_table().
+
+        Returns:
+        --------
+        written: bool
+        True if the file was written, False if its content was unchanged.
+
+        '''
+
+        table_str = self.tex_table_string(pars,table_columns,table_sections,section_text_color,section_title_color,macro_prefix,
+                                          table=str(params_tex_file),stats=stats,table_column_widths=table_column_widths)
+        return write_if_changed(params_tex_file,table_str,report,stats=stats)
+
+    def clear(self):
+        '''
+        Removes all cached fragments.
+        '''
+
+        self._fragments.clear()
+
+    def load(self,filename=None):
+        '''
+        Loads cached fragments from file (missing, outdated or unreadable files are ignored).
+
+        Arguments:
+        ----------
+        filename: str or None
+        Name of the cache file (optional; default: None, i.e., the file given at construction).
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        import sys
+        import marshal
+
+        filename = filename if filename is not None else self.filename
+        try:
+            with open(filename, 'rb') as f:
+                data = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if not (isinstance(data, tuple) and len(data) == 3 and data[:2] == (FRAGMENT_CACHE_VERSION, sys.implementation.cache_tag)):
+            return
+        ## section versions are only meaningful within a process
+        for cache_key, content_digest, fragment in data[2]:
+            self._fragments[cache_key] = (None, content_digest, fragment)
+
+    def save(self,filename=None):
+        '''
+        Writes the cached fragments to file (atomically).
+
+        Arguments:
+        ----------
+        filename: str or None
+        Name of the cache file (optional; default: None, i.e., the file given at construction).
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        import sys
+        import marshal
+
+        from .output import atomic_write
+
+        filename = filename if filename is not None else self.filename
+        if filename is None:
+            raise ValueError("No cache file name given.")
+        entries = [(cache_key, content_digest, fragment)
+                   for cache_key, (version, content_digest, fragment) in self._fragments.items()]
+        atomic_write(filename, marshal.dumps((FRAGMENT_CACHE_VERSION, sys.implementation.cache_tag, entries)))
+
+##################################################
+
+def _digest(data):
+    import hashlib
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def _content_digest(pars_section):
+    import marshal
+
+    try:
+        ## format version 2: later versions refer back to objects depending on their reference
+        ## counts, such that equal sections do not always give identical bytes
+        data = marshal.dumps(pars_section, 2)
+    except ValueError:
+        ## entries other than plain dictionaries (e.g. views of ColumnarParameters), or values
+        ## not supported by marshal (e.g. numpy arrays)
+        import pickle
+        items = [(k, entry if type(entry) is dict else dict(entry)) for k, entry in pars_section.items()]
+        data = pickle.dumps(items, protocol=4)
+    return _digest(data)
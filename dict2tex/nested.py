@@ -0,0 +1,245 @@
+'''
+Flattened view of nested parameter dictionaries.
+
+Simulation code often keeps its parameters in dictionaries nested by model component, e.g.
+
+    {'network': {'N': {'latex': '$N$', 'value': 10000, 'unit': '', 'description': 'network size'},
+                 'E': {'tau_m': {'latex': r'$\\tau_\\text{m}$', 'value': 10., 'unit': 'ms', ...}}},
+     'simulation': {'dt': 0.1}}
+
+A NestedParameters object presents such a dictionary as a flat parameter dictionary, without
+copying it (and without a round-trip through a json file):
+
+- keys are the nesting paths joined by '.' (e.g. 'network.E.tau_m'),
+- the section of a parameter is the path of the dictionary containing it (e.g. 'network.E'),
+  unless the entry defines a 'section' itself,
+- a dictionary with a field 'value' is a parameter entry; all other dictionaries are groups of
+  parameters. Values which are not dictionaries (e.g. 'dt': 0.1) are parameters with empty
+  unit and description, and the LaTeX name '$\\mathrm{dt}$'.
+
+The view can be passed to tex_table(), tex_macros() etc. in place of a parameter dictionary.
+Macro names are formed from the flattened keys ('.' and '_' are removed, e.g. '\\PnetworkEtaum').
+
+The structure (keys and sections) is read on first use, and re-read by refresh(). Entries are
+looked up in the nested dictionary on each access, i.e., changes of values are always visible.
+
+'''
+
+from collections.abc import Mapping, ItemsView
+
+__all__ = ['NestedParameters']
+
+##################################################
+
+class NestedParameters(Mapping):
+    '''
+    Read-only flattened view of a nested parameter dictionary.
+
+    Arguments:
+    ----------
+    pars: dict
+    Nested parameter dictionary (see module documentation).
+
+    separator: str
+    Separator of the path components in keys and section names (optional; default: '.').
+
+    section_depth: int or None
+    Number of path components forming the section name (e.g. 1: sections are the top-level
+    components; optional; default: None, i.e., the full path of the containing dictionary).
+
+    '''
+
+    def __init__(self, pars, separator='.', section_depth=None):
+        self._pars = pars
+        self._separator = separator
+        self._section_depth = section_depth
+        self._locations = None
+        self._index = None
+
+    def refresh(self):
+        '''
+        Re-reads the structure (keys and sections) of the nested dictionary.
+
+        Required after parameters or groups were added to or removed from the nested dictionary.
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        self._locations = None
+        self._index = None
+
+    def _walk(self):
+        ## yields (key, containing dictionary, name, section) of all parameters in nesting order
+        separator = self._separator
+        depth = self._section_depth
+        stack = [((), iter(self._pars.items()), self._pars)]
+        while stack:
+            path, items, group = stack[-1]
+            for name, entry in items:
+                if isinstance(entry, Mapping) and 'value' not in entry:
+                    child = path + (str(name),)
+                    stack.append((child, iter(entry.items()), entry))
+                    break
+                section = separator.join(path if depth is None else path[:depth])
+                yield separator.join(path + (str(name),)), group, name, section
+            else:
+                stack.pop()
+
+    def _structure(self):
+        if self._locations is None:
+            locations = {}
+            for key, group, name, section in self._walk():
+                if key in locations:
+                    raise ValueError("Duplicate parameter key '%s'." % (key))
+                locations[key] = (group, name, section)
+            self._locations = locations
+        return self._locations
+
+    ##################################################
+    ## mapping interface
+
+    def __getitem__(self, key):
+        group, name, section = self._structure()[key]
+        return _nested_entry(group[name], name, section)
+
+    def __iter__(self):
+        return iter(self._structure())
+
+    def __len__(self):
+        return len(self._structure())
+
+    def __contains__(self, key):
+        return key in self._structure()
+
+    def items(self):
+        return _NestedItems(self)
+
+    def __repr__(self):
+        return "%s(<%d parameters, %d sections>)" % (type(self).__name__, len(self), len(self.section_index()))
+
+    def __reduce__(self):
+        return (type(self), (self._pars, self._separator, self._section_depth))
+
+    def to_dict(self):
+        '''
+        Converts the parameters into a plain (flat) parameter dictionary.
+
+        Returns:
+        --------
+        pars: dict
+        Parameter dictionary (key -> dictionary of fields).
+
+        '''
+
+        return {key: dict(entry) for key, entry in self.items()}
+
+    ##################################################
+    ## section index
+
+    def section_index(self):
+        '''
+        Returns the section index.
+
+        Returns:
+        --------
+        index: dict
+        Dictionary mapping each section name to a dictionary whose keys are the parameter keys
+        of this section (in nesting order). The returned object must not be modified.
+
+        '''
+
+        if self._index is None:
+            index = {}
+            for key, (group, name, section) in self._structure().items():
+                entry = group[name]
+                if isinstance(entry, Mapping) and 'section' in entry:
+                    section = entry['section']
+                index.setdefault(section, {})[key] = None
+            self._index = index
+        return self._index
+
+    def section_keys(self, section):
+        '''
+        Returns the keys of all parameters of a given section (in nesting order).
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        keys: list(str)
+        List of parameter keys.
+
+        '''
+
+        return list(self.section_index().get(section, ()))
+
+    def sections(self):
+        '''
+        Returns the names of all sections (in order of first appearance).
+
+        Returns:
+        --------
+        sections: list(str)
+        List of section names.
+
+        '''
+
+        return list(self.section_index())
+
+class NestedEntry(Mapping):
+    '''
+    Read-only view of a parameter entry of a NestedParameters object, adding the field 'section'
+    to an entry without section. Use dict(entry) to obtain a modifiable copy.
+
+    '''
+
+    __slots__ = ('_entry', '_section')
+
+    def __init__(self, entry, section):
+        self._entry = entry
+        self._section = section
+
+    def __getitem__(self, fld):
+        if fld == 'section':
+            return self._section
+        return self._entry[fld]
+
+    def __iter__(self):
+        yield from self._entry
+        yield 'section'
+
+    def __len__(self):
+        return len(self._entry) + 1
+
+    def __repr__(self):
+        return repr(dict(self))
+
+def _nested_entry(entry, name, section):
+    if type(entry) is dict or isinstance(entry, Mapping):
+        if 'section' in entry:
+            ## entries defining their section are returned unchanged
+            return entry
+        return NestedEntry(entry, section)
+    ## plain value
+    return {'latex': r"$\mathrm{%s}$" % (str(name).replace('_', r'\_')), 'value': entry, 'unit': '', 'description': '',
+            'section': section}
+
+class _NestedItems(ItemsView):
+    ## iteration by walking the nested dictionary, without key lookups
+
+    __slots__ = ()
+
+    def __iter__(self):
+        view = self._mapping
+        if view._locations is None:
+            for key, group, name, section in view._walk():
+                yield key, _nested_entry(group[name], name, section)
+        else:
+            for key, (group, name, section) in view._locations.items():
+                yield key, _nested_entry(group[name], name, section)
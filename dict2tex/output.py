@@ -0,0 +1,200 @@
+'''
+Writing of generated LaTeX files.
+
+Generated files are only replaced if their content changes, such that unchanged
+files keep their modification time (and do not trigger LaTeX reruns in make/latexmk).
+Files are replaced atomically (temporary file + rename), such that readers never
+see partially written files.
+
+'''
+
+import os
+
+__all__ = ['WriteReport', 'write_if_changed']
+
+##################################################
+
+class WriteReport:
+    '''
+    Record of the outputs written or skipped (unchanged) by write_if_changed().
+
+    Attributes:
+    -----------
+    written: list(str)
+    Names of files which were (re-)written.
+
+    skipped: list(str)
+    Names of files which were left untouched because their content did not change.
+
+    removed: list(str)
+    Names of files which were removed because they are no longer generated (e.g. stale shards
+    of a sharded table, see tex_table_sharded()).
+
+    '''
+
+    def __init__(self):
+        self.written = []
+        self.skipped = []
+        self.removed = []
+
+    def add(self, filename, written):
+        '''
+        Records the outcome for a single output file.
+
+        Arguments:
+        ----------
+        filename: str
+        Name of the output file.
+
+        written: bool
+        True if the file was written, False if it was skipped.
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        if written:
+            self.written.append(str(filename))
+        else:
+            self.skipped.append(str(filename))
+
+    def add_removed(self, filename):
+        '''
+        Records the removal of an output file.
+        '''
+
+        self.removed.append(str(filename))
+
+    def as_dict(self):
+        '''
+        Returns the report as a dictionary {'written': [...], 'skipped': [...], 'removed': [...]}.
+        '''
+
+        return {'written': list(self.written), 'skipped': list(self.skipped), 'removed': list(self.removed)}
+
+    def __str__(self):
+        lines = ["written: %s" % (f) for f in self.written]
+        lines += ["unchanged: %s" % (f) for f in self.skipped]
+        lines += ["removed: %s" % (f) for f in self.removed]
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return "WriteReport(written=%r, skipped=%r, removed=%r)" % (self.written, self.skipped, self.removed)
+
+##################################################
+
+def write_if_changed(filename,content,report=None,encoding='utf-8',stats=None):
+    '''
+    Writes content to a file, unless the file already exists with identical content.
+
+    The comparison is based on the size and a content hash of the existing file.
+    If the content differs, the file is replaced atomically via a temporary file in the
+    same directory.
+
+    Arguments:
+    ----------
+    filename: str or path-like
+    Name of the target file.
+
+    content: str or bytes
+    New file content.
+
+    report: WriteReport or None
+    Report in which the outcome is recorded (optional; default: None).
+
+    encoding: str
+    Encoding used for str content (optional; default: 'utf-8').
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    Returns:
+    --------
+    written: bool
+    True if the file was written, False if it was left untouched.
+
+    '''
+
+    if stats is not None:
+        with stats.timer('write'):
+            written = write_if_changed(filename,content,report,encoding)
+        if written:
+            stats.count('files_written')
+            stats.count('files_opened')  ## temporary file
+            stats.count('bytes_written', len(content.encode(encoding)) if isinstance(content, str) else len(content))
+        else:
+            stats.count('files_skipped')
+            stats.count('files_opened')  ## existing file read for comparison
+        return written
+
+    if isinstance(content, str):
+        data = content.encode(encoding)
+    else:
+        data = bytes(content)
+
+    written = not _has_content(filename, data)
+    if written:
+        atomic_write(filename, data)
+
+    if report is not None:
+        report.add(filename, written)
+
+    return written
+
+def atomic_write(filename,data):
+    '''
+    Replaces a file atomically by writing to a temporary file in the same directory
+    and renaming it.
+
+    The permissions of an existing file are preserved; new files are created with the
+    default permissions (as determined by the umask).
+
+    Arguments:
+    ----------
+    filename: str or path-like
+    Name of the target file.
+
+    data: bytes
+    New file content.
+
+    Returns:
+    --------
+    -
+
+    '''
+
+    filename = os.fspath(filename)
+    directory, basename = os.path.split(os.path.abspath(filename))
+    tmp_name = os.path.join(directory, '.%s.%d.%s.tmp' % (basename, os.getpid(), os.urandom(4).hex()))
+
+    ## os.open() with mode 0o666 lets the umask determine the permissions of new files
+    fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        try:
+            os.chmod(tmp_name, os.stat(filename).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+def _has_content(filename,data):
+    import hashlib
+
+    try:
+        if os.stat(filename).st_size != len(data):
+            return False
+        with open(filename, 'rb') as f:
+            existing = f.read()
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return False
+
+    return hashlib.sha256(existing).digest() == hashlib.sha256(data).digest()
@@ -0,0 +1,408 @@
+'''
+Indexed parameter container.
+
+A ParameterSet behaves like a plain parameter dictionary, but maintains an
+index mapping each section to the keys of its parameters. The index is built
+once, kept in insertion order, and updated incrementally when parameters are
+added or removed, such that looking up a section does not require a scan of
+the full parameter set.
+
+In addition, a version counter is kept for each section, which is incremented whenever a
+parameter of the section is added, replaced or removed. Caches of rendered sections (see
+FragmentCache) use it to detect unchanged sections without inspecting their parameters.
+
+A ParameterSet can also hold derived parameters, whose values are functions of other
+parameters (see derive() and dict2tex/derived.py).
+
+'''
+
+import itertools
+
+from .derived import DerivedEntry, evaluate_derived, find_cycle
+
+__all__ = ['ParameterSet']
+
+## unique identifiers of ParameterSet instances (part of the section versions)
+_instance_ids = itertools.count()
+
+##################################################
+
+class ParameterSet(dict):
+    '''
+    Parameter dictionary with a section index.
+
+    Entries are stored exactly as in a plain parameter dictionary (key -> dict with fields
+    'value', 'unit', 'description', 'latex', 'section'). The section index is maintained
+    automatically when entries are added, replaced or deleted.
+
+    Note: Changing an entry in place (e.g. pars[key]['value'] = ...) is not detected, neither
+    by the section index, nor by the section versions, nor by derived parameters depending on it.
+    Use set_value(), or reassign the entry (pars[key] = entry) instead.
+
+    Arguments:
+    ----------
+    Same as for dict.
+
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._index = {}
+        self._uid = next(_instance_ids)
+        self._versions = {}
+        self._dependents = {}  ## key -> keys of the derived entries using it as input
+        if len(args) == 1 and not kwargs and type(args[0]) is dict:
+            self._add_all(args[0])
+        else:
+            self.update(*args, **kwargs)
+
+    ##################################################
+    ## dict interface
+
+    def __setitem__(self, key, entry):
+        if key in self:
+            old_entry = dict.__getitem__(self, key)
+            self._forget(key, old_entry)
+            if isinstance(entry, DerivedEntry):
+                entry = self._bind(key, entry)
+            self.touch(old_entry['section'])
+            self.touch(entry['section'])
+            dict.__setitem__(self, key, entry)
+            if self._index is not None and key not in self._index.get(entry['section'], ()):
+                ## existing key moved to another section: its position within the section is
+                ## defined by its position in the parameter set, rebuild index lazily
+                self._index = None
+        else:
+            if isinstance(entry, DerivedEntry):
+                entry = self._bind(key, entry)
+            dict.__setitem__(self, key, entry)
+            self.touch(entry['section'])
+            self._index_key(key, entry)
+
+    def __delitem__(self, key):
+        entry = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        self._forget(key, entry)
+        self._unindex(key, entry)
+
+    def update(self, *args, **kwargs):
+        if len(args) > 1:
+            raise TypeError("update expected at most 1 argument, got %d" % len(args))
+        if args:
+            other = args[0]
+            if hasattr(other, 'keys'):
+                for key in other.keys():
+                    self[key] = other[key]
+            else:
+                for key, entry in other:
+                    self[key] = entry
+        for key, entry in kwargs.items():
+            self[key] = entry
+
+    def setdefault(self, key, entry=None):
+        if key not in self:
+            self[key] = entry
+        return dict.__getitem__(self, key)
+
+    def pop(self, key, *default):
+        if key in self:
+            entry = dict.__getitem__(self, key)
+            del self[key]
+            return entry
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, entry = dict.popitem(self)
+        self._forget(key, entry)
+        self._unindex(key, entry)
+        return key, entry
+
+    def clear(self):
+        dict.clear(self)
+        self._index = {}
+        self._uid = next(_instance_ids)
+        self._versions = {}
+        self._dependents = {}
+
+    def copy(self):
+        return type(self)(self)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __or__(self, other):
+        new = self.copy()
+        new.update(other)
+        return new
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    ##################################################
+    ## derived parameters
+
+    def derive(self, key, func, inputs, unit, description, section, latex):
+        '''
+        Defines a derived parameter, i.e., a parameter whose value is a function of other parameters.
+
+        The value is evaluated lazily (when it is accessed), memoized, and recomputed only after
+        one of its (direct or indirect) inputs changed (see set_value()). Inputs may be defined
+        before or after the derived parameter, and may themselves be derived parameters.
+
+        Example:
+        --------
+        pars.derive('NE', lambda gamma, N: int(gamma*N), ['gamma', 'N'],
+                    '', 'size $\\gamma{}N$ of excitatory population', 'network_drvd', '$N_\\text{E}$')
+
+        Arguments:
+        ----------
+        key: str
+        Parameter key.
+
+        func: callable
+        Function computing the value from the values of the input parameters (passed as positional
+        arguments, in the order of inputs).
+
+        inputs: list(str)
+        Keys of the input parameters.
+
+        unit, description, section, latex:
+        Remaining fields of the entry (see example/create_params_file.py).
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        self[key] = DerivedEntry(func, inputs, unit, description, section, latex)
+
+    def set_value(self, key, value):
+        '''
+        Changes the value of a (non-derived) parameter, and invalidates the derived parameters depending on it.
+
+        Arguments:
+        ----------
+        key: str
+        Parameter key.
+
+        value:
+        New value.
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        entry = dict.__getitem__(self, key)
+        if isinstance(entry, DerivedEntry):
+            raise ValueError("Parameter '%s' is derived; its value cannot be set." % (key))
+        entry = dict(entry)
+        entry['value'] = value
+        self[key] = entry
+
+    def check_cycles(self):
+        '''
+        Checks the derived parameters for cyclic dependencies (without evaluating them).
+
+        Returns:
+        --------
+        -
+
+        Raises:
+        -------
+        ValueError, if there is a cyclic dependency.
+
+        '''
+
+        cycle = find_cycle(self)
+        if cycle is not None:
+            raise ValueError("Cyclic dependency of derived parameters: %s." % (' -> '.join(cycle)))
+
+    def to_dict(self):
+        '''
+        Converts the parameter set into a plain parameter dictionary (evaluating all derived parameters).
+
+        Returns:
+        --------
+        pars: dict
+        Parameter dictionary, e.g. for storing it as json file.
+
+        '''
+
+        return {key: dict(entry) for key, entry in dict.items(self)}
+
+    def _add_all(self, pars):
+        ## adds the entries of a plain dictionary (e.g. loaded from file) to an empty set in bulk;
+        ## the section index is built lazily, in a single pass (see reindex())
+        dict.update(self, pars)
+        self._index = None
+        for key, entry in pars.items():
+            if isinstance(entry, DerivedEntry):
+                dict.__setitem__(self, key, self._bind(key, entry))
+
+    def _evaluate(self, entry):
+        return evaluate_derived(self, entry)
+
+    def _bind(self, key, entry):
+        if entry._pars is not None and entry._pars is not self:
+            entry = entry.copy()  ## entry of another parameter set (e.g. copy())
+        entry._pars = self
+        entry._valid = False
+        for k in entry.inputs:
+            self._dependents.setdefault(k, {})[key] = None
+        return entry
+
+    def _forget(self, key, entry):
+        ## called when an entry is replaced or removed
+        if isinstance(entry, DerivedEntry) and entry._pars is self:
+            for k in entry.inputs:
+                dependents = self._dependents.get(k)
+                if dependents is not None:
+                    dependents.pop(key, None)
+            entry._pars = None
+        ## invalidate memoized values depending on the entry (directly or indirectly), and mark
+        ## their sections as changed
+        stack = list(self._dependents.get(key, ()))
+        while stack:
+            dependent_key = stack.pop()
+            dependent = dict.get(self, dependent_key)
+            if isinstance(dependent, DerivedEntry) and dependent._valid:
+                dependent._valid = False
+                dependent._value = None
+                self.touch(dependent.section)
+                stack.extend(self._dependents.get(dependent_key, ()))
+
+    ##################################################
+    ## section index
+
+    def section_index(self):
+        '''
+        Returns the section index.
+
+        Returns:
+        --------
+        index: dict
+        Dictionary mapping each section name to a dictionary whose keys are the parameter keys
+        of this section (in insertion order). The returned object must not be modified.
+
+        '''
+
+        if self._index is None:
+            self.reindex()
+        return self._index
+
+    def section_keys(self, section):
+        '''
+        Returns the keys of all parameters of a given section (in insertion order).
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        keys: list(str)
+        List of parameter keys.
+
+        '''
+
+        return list(self.section_index().get(section, ()))
+
+    def sections(self):
+        '''
+        Returns the names of all sections (in order of first appearance).
+
+        Returns:
+        --------
+        sections: list(str)
+        List of section names.
+
+        '''
+
+        return list(self.section_index())
+
+    def section_version(self, section):
+        '''
+        Returns the version of a section.
+
+        The version changes whenever a parameter of the section is added, replaced or removed.
+        Versions of different ParameterSet objects are never equal.
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        version: tuple(int, int)
+        Section version.
+
+        '''
+
+        return (self._uid, self._versions.get(section, 0))
+
+    def touch(self, section):
+        '''
+        Marks a section as changed (e.g. after entries were modified in place).
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        self._versions[section] = self._versions.get(section, 0) + 1
+
+    def reindex(self):
+        '''
+        Rebuilds the section index in a single pass over all parameters.
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        index = {}
+        for key, entry in dict.items(self):
+            section = entry['section']
+            if section in index:
+                index[section][key] = None
+            else:
+                index[section] = {key: None}
+        self._index = index
+
+    def _index_key(self, key, entry):
+        if self._index is None:
+            return
+        section = entry['section']
+        keys = self._index.get(section)
+        if keys is None:
+            self._index[section] = {key: None}
+        else:
+            keys[key] = None
+
+    def _unindex(self, key, entry):
+        self.touch(entry['section'])
+        if self._index is None:
+            return
+        section = entry['section']
+        keys = self._index.get(section)
+        if keys is None or key not in keys:
+            ## entry was modified in place, index is out of sync
+            self._index = None
+            return
+        if len(keys) > 1:
+            del keys[key]
+        else:
+            del self._index[section]
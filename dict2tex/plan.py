@@ -0,0 +1,284 @@
+'''
+Single-pass rendering of multiple outputs.
+
+A BuildPlan collects the parameter tables and macro files of a build (output specifications,
+see build.py) and renders all of them in one pass over the parameters: each parameter is
+dispatched to every output (and table section) requiring it. Rows are rendered once per
+distinct row format, i.e., tables showing the same sections with the same columns, colors and
+macro prefix share their rows. The rendering cost is therefore proportional to the number of
+parameters plus the size of the outputs, independently of how many outputs refer to the same
+sections.
+
+The outputs are identical to those of tex_table_string() and tex_macros_string().
+
+'''
+
+from .dict2tex import tex_subtable_title_string, table_section_specs, compile_row_renderer, group_sections, \
+    _compile_macro_renderer, _compile_usage_filter, _warn_undefined_macros, _assemble_table
+from .output import write_if_changed, WriteReport
+from .usage import scan_macro_usage
+
+__all__ = ['BuildPlan']
+
+##################################################
+
+class BuildPlan:
+    '''
+    Plan of a build rendering several outputs in a single pass over the parameters.
+
+    Example:
+    --------
+    plan = dict2tex.BuildPlan()
+    plan.add_table('params_table.tex', table_columns, table_sections)
+    plan.add_macros('params_macros.tex')
+    report = plan.build(pars)
+
+    Arguments:
+    ----------
+    specs: list(dict)
+    Output specifications (see build.py; optional; default: none).
+
+    '''
+
+    def __init__(self,specs=()):
+        self.specs = []
+        for spec in specs:
+            self.add(spec)
+
+    def add(self,spec):
+        '''
+        Adds an output.
+
+        Arguments:
+        ----------
+        spec: dict
+        Output specification (see build.py).
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        if spec.get('type') not in ('table', 'macros'):
+            raise ValueError("Unknown output type '%s'." % (spec.get('type')))
+        if spec.get('max_rows') or spec.get('max_bytes') or spec.get('by_section'):
+            raise ValueError("Outputs consisting of several files (sharded tables, macros by section) are not supported by BuildPlan.")
+        self.specs.append(spec)
+
+    def add_table(self,tex_file,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',table_column_widths=None):
+        '''
+        Adds a parameter table (for the arguments, see dict2tex.tex_table()).
+        '''
+
+        self.add({'type': 'table', 'tex_file': tex_file, 'table_columns': table_columns, 'table_sections': table_sections,
+                  'section_text_color': section_text_color, 'section_title_color': section_title_color,
+                  'macro_prefix': macro_prefix, 'table_column_widths': table_column_widths})
+
+    def add_macros(self,tex_file,macros_prefix='P',macros_sections=None,sources=None):
+        '''
+        Adds a file of macro definitions (for the arguments, see dict2tex.tex_macros()).
+        '''
+
+        self.add({'type': 'macros', 'tex_file': tex_file, 'macros_prefix': macros_prefix, 'macros_sections': macros_sections,
+                  'sources': sources})
+
+    def render(self,pars,stats=None):
+        '''
+        Renders all outputs in a single pass over the parameters.
+
+        Arguments:
+        ----------
+        pars: dict or iterator
+        Parameter dictionary, or iterator over (key, entry) pairs (see iter_parameters_from_json()).
+
+        stats: BuildStats or None
+        Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+        Returns:
+        --------
+        tex_strs: list(str)
+        LaTeX code of each output (in the order in which the outputs were added).
+
+        '''
+
+        return self._render(pars,stats)
+
+    def build(self,pars,report=None,stats=None):
+        '''
+        Renders all outputs (see render()) and writes them to file (only if their content changed).
+
+        Arguments:
+        ----------
+        pars: dict or iterator
+        Parameter dictionary, or iterator over (key, entry) pairs.
+
+        report: WriteReport or None
+        Report in which the outcome is recorded (optional; default: None, i.e., a new report is created).
+
+        stats: BuildStats or None
+        Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+        Returns:
+        --------
+        report: WriteReport
+        Report listing the files written and skipped (unchanged).
+
+        '''
+
+        if report is None:
+            report = WriteReport()
+        for spec, tex_str in zip(self.specs, self.render(pars,stats)):
+            write_if_changed(spec['tex_file'],tex_str,report,stats=stats)
+        return report
+
+    def _render(self,pars,stats=None):
+        if stats is None:
+            return self._assemble(*self._dispatch(pars))
+        ## instrumented version: grouping by section ('group') and rendering ('format', and per
+        ## table section) are timed separately, as in tex_table_core_stream()
+        with stats.timer('format'):
+            formats, dispatch, everything, layouts, usage = self._prepare()
+        with stats.timer('group'):
+            if everything and not hasattr(pars, 'keys'):
+                pars = dict(pars)  ## iterator, needed for both passes below
+            groups = group_sections(pars, list(dispatch))
+        with stats.timer('format'):
+            if everything:
+                for k, entry in pars.items():
+                    for render, rows in everything:
+                        rows.append(render(k,entry))
+            for section, targets in dispatch.items():
+                with stats.section_timer(section):
+                    pars_section = groups.get(section, {})
+                    for k in pars_section:
+                        entry = pars_section[k]
+                        for render, rows in targets:
+                            rows.append(render(k,entry))
+            return self._assemble(formats, layouts, usage, stats)
+
+    def _dispatch(self,pars):
+        ## renders the rows of all outputs in a single pass over the parameters
+        formats, dispatch, everything, layouts, usage = self._prepare()
+        if hasattr(pars, 'section_index') and not everything:
+            ## indexed container (e.g. ParameterSet): only the required sections are visited
+            index = pars.section_index()
+            for section, targets in dispatch.items():
+                for k in index.get(section, ()):
+                    entry = pars[k]
+                    for render, rows in targets:
+                        rows.append(render(k,entry))
+        else:
+            items = pars.items() if hasattr(pars, 'keys') else pars
+            for k, entry in items:
+                for render, rows in everything:
+                    rows.append(render(k,entry))
+                targets = dispatch.get(entry['section'])
+                if targets is not None:
+                    for render, rows in targets:
+                        rows.append(render(k,entry))
+        return formats, layouts, usage
+
+    def _prepare(self):
+        ## rows rendered by each distinct row format:
+        ## format key -> (render function, {section: [rows]} or [rows] for all parameters)
+        formats = {}
+        ## section -> [(render function, rows)] of all formats requiring the section
+        dispatch = {}
+        ## [(render function, rows)] of all formats requiring all parameters
+        everything = []
+        ## per output: format key and (for tables) resolved section specifications
+        layouts = []
+        ## per macros output restricted to the macros used in LaTeX sources: (used, defined) names
+        usage = []
+
+        def use_format(key,compile_render,sections):
+            if key not in formats:
+                if sections is None:
+                    formats[key] = (compile_render(), [])
+                    everything.append(formats[key])
+                else:
+                    formats[key] = (compile_render(), {})
+            render, rows = formats[key]
+            for section in sections or ():
+                if section not in rows:
+                    rows[section] = []
+                    dispatch.setdefault(section, []).append((render, rows[section]))
+
+        for spec in self.specs:
+            if spec['type'] == 'table':
+                section_specs = table_section_specs(spec['table_sections'],
+                                                    spec.get('section_text_color', 'black'),
+                                                    spec.get('section_title_color', 'lightgray'))
+                table_columns = spec['table_columns']
+                macro_prefix = spec.get('macro_prefix', 'P')
+                format_keys = []
+                for section, section_title, color, title_color in section_specs:
+                    key = ('table', repr((table_columns, color, macro_prefix)))
+                    use_format(key, lambda: compile_row_renderer(table_columns,color,macro_prefix), [section])
+                    format_keys.append(key)
+                layouts.append((format_keys, section_specs))
+            else:
+                macros_prefix = spec.get('macros_prefix', 'P')
+                macros_sections = spec.get('macros_sections', None)
+                if spec.get('sources') is not None:
+                    ## macros which are not used are rendered as empty rows
+                    used = scan_macro_usage(spec['sources'],macros_prefix)
+                    is_used, defined = _compile_usage_filter(macros_prefix,used)
+                    usage.append((used, defined))
+                    key = ('macros', macros_prefix, macros_sections is None, len(usage))
+                    compile_render = lambda: _compile_filtered_macro_renderer(macros_prefix,is_used)
+                else:
+                    key = ('macros', macros_prefix, macros_sections is None)
+                    compile_render = lambda: _compile_macro_renderer(macros_prefix)
+                use_format(key, compile_render, macros_sections)
+                layouts.append((key, macros_sections))
+
+        return formats, dispatch, everything, layouts, usage
+
+    def _assemble(self,formats,layouts,usage,stats=None):
+        ## assembly of the outputs from the rendered rows
+        tex_strs = []
+        for spec, (keys, sections) in zip(self.specs, layouts):
+            if spec['type'] == 'table':
+                table_columns = spec['table_columns']
+                n_columns = len(table_columns)
+                parts = []
+                n_rows = 0
+                for key, (section, section_title, color, title_color) in zip(keys, sections):
+                    if section_title is not None:
+                        parts.append(tex_subtable_title_string(n_columns,section_title,title_color))
+                    rows = formats[key][1][section]
+                    parts.append(''.join(rows))
+                    n_rows += len(rows)
+                if stats is not None:
+                    n_fields = sum(len(column['field']) if type(column['field'])==list else 1 for column in table_columns)
+                    stats.count('rows', n_rows)
+                    stats.count('cells', n_rows * n_fields)
+                tex_strs.append(_assemble_table(table_columns,''.join(parts),spec.get('table_column_widths')))
+            else:
+                rows = formats[keys][1]
+                if sections is None:
+                    parts = rows
+                else:
+                    parts = [''.join(rows[section]) for section in sections]
+                if stats is not None:
+                    row_lists = [rows] if sections is None else [rows[section] for section in sections]
+                    if spec.get('sources') is not None:
+                        stats.count('macros', sum(1 for section_rows in row_lists for row in section_rows if row))
+                    else:
+                        stats.count('macros', sum(len(section_rows) for section_rows in row_lists))
+                tex_strs.append(''.join(parts))
+        for used, defined in usage:
+            _warn_undefined_macros(used,defined)
+        return tex_strs
+
+##################################################
+
+def _compile_filtered_macro_renderer(macros_prefix,is_used):
+    render_macro = _compile_macro_renderer(macros_prefix)
+
+    def render_used_macro(key,entry):
+        return render_macro(key,entry) if is_used(key) else ''
+
+    return render_used_macro
@@ -0,0 +1,202 @@
+'''
+Macro definitions split by parameter section.
+
+tex_macros_by_section() writes the macro definitions of each parameter section to a separate
+file (e.g. 'macros_network.tex' for section 'network' and target 'macros.tex'), and an index
+file (the target file) which
+
+- loads all section files (lazy=False), or
+- defines a stub for each macro which loads the file of its section on first use (lazy=True),
+  e.g. \\def\\PN{\\dicttex@load{macros_network.tex}\\PN}. Loading a section file (re)defines
+  all macros of the section globally, such that later uses do not load the file again.
+
+Instead of the index, the document can also include only the section files it needs.
+
+Lazily loaded macros cannot be used in contexts where the stub is only expanded, but not
+executed (e.g. within \\edef, or in moving arguments such as section titles written to the
+table of contents); such macros must be loaded beforehand (by including their section file).
+File names must not contain spaces.
+
+'''
+
+import os
+
+from .dict2tex import group_sections, _compile_macro_renderer, _compile_usage_filter, _warn_undefined_macros
+from .escape import sanitize
+from .output import write_if_changed, WriteReport
+
+__all__ = ['tex_macros_by_section', 'section_macros_filename']
+
+## first line of generated section files (identifies files which can be removed when their section disappears)
+SECTION_MACROS_MARKER = "%% macro definitions of parameter section"
+
+##################################################
+
+def section_macros_filename(macros_tex_file,section):
+    '''
+    Returns the name of the macro file of a section, e.g. 'macros_network.tex' for 'macros.tex'.
+
+    Characters other than letters, digits, '-' and '_' in the section name are replaced by '_',
+    followed by a short hash of the section name, such that distinct sections are stored in
+    distinct files (e.g. 'macros_a_b_<hash>.tex' for section 'a.b', and 'macros_a_b.tex' for 'a_b').
+
+    Arguments:
+    ----------
+    macros_tex_file: str
+    Name of the index file.
+
+    section: str
+    Section name.
+
+    Returns:
+    --------
+    filename: str
+    Name of the section file.
+
+    '''
+
+    import re
+
+    root, ext = os.path.splitext(str(macros_tex_file))
+    section = str(section)
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", section)
+    if name != section:
+        import hashlib
+        name += "_" + hashlib.blake2b(section.encode('utf-8', 'surrogatepass'), digest_size=4).hexdigest()
+    return "%s_%s%s" % (root, name, ext or '.tex')
+
+def tex_macros_by_section(pars,macros_tex_file,macros_prefix='P',macros_sections=None,lazy=True,report=None,stats=None,input_path=None,sources=None):
+    '''
+    Creates one file of macro definitions per parameter section, and an index file loading them.
+
+    Files are only written if their content changed. Section files of sections which no longer
+    exist are removed.
+
+    Arguments:
+    ----------
+    pars: dict or iterator
+    Parameter dictionary, or iterator over (key, entry) pairs.
+
+    macros_tex_file: str
+    Name of the index file (see module documentation).
+
+    macros_prefix: str
+    Prefix used for LaTeX macro names (optional; default: 'P').
+
+    macros_sections: list(str) or None
+    Sections for which macros are defined. If None, macros are defined for all sections
+    (optional; default: None).
+
+    lazy: bool
+    If True, the index defines stubs loading the section files on first use of one of their
+    macros; if False, the index loads all section files (optional; default: True).
+
+    report: WriteReport or None
+    Report in which the outcome is recorded (optional; default: None, i.e., a new report is created).
+
+    stats: BuildStats or None
+    Statistics object recording timings and counters (optional; default: None, i.e., no instrumentation).
+
+    input_path: str or None
+    Directory of the section files as seen from the directory in which LaTeX is run (optional;
+    default: None, i.e., the directory part of macros_tex_file).
+
+    sources: str or list(str) or None
+    LaTeX sources of the document; if given, only the macros referenced in the sources are
+    defined (see tex_macros(); the index file is not scanned; optional; default: None).
+
+    Returns:
+    --------
+    report: WriteReport
+    Report listing the files written, skipped (unchanged) and removed.
+
+    '''
+
+    if report is None:
+        report = WriteReport()
+
+    used = None
+    if sources is not None:
+        from .usage import scan_macro_usage
+        ## the stubs in the index file reference all macros
+        if stats is not None:
+            with stats.timer('scan'):
+                used = scan_macro_usage(sources,macros_prefix,exclude=[macros_tex_file])
+        else:
+            used = scan_macro_usage(sources,macros_prefix,exclude=[macros_tex_file])
+
+    if stats is not None:
+        with stats.timer('format'):
+            files, index_str = _render_files(pars,macros_tex_file,macros_prefix,macros_sections,lazy,input_path,used)
+        stats.count('macros', sum(len(lines) - 1 for lines in files.values()))
+    else:
+        files, index_str = _render_files(pars,macros_tex_file,macros_prefix,macros_sections,lazy,input_path,used)
+
+    for filename, lines in files.items():
+        write_if_changed(filename,''.join(lines),report,stats=stats)
+    _remove_stale_files(macros_tex_file,files,report,stats)
+    write_if_changed(macros_tex_file,index_str,report,stats=stats)
+    return report
+
+##################################################
+
+def _render_files(pars,macros_tex_file,macros_prefix,macros_sections,lazy,input_path,used=None):
+    ## Returns the lines of each section file, and the content of the index file.
+    render_macro = _compile_macro_renderer(macros_prefix)
+    if used is not None:
+        is_used, defined = _compile_usage_filter(macros_prefix,used)
+    directory = input_path if input_path is not None else os.path.dirname(str(macros_tex_file))
+
+    groups = group_sections(pars, macros_sections)
+    sections = macros_sections if macros_sections is not None else list(groups)
+
+    files = {}
+    file_sections = {}
+    index = ["%% macro definitions of the parameter sections (generated by dict2tex)\n"]
+    if lazy:
+        index.append("\\makeatletter\n")
+        index.append("\\def\\dicttex@load#1{\\begingroup\\globaldefs=1 \\@@input #1 \\endgroup}\n")
+    for section in sections:
+        filename = section_macros_filename(macros_tex_file,section)
+        if filename in file_sections:
+            if file_sections[filename] == section:
+                continue  ## section listed repeatedly
+            raise ValueError("Sections '%s' and '%s' map to the same macro file '%s'." % (file_sections[filename], section, filename))
+        file_sections[filename] = section
+        pars_section = groups.get(section, {})
+        if used is not None:
+            pars_section = dict((k, pars_section[k]) for k in pars_section if is_used(k))
+        lines = ["%s '%s'\n" % (SECTION_MACROS_MARKER, section)]
+        lines += [render_macro(k,pars_section[k]) for k in pars_section]
+        files[filename] = lines
+
+        input_name = os.path.join(directory, os.path.basename(filename)).replace(os.sep, '/')
+        if lazy:
+            for k in pars_section:
+                name = "\\%s%s" % (macros_prefix, sanitize(r"%s" % k, 'macro'))
+                index.append("\\def%s{\\dicttex@load{%s}%s}\n" % (name, input_name, name))
+        else:
+            index.append("\\input{%s}\n" % (input_name))
+    if lazy:
+        index.append("\\makeatother\n")
+    if used is not None:
+        _warn_undefined_macros(used,defined)
+    return files, ''.join(index)
+
+def _remove_stale_files(macros_tex_file,files,report,stats):
+    import glob
+
+    root, ext = os.path.splitext(str(macros_tex_file))
+    for filename in glob.glob(glob.escape(root) + '_*' + (ext or '.tex')):
+        if filename in files:
+            continue
+        try:
+            with open(filename, 'r') as f:
+                generated = f.readline().startswith(SECTION_MACROS_MARKER)
+        except (OSError, UnicodeDecodeError):
+            continue
+        if generated:
+            os.remove(filename)
+            report.add_removed(filename)
+            if stats is not None:
+                stats.count('files_removed')
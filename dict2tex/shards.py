@@ -0,0 +1,228 @@
+'''
+Sharded parameter tables.
+
+Very long tables (tens of thousands of rows) in a single file can exceed TeX's memory limits,
+and are slow to process. tex_table_sharded() splits a table into several shard files of bounded
+size (number of rows and/or characters), and writes a small master file containing the table
+header and one \\input{} line per shard. The master file is included in the LaTeX document in
+place of the unsharded table (see example/example.tex for making \\input{} work within longtable).
+
+Shard boundaries follow table sections: a section is only split if it does not fit into a shard
+of its own. The rows of each shard can be rendered independently (in parallel, see max_workers).
+Shards with unchanged content are not rewritten, and shards left over from a previous build
+with more shards are removed.
+
+'''
+
+import os
+
+from .dict2tex import table_section_specs, group_sections, compile_row_renderer, tex_subtable_title_string, \
+    tex_table_header_string, tex_table_footer_string, table_column_spec
+from .output import write_if_changed, WriteReport
+from .escape import _escaping_rules, _set_escaping_rules
+
+__all__ = ['tex_table_sharded', 'table_shards', 'shard_filename']
+
+##################################################
+
+def table_shards(section_sizes,max_rows=None,max_bytes=None):
+    '''
+    Distributes the table sections over shards of bounded size.
+
+    Consecutive sections are combined in a shard as long as the bounds are met. A section which
+    does not fit into the current shard starts a new shard. Only sections exceeding the bounds
+    on their own are split (at row boundaries).
+
+    Arguments:
+    ----------
+    section_sizes: list(list(int))
+    Size (number of characters) of each row of each table section. The title row of a
+    section (if any) is included as its first row.
+
+    max_rows: int or None
+    Maximum number of rows per shard (optional; default: None, i.e., no bound).
+
+    max_bytes: int or None
+    Maximum number of characters per shard (optional; default: None, i.e., no bound).
+    Shards containing a single row may exceed this bound.
+
+    Returns:
+    --------
+    shards: list(list(tuple))
+    Pieces (section index, first row, end row) of each shard.
+
+    '''
+
+    max_rows = max_rows or float('inf')
+    max_bytes = max_bytes or float('inf')
+
+    shards = []
+    pieces, n_rows, n_bytes = [], 0, 0
+    for cs, sizes in enumerate(section_sizes):
+        section_bytes = sum(sizes)
+        if pieces and (n_rows + len(sizes) > max_rows or n_bytes + section_bytes > max_bytes):
+            ## section does not fit into the current shard
+            shards.append(pieces)
+            pieces, n_rows, n_bytes = [], 0, 0
+        if n_rows + len(sizes) <= max_rows and n_bytes + section_bytes <= max_bytes:
+            pieces.append((cs, 0, len(sizes)))
+            n_rows += len(sizes)
+            n_bytes += section_bytes
+            continue
+        ## section exceeding the bounds on its own
+        start = 0
+        for row, size in enumerate(sizes):
+            if row > start and (n_rows + 1 > max_rows or n_bytes + size > max_bytes):
+                pieces.append((cs, start, row))
+                shards.append(pieces)
+                pieces, n_rows, n_bytes, start = [], 0, 0, row
+            n_rows += 1
+            n_bytes += size
+        pieces.append((cs, start, len(sizes)))
+    if pieces or not shards:
+        shards.append(pieces)
+    return shards
+
+def shard_filename(params_tex_file,index):
+    '''
+    Returns the name of a shard file, e.g. 'parameter_table_shard001.tex' for 'parameter_table.tex'.
+
+    Arguments:
+    ----------
+    params_tex_file: str
+    Name of the master file.
+
+    index: int
+    Shard index (starting at 1).
+
+    Returns:
+    --------
+    filename: str
+    Name of the shard file.
+
+    '''
+
+    root, ext = os.path.splitext(str(params_tex_file))
+    return "%s_shard%03d%s" % (root, index, ext or '.tex')
+
+def tex_table_sharded(pars,params_tex_file,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',
+                      max_rows=None,max_bytes=None,report=None,stats=None,table_column_widths=None,max_workers=None,input_path=None):
+    '''
+    Creates a parameter table split into several shard files, and a master file including them.
+
+    The master file (params_tex_file) contains the table header and \\input{} lines for the
+    shards (named by shard_filename()). Files are only written if their content changed.
+
+    Arguments:
+    ----------
+    max_rows: int or None
+    Maximum number of rows per shard (optional; default: None, i.e., no bound).
+
+    max_bytes: int or None
+    Maximum number of characters (bytes for ASCII content) per shard (optional; default: None, i.e., no bound).
+
+    max_workers: int or None
+    Number of worker processes rendering the table sections (optional; default: None, i.e.,
+    rendering in the calling process).
+
+    input_path: str or None
+    Directory of the shards as seen from the directory in which LaTeX is run, prepended to the
+    names of the shards in the \\input{} lines (optional; default: None, i.e., the directory
+    part of params_tex_file).
+
+    For the remaining arguments, see tex_table(). With table_column_widths, the master file
+    contains the longtable environment.
+
+    Returns:
+    --------
+    report: WriteReport
+    Report listing the files written, skipped (unchanged) and removed (stale shards).
+
+    '''
+
+    if report is None:
+        report = WriteReport()
+
+    specs = table_section_specs(table_sections,section_text_color,section_title_color)
+    if stats is not None:
+        with stats.timer('format'):
+            sections = _render_sections(pars,table_columns,specs,macro_prefix,max_workers)
+        n_rows = sum(len(rows) for title, rows in sections)
+        n_fields = sum(len(column['field']) if type(column['field'])==list else 1 for column in table_columns)
+        stats.count('rows', n_rows)
+        stats.count('cells', n_rows * n_fields)
+    else:
+        sections = _render_sections(pars,table_columns,specs,macro_prefix,max_workers)
+
+    ## rows of each section, preceded by the title row (if any)
+    section_rows = [([title] if title else []) + rows for title, rows in sections]
+    shards = table_shards([[len(row) for row in rows] for rows in section_rows],max_rows,max_bytes)
+
+    master = []
+    directory = input_path if input_path is not None else os.path.dirname(str(params_tex_file))
+    for i, pieces in enumerate(shards, 1):
+        shard_file = shard_filename(params_tex_file,i)
+        shard_str = ''.join([''.join(section_rows[cs][start:stop]) for cs, start, stop in pieces])
+        write_if_changed(shard_file,shard_str,report,stats=stats)
+        master.append(r"\input{%s}" % (os.path.join(directory, os.path.basename(shard_file)).replace(os.sep, '/')) + "\n")
+
+    _remove_stale_shards(params_tex_file,len(shards),report,stats)
+
+    column_spec = None
+    if table_column_widths is not None:
+        table_body = None
+        if table_column_widths == 'auto':
+            table_body = ''.join([''.join(rows) for rows in section_rows])
+        column_spec = table_column_spec(table_columns,table_column_widths,table_body)
+    master_str = tex_table_header_string(table_columns,column_spec) + ''.join(master) + tex_table_footer_string(column_spec)
+    write_if_changed(params_tex_file,master_str,report,stats=stats)
+    return report
+
+##################################################
+
+def _render_sections(pars,table_columns,specs,macro_prefix,max_workers):
+    ## Returns (title row, list of rows) of each table section.
+    groups = group_sections(pars, [spec[0] for spec in specs])
+    titles = [tex_subtable_title_string(len(table_columns),title,title_color) if title is not None else ''
+              for section, title, color, title_color in specs]
+
+    if max_workers is None or max_workers <= 1 or len(specs) <= 1:
+        rows = [_render_rows(groups.get(section, {}),table_columns,color,macro_prefix)
+                for section, title, color, title_color in specs]
+        return list(zip(titles, rows))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    ## each worker receives only the sections it renders, and the escaping rules (see configure_escaping())
+    tasks = [(dict(_plain_entries(groups.get(section, {}))), table_columns, color, macro_prefix)
+             for section, title, color, title_color in specs]
+    with ProcessPoolExecutor(min(max_workers, len(tasks)), initializer=_set_escaping_rules,
+                             initargs=(_escaping_rules(),)) as pool:
+        rows = list(pool.map(_render_rows_task, tasks))
+    return list(zip(titles, rows))
+
+def _render_rows(pars_section,table_columns,color,macro_prefix):
+    render_row = compile_row_renderer(table_columns,color,macro_prefix)
+    return [render_row(k,pars_section[k]) for k in pars_section]
+
+def _render_rows_task(task):
+    return _render_rows(*task)
+
+def _plain_entries(pars_section):
+    ## entries as plain dictionaries (derived parameters evaluated, views of ColumnarParameters copied)
+    for k, entry in pars_section.items():
+        yield k, (entry if type(entry) is dict else dict(entry))
+
+def _remove_stale_shards(params_tex_file,n_shards,report,stats):
+    index = n_shards + 1
+    while True:
+        shard_file = shard_filename(params_tex_file,index)
+        try:
+            os.remove(shard_file)
+        except FileNotFoundError:
+            return
+        if report is not None:
+            report.add_removed(shard_file)
+        if stats is not None:
+            stats.count('files_removed')
+        index += 1
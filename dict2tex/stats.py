@@ -0,0 +1,168 @@
+'''
+Optional instrumentation of builds.
+
+A BuildStats object can be passed (argument stats) to the loading, rendering and writing
+functions of dict2tex. It records the wall-clock time spent in each processing stage
+('load', 'group', 'format', 'write'), the time spent per table section, and counters such as
+the number of rows, cells and bytes written, and files opened.
+If no BuildStats object is passed (stats=None, the default), no measurements are taken.
+
+'''
+
+import time
+
+__all__ = ['BuildStats']
+
+##################################################
+
+class BuildStats:
+    '''
+    Record of timings and counters of a build.
+
+    Attributes:
+    -----------
+    stages: dict
+    Wall-clock time (s) per processing stage.
+
+    sections: dict
+    Wall-clock time (s) spent on rendering each table section.
+
+    counters: dict
+    Counters (e.g. 'rows', 'cells', 'macros', 'bytes_written', 'files_opened', 'files_written', 'files_skipped').
+
+    '''
+
+    def __init__(self):
+        self.stages = {}
+        self.sections = {}
+        self.counters = {}
+
+    def timer(self,stage):
+        '''
+        Returns a context manager measuring the wall-clock time of a stage.
+
+        Example:
+        --------
+        with stats.timer('load'):
+            pars = ...
+
+        Arguments:
+        ----------
+        stage: str
+        Name of the processing stage.
+
+        Returns:
+        --------
+        timer: context manager
+
+        '''
+
+        return _StageTimer(self.stages, stage)
+
+    def section_timer(self,section):
+        '''
+        Returns a context manager measuring the wall-clock time spent on a table section.
+
+        Arguments:
+        ----------
+        section: str
+        Section name.
+
+        Returns:
+        --------
+        timer: context manager
+
+        '''
+
+        return _StageTimer(self.sections, section)
+
+    def count(self,name,n=1):
+        '''
+        Increments a counter.
+
+        Arguments:
+        ----------
+        name: str
+        Name of the counter.
+
+        n: int
+        Increment (optional; default: 1).
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self,other):
+        '''
+        Adds the timings and counters of another BuildStats object.
+
+        Arguments:
+        ----------
+        other: BuildStats
+
+        Returns:
+        --------
+        -
+
+        '''
+
+        for target, source in ((self.stages, other.stages), (self.sections, other.sections), (self.counters, other.counters)):
+            for name, value in source.items():
+                target[name] = target.get(name, 0) + value
+
+    def as_dict(self):
+        '''
+        Returns the statistics as a dictionary {'stages': ..., 'sections': ..., 'counters': ...}.
+        '''
+
+        return {'stages': dict(self.stages), 'sections': dict(self.sections), 'counters': dict(self.counters)}
+
+    def to_json(self,filename=None):
+        '''
+        Converts the statistics to json, and optionally writes them to file.
+
+        Arguments:
+        ----------
+        filename: str or None
+        Name of the target json file (optional; default: None).
+
+        Returns:
+        --------
+        json_str: str
+        Statistics in json format.
+
+        '''
+
+        import json
+
+        json_str = json.dumps(self.as_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as fp:
+                fp.write(json_str + "\n")
+        return json_str
+
+    def __str__(self):
+        lines = ["stage %-24s %10.3f ms" % (name, 1e3 * t) for name, t in self.stages.items()]
+        lines += ["section %-22s %10.3f ms" % (name, 1e3 * t) for name, t in self.sections.items()]
+        lines += ["%-30s %10d" % (name, n) for name, n in self.counters.items()]
+        return "\n".join(lines)
+
+class _StageTimer:
+
+    __slots__ = ('_target', '_name', '_t0')
+
+    def __init__(self,target,name):
+        self._target = target
+        self._name = name
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self,*exc):
+        self._target[self._name] = self._target.get(self._name, 0.) + time.perf_counter() - self._t0
+        return False
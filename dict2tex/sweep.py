@@ -0,0 +1,303 @@
+'''
+Parameter sweeps: rendering of many variants of a parameter table.
+
+In a parameter sweep, each variant typically differs from a base parameter set in only a
+few values. A TableSweep renders the base table once, caches the rendered row of each
+parameter, and re-renders only the rows of parameters whose fields differ in a given variant.
+Rows of derived parameters (see ParameterSet.derive()) depending on a modified parameter are
+re-rendered as well. The output is identical to rendering each variant from scratch with tex_table().
+
+'''
+
+from .dict2tex import tex_table_header_string, tex_subtable_title_string, compile_row_renderer, \
+    tex_table_footer_string, tex_table_string, table_section_specs, group_sections, table_column_spec, \
+    estimate_column_widths
+from .output import write_if_changed, WriteReport
+from .derived import DerivedEntry, evaluate_derived
+
+__all__ = ['TableSweep', 'tex_table_sweep', 'parameter_overrides']
+
+##################################################
+
+class TableSweep:
+    '''
+    Parameter table with cached rows, for rendering many variants of a base parameter set.
+
+    Arguments:
+    ----------
+    pars: dict or iterator
+    Base parameter dictionary, or iterator over (key, entry) pairs.
+
+    table_columns, table_sections, section_text_color, section_title_color, macro_prefix, table_column_widths:
+    See tex_table(). Automatic column widths (table_column_widths='auto') are estimated from the
+    base table, and used for all variants (such that all variants have the same layout).
+
+    '''
+
+    def __init__(self,pars,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',table_column_widths=None):
+
+        if not hasattr(pars, 'keys'):
+            pars = dict(pars)
+
+        self.pars = pars
+        self.table_columns = table_columns
+        self.table_sections = table_sections
+        self.section_text_color = section_text_color
+        self.section_title_color = section_title_color
+        self.macro_prefix = macro_prefix
+        self.table_column_widths = table_column_widths
+
+        specs = table_section_specs(table_sections,section_text_color,section_title_color)
+        groups = group_sections(pars, [spec[0] for spec in specs])
+
+        self._renderers = []   ## row renderer of each table section (see compile_row_renderer())
+        self._titles = []      ## rendered title row of each table section
+        self._rows = []        ## rendered rows of each table section
+        self._fragments = []   ## rendered table sections (title + rows)
+        self._positions = {}   ## key -> list of (table section index, row index)
+
+        for cs, (section, section_title, color, title_color) in enumerate(specs):
+            pars_section = groups.get(section, {})
+            if section_title is not None:
+                title = tex_subtable_title_string(len(table_columns),section_title,title_color)
+            else:
+                title = ''
+            render_row = compile_row_renderer(table_columns,color,macro_prefix)
+            rows = []
+            for k in pars_section:
+                self._positions.setdefault(k, []).append((cs, len(rows)))
+                rows.append(render_row(k,pars_section[k]))
+            self._renderers.append(render_row)
+            self._titles.append(title)
+            self._rows.append(rows)
+            self._fragments.append(title + ''.join(rows))
+
+        if table_column_widths == 'auto':
+            self.table_column_widths = estimate_column_widths(''.join(self._fragments),table_columns)
+        column_spec = None
+        if self.table_column_widths is not None:
+            column_spec = table_column_spec(table_columns,self.table_column_widths)
+        self._header = tex_table_header_string(table_columns,column_spec)
+        self._footer = tex_table_footer_string(column_spec)
+
+    def render(self,overrides=None):
+        '''
+        Renders the table for a variant of the base parameter set.
+
+        Arguments:
+        ----------
+        overrides: dict or None
+        Changes with respect to the base parameter set, given as a dictionary mapping
+        parameter keys to dictionaries of changed fields, e.g. {'N': {'value': 2000}}.
+        If None, the base table is rendered (optional; default: None).
+
+        Returns:
+        --------
+        table_str: str
+        LaTeX code of the parameter table (identical to the output of tex_table_string()
+        for the modified parameter set).
+
+        '''
+
+        if not overrides:
+            return self._header + ''.join(self._fragments) + self._footer
+
+        ## new parameters or changes of sections alter the table structure: render from scratch
+        for k, fields in overrides.items():
+            if k not in self.pars or ('section' in fields and fields['section'] != self.pars[k]['section']):
+                return tex_table_string(self.variant(overrides),self.table_columns,self.table_sections,
+                                        self.section_text_color,self.section_title_color,self.macro_prefix,
+                                        table_column_widths=self.table_column_widths)
+
+        ## re-render only the rows of modified parameters (and of derived parameters depending on them)
+        changed = {}
+        for k, entry in self._changed_entries(overrides).items():
+            positions = self._positions.get(k)
+            if positions is None:
+                continue  ## parameter not shown in table
+            for cs, row in positions:
+                changed.setdefault(cs, {})[row] = self._renderers[cs](k,entry)
+
+        fragments = list(self._fragments)
+        for cs, rows in changed.items():
+            section_rows = list(self._rows[cs])
+            for row, row_str in rows.items():
+                section_rows[row] = row_str
+            fragments[cs] = self._titles[cs] + ''.join(section_rows)
+
+        return self._header + ''.join(fragments) + self._footer
+
+    def render_variant(self,pars_variant):
+        '''
+        Renders the table for a full variant parameter dictionary.
+
+        The variant is compared to the base parameter set (which is much cheaper than rendering),
+        and only rows of modified parameters are re-rendered.
+
+        Arguments:
+        ----------
+        pars_variant: dict
+        Parameter dictionary.
+
+        Returns:
+        --------
+        table_str: str
+        LaTeX code of the parameter table.
+
+        '''
+
+        if len(pars_variant) != len(self.pars) or any(k not in self.pars for k in pars_variant):
+            return tex_table_string(pars_variant,self.table_columns,self.table_sections,
+                                    self.section_text_color,self.section_title_color,self.macro_prefix,
+                                    table_column_widths=self.table_column_widths)
+
+        return self.render(parameter_overrides(self.pars, pars_variant))
+
+    def variant(self,overrides):
+        '''
+        Returns the full parameter dictionary of a variant.
+
+        Arguments:
+        ----------
+        overrides: dict
+        Changes with respect to the base parameter set (see render()).
+
+        Returns:
+        --------
+        pars: dict
+        Parameter dictionary (entries of unmodified parameters are shared with the base set;
+        derived parameters depending on modified parameters are re-evaluated).
+
+        '''
+
+        pars = dict(self.pars)
+        pars.update(self._changed_entries(overrides))
+        return pars
+
+    def _changed_entries(self,overrides):
+        ## entries of the variant which differ from the base set: the modified parameters, and the
+        ## derived parameters depending on them (directly or indirectly), evaluated for the variant
+        entries = {}
+        for k, fields in overrides.items():
+            entry = dict(self.pars.get(k, {}))
+            entry.update(fields)
+            entries[k] = entry
+
+        dependents = getattr(self.pars, '_dependents', None)   ## see ParameterSet
+        if dependents:
+            from collections import ChainMap
+
+            stack = list(overrides)
+            while stack:
+                for k in dependents.get(stack.pop(), ()):
+                    entry = self.pars.get(k)
+                    if k not in entries and isinstance(entry, DerivedEntry):
+                        entries[k] = entry.copy()
+                        stack.append(k)
+            pars_variant = ChainMap(entries, self.pars)
+            for entry in entries.values():
+                if isinstance(entry, DerivedEntry):
+                    evaluate_derived(pars_variant,entry)
+        return entries
+
+    def write(self,overrides,tex_file,report=None):
+        '''
+        Renders the table for a variant and writes it to file (only if its content changed).
+
+        Arguments:
+        ----------
+        overrides: dict or None
+        Changes with respect to the base parameter set (see render()).
+
+        tex_file: str
+        Name of the target LaTeX file.
+
+        report: WriteReport or None
+        Report in which the outcome is recorded (optional; default: None).
+
+        Returns:
+        --------
+        written: bool
+        True if the file was written, False if it was left untouched.
+
+        '''
+
+        return write_if_changed(tex_file,self.render(overrides),report)
+
+##################################################
+
+def parameter_overrides(pars,pars_variant):
+    '''
+    Determines the fields of a variant parameter dictionary which differ from a base dictionary.
+
+    Arguments:
+    ----------
+    pars: dict
+    Base parameter dictionary.
+
+    pars_variant: dict
+    Variant parameter dictionary.
+
+    Returns:
+    --------
+    overrides: dict
+    Dictionary mapping keys of modified parameters to dictionaries of modified fields.
+    Parameters not contained in pars are included with all their fields.
+
+    '''
+
+    overrides = {}
+    for k, entry in pars_variant.items():
+        base_entry = pars.get(k)
+        if base_entry is None:
+            overrides[k] = dict(entry)
+        elif entry is not base_entry and entry != base_entry:
+            fields = {fld: value for fld, value in entry.items() if fld not in base_entry or base_entry[fld] != value}
+            if fields:
+                overrides[k] = fields
+    return overrides
+
+##################################################
+
+def tex_table_sweep(pars,variants,tex_files,table_columns,table_sections,section_text_color='black',section_title_color='lightgray',macro_prefix='P',report=None,table_column_widths=None):
+    '''
+    Creates one parameter table per variant of a base parameter set, and writes them to file.
+
+    The base table is rendered only once. For each variant, only the rows of modified parameters
+    are re-rendered (see TableSweep).
+
+    Arguments:
+    ----------
+    pars: dict or iterator
+    Base parameter dictionary.
+
+    variants: iterable(dict)
+    Variants, each given as a dictionary mapping parameter keys to dictionaries of changed
+    fields, e.g. {'N': {'value': 2000}}.
+
+    tex_files: iterable(str) or str
+    Names of the target LaTeX files (one per variant), or a format string
+    containing the variant index (e.g. 'parameter_table_%04d.tex').
+
+    For the remaining arguments, see tex_table().
+
+    Returns:
+    --------
+    report: WriteReport
+    Report listing the files written and skipped (unchanged).
+
+    '''
+
+    import itertools
+
+    if report is None:
+        report = WriteReport()
+    if isinstance(tex_files, str):
+        pattern = tex_files
+        tex_files = (pattern % (i) for i in itertools.count())
+
+    sweep = TableSweep(pars,table_columns,table_sections,section_text_color,section_title_color,macro_prefix,table_column_widths)
+    for overrides, tex_file in zip(variants, tex_files):
+        sweep.write(overrides,tex_file,report)
+
+    return report
@@ -0,0 +1,138 @@
+'''
+Usage of parameter macros in LaTeX sources.
+
+Files of macro definitions generated for large parameter sets define tens of thousands of
+macros, of which a manuscript typically uses a few hundred. scan_macro_usage() determines the
+macros referenced in a set of LaTeX source files, such that tex_macros(..., sources=...) can
+restrict the definitions to those actually used.
+
+All files are scanned with a single compiled pattern matching comments, escaped characters
+(e.g. '\\%', '\\\\') and prefixed macro names at once (rather than one search per macro), such
+that the scan takes time proportional to the size of the sources, independently of the number
+of parameters. Files are scanned as bytes (no decoding).
+
+Only control words (letters) are recognised, i.e., macros of parameters whose names contain
+other characters (e.g. digits) cannot be detected; such macros are always kept.
+
+'''
+
+import os
+
+__all__ = ['scan_macro_usage', 'source_files', 'undefined_macros']
+
+## standard LaTeX commands which start with a capital letter, and are therefore easily confused
+## with prefixed parameter macros (e.g. '\Phi' for prefix 'P'); never reported as undefined
+TEX_CAPITALIZED_COMMANDS = frozenset([
+    'Alph', 'AA', 'AE', 'Bbbk', 'Box', 'Cap', 'Cup', 'Delta', 'Diamond', 'Downarrow', 'Gamma',
+    'Huge', 'Im', 'Join', 'L', 'LARGE', 'LaTeX', 'LaTeXe', 'Lambda', 'Large', 'Leftarrow',
+    'Leftrightarrow', 'Longleftarrow', 'Longleftrightarrow', 'Longrightarrow', 'O', 'OE', 'Omega',
+    'P', 'Phi', 'Pi', 'Pr', 'Psi', 'Re', 'Rightarrow', 'Roman', 'S', 'Sigma', 'TeX', 'Theta',
+    'Uparrow', 'Updownarrow', 'Upsilon', 'Vert', 'Xi',
+])
+
+##################################################
+
+def source_files(sources,exclude=()):
+    '''
+    Expands a list of LaTeX sources into a list of files.
+
+    Arguments:
+    ----------
+    sources: str or list(str)
+    File names, glob patterns (e.g. 'sections/*.tex'), or directories (all '.tex' files
+    in the directory and its subdirectories).
+
+    exclude: list(str)
+    Files to be skipped (optional; default: none).
+
+    Returns:
+    --------
+    files: list(str)
+    Existing files (each listed once, in the order of sources).
+
+    '''
+
+    import glob
+
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+    seen = set(os.path.realpath(filename) for filename in exclude)
+
+    files = []
+    for source in sources:
+        source = str(source)
+        if os.path.isdir(source):
+            matches = sorted(glob.glob(os.path.join(glob.escape(source), '**', '*.tex'), recursive=True))
+        elif glob.has_magic(source):
+            matches = sorted(glob.glob(source, recursive=True))
+        else:
+            if not os.path.isfile(source):
+                raise FileNotFoundError("LaTeX source '%s' not found." % (source))
+            matches = [source]
+        for filename in matches:
+            real = os.path.realpath(filename)
+            if real not in seen and os.path.isfile(filename):
+                seen.add(real)
+                files.append(filename)
+    return files
+
+def scan_macro_usage(sources,macros_prefix='P',exclude=()):
+    '''
+    Determines the prefixed macros referenced in LaTeX source files.
+
+    Comments and macro definitions by \\def (e.g. in a file generated by tex_macros()) are
+    skipped. Macros are recognised in all other places (including verbatim text).
+
+    Arguments:
+    ----------
+    sources: str or list(str)
+    LaTeX sources (files, glob patterns or directories, see source_files()).
+
+    macros_prefix: str
+    Prefix of the macro names (optional; default: 'P').
+
+    exclude: list(str)
+    Files to be skipped, e.g. the file of macro definitions itself (optional; default: none).
+
+    Returns:
+    --------
+    names: set(str)
+    Names of the referenced macros (without backslash, including the prefix; e.g. 'PN').
+
+    '''
+
+    import re
+
+    ## comments, definitions, escaped non-letters (e.g. '\%', '\\'), or prefixed control words
+    ## (group 1); matches of the other alternatives yield an empty group
+    prefix = re.escape(macros_prefix.encode('ascii'))
+    matcher = re.compile(rb"%[^\n]*|\\def\\" + prefix + rb"[A-Za-z]+|\\(?:(" + prefix + rb"[A-Za-z]+)|[^A-Za-z])")
+
+    names = set()
+    for filename in source_files(sources,exclude):
+        with open(filename, 'rb') as f:
+            names.update(matcher.findall(f.read()))
+    names.discard(b'')
+    return set(name.decode('ascii') for name in names)
+
+def undefined_macros(used,defined):
+    '''
+    Returns the referenced macros which are not defined (excluding standard LaTeX commands,
+    see TEX_CAPITALIZED_COMMANDS).
+
+    Arguments:
+    ----------
+    used: set(str)
+    Names of the referenced macros (see scan_macro_usage()).
+
+    defined: set(str)
+    Names of the defined macros.
+
+    Returns:
+    --------
+    names: list(str)
+    Sorted names of undefined macros.
+
+    '''
+
+    return sorted(name for name in used if name not in defined and name not in TEX_CAPITALIZED_COMMANDS)
@@ -3,7 +3,9 @@ Example (mock-up) of a parameter dictionary describing a neuronal network model
 
 The function set_parameter() creates a set of "base" parameters.
 
-The function derived_parameters() generates secondary parameters that are derived from the base parameters.
+The function derived_parameters() defines secondary parameters that are derived from the base parameters.
+Derived parameters are declared as functions of other parameters (see dict2tex.ParameterSet.derive()), and
+are evaluated lazily, in dependency order, when their values are needed.
 
 Each parameter is stored as a subdictionary composed of
 - the parameter name (as used in simulation code),
@@ -85,25 +87,25 @@ def derived_parameters(pars):
 
     ## derived network parameters
 
-    par("NE",int(pars["gamma"]['value']*pars["N"]['value']),"",
-        "size $\gamma{}N$ of excitatory population","network_drvd","$N_\\text{E}$",pars)
+    pars.derive("NE",lambda gamma,N: int(gamma*N),["gamma","N"],"",
+        "size $\gamma{}N$ of excitatory population","network_drvd","$N_\\text{E}$")
     
-    par("NI",pars["N"]['value']-pars["NE"]['value'],"",
-        "size $(1-\\gamma{})N$ of inhibitory population","network_drvd","$N_\\text{I}$",pars)
+    pars.derive("NI",lambda N,NE: N-NE,["N","NE"],"",
+        "size $(1-\\gamma{})N$ of inhibitory population","network_drvd","$N_\\text{I}$")
 
-    par("KE",int(pars["gamma"]['value']*pars["K"]['value']),"",
-        "in-degree $\gamma{}K$ of excitatory neurons","connectivity_drvd","$K_\\text{E}$",pars)
+    pars.derive("KE",lambda gamma,K: int(gamma*K),["gamma","K"],"",
+        "in-degree $\gamma{}K$ of excitatory neurons","connectivity_drvd","$K_\\text{E}$")
     
-    par("KI",pars["K"]['value']-pars["KE"]['value'],"",
-        "in-degree $(1-\\gamma{})K$ of inhibitory neurons","connectivity_drvd","$K_\\text{I}$",pars)
+    pars.derive("KI",lambda K,KE: K-KE,["K","KE"],"",
+        "in-degree $(1-\\gamma{})K$ of inhibitory neurons","connectivity_drvd","$K_\\text{I}$")
 
     ## derived synapse parameters
 
-    par("JE",pars["J"]['value'],"pA",
-        "weight $J$ of excitatory synapses","synapse_drvd","$J_\\text{E}$",pars)
-    par("JI",-pars["g"]['value']*pars["J"]['value'],"pA",
-        
-        "weight $-gJ$ of inhibitory synapses","synapse_drvd","$J_\\text{I}$",pars)
+    pars.derive("JE",lambda J: J,["J"],"pA",
+        "weight $J$ of excitatory synapses","synapse_drvd","$J_\\text{E}$")
+
+    pars.derive("JI",lambda g,J: -g*J,["g","J"],"pA",
+        "weight $-gJ$ of inhibitory synapses","synapse_drvd","$J_\\text{I}$")
 
     return pars
 
@@ -154,12 +156,13 @@ def par(key, value, unit, description, section, latex, pardict):
     '''
 
     if key not in pardict:
-        pardict[key]={}
-        pardict[key]['latex']=latex
-        pardict[key]['value']=value
-        pardict[key]['unit']=unit
-        pardict[key]['description']=description
-        pardict[key]['section']=section
+        entry={}
+        entry['latex']=latex
+        entry['value']=value
+        entry['unit']=unit
+        entry['description']=description
+        entry['section']=section
+        pardict[key]=entry
     else:
         ## TODO: Think about whether this is a good strategy.
         ## alternative: Raise warning and overwrite dict entries.
@@ -176,9 +179,10 @@ def dict2json(pardict,filename):
 ##########################################################################
 
 if __name__ == "__main__":
-    pars = set_parameters()
+    import dict2tex
+    pars = dict2tex.ParameterSet(set_parameters())
     pars = derived_parameters(pars)
-    dict2json(pars,"params.json")
+    dict2json(pars.to_dict(),"params.json")
 
 ##########################################################################
 
@@ -31,16 +31,15 @@ if __name__ == "__main__":
     with open(config_file, "r") as stream:    
         config = yaml.safe_load(stream)
         
-    ## load parameters
-    #parameter_file = Path('params.yaml')
-    #with open(parameter_file, "r") as f:
-    #    pars = yaml.safe_load(f)        
-    
+    ## load parameters (json or yaml, depending on the file extension, e.g. 'params.yaml')
     #pars = dict2tex.load_parameters_from_json(config['params_file'])
-    pars = dict2tex.load_parameters_from_json(config['params_file'])        
+    pars = dict2tex.load_parameters(config['params_file'])        
+
+    ## record which output files are written, and which are unchanged (and hence left untouched)
+    report = dict2tex.WriteReport()
 
     ## parameter macro definitions
-    dict2tex.tex_macros(pars,config['macros_tex_file'],config['macros_prefix'])     
+    dict2tex.tex_macros(pars,config['macros_tex_file'],config['macros_prefix'],report=report)     
 
     ## table with parameter macro definitions and 
     dict2tex.tex_table(pars,\
@@ -49,7 +48,8 @@ if __name__ == "__main__":
                        config['macros_table_sections'],\
                        section_text_color=config['section_text_color'],\
                        section_title_color=config['section_title_color'],\
-                       macro_prefix=config['macros_prefix'])
+                       macro_prefix=config['macros_prefix'],\
+                       report=report)
     
     ## create parameter table
     dict2tex.tex_table(pars,\
@@ -57,7 +57,10 @@ if __name__ == "__main__":
                        config['params_table_columns'],\
                        config['params_table_sections'],\
                        section_text_color=config['section_text_color'],\
-                       section_title_color=config['section_title_color'])
+                       section_title_color=config['section_title_color'],\
+                       report=report)
+
+    print(report)
 
     # ## table with parameter macro definitions and 
     # dict2tex.tex_table(pars,\
@@ -9,6 +9,9 @@ setup(
     author_email='t.tetzlaff@fz-juelich.de',
     license='GNU General Public License v3.0',
     packages=['dict2tex'],
-    install_requires=['numpy',                     
+    install_requires=['pyyaml',
                       ],
+    entry_points={
+        'console_scripts': ['dict2tex=dict2tex.cli:main'],
+    },
 )
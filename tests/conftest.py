@@ -0,0 +1,41 @@
+## makes the package importable when running the tests from a source checkout (without installation)
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+## table columns used by the tests
+COLUMNS = [{'field': 'latex', 'title': 'Name'},
+           {'field': ['value', 'unit'], 'title': 'Value'},
+           {'field': 'description', 'title': 'Description'}]
+
+def small_parameters(n_parameters=30,sections=('neuron', 'synapse', 'network')):
+    '''
+    Returns a small parameter dictionary (schema of example/create_params_file.py).
+    '''
+
+    return {'par_%d' % (i): {'latex': '$p_{%d}$' % (i), 'value': 0.5 * i, 'unit': 'ms',
+                             'description': 'parameter %d' % (i), 'section': sections[i % len(sections)]}
+            for i in range(n_parameters)}
+
+@pytest.fixture
+def config_file(tmp_path):
+    '''
+    Writes a parameter file and a configuration file (one table, macro definitions) to a
+    temporary directory, and returns the name of the configuration file.
+    '''
+
+    with open(str(tmp_path / 'params.json'), 'w') as f:
+        json.dump(small_parameters(), f)
+    config = {'params_file': 'params.json',
+              'params_table_tex_file': 'params_table.tex',
+              'params_table_columns': COLUMNS,
+              'params_table_sections': [{'section': 'neuron', 'title': 'Neuron'}, {'section': 'synapse', 'title': 'Synapse'}],
+              'macros_tex_file': 'macros.tex',
+              'macros_prefix': 'P'}
+    with open(str(tmp_path / 'config.yml'), 'w') as f:
+        json.dump(config, f)   ## json is valid yaml
+    return str(tmp_path / 'config.yml')
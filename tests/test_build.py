@@ -0,0 +1,63 @@
+'''
+Tests of configuration-driven builds (ConfigBuild).
+
+'''
+
+import json
+import os
+
+import dict2tex
+
+##################################################
+
+def edit_parameter(config_file,key,value):
+    params_file = os.path.join(os.path.dirname(config_file), 'params.json')
+    with open(params_file) as f:
+        pars = json.load(f)
+    pars[key]['value'] = value
+    with open(params_file, 'w') as f:
+        json.dump(pars, f)
+
+def read_file(filename):
+    with open(filename) as f:
+        return f.read()
+
+##################################################
+
+def test_update_keeps_versions_of_unchanged_sections(config_file):
+    build = dict2tex.ConfigBuild(config_file)
+    build.build()
+    pars = build.pars
+    assert isinstance(pars, dict2tex.ParameterSet)
+    versions = {section: pars.section_version(section) for section in ['neuron', 'synapse', 'network']}
+
+    edit_parameter(config_file, 'par_0', 1234.5)   ## section 'neuron'
+    report = build.update()
+
+    assert build.pars is pars   ## modified entries replaced in place
+    assert pars.section_version('neuron') != versions['neuron']
+    assert pars.section_version('synapse') == versions['synapse']
+    assert pars.section_version('network') == versions['network']
+    assert pars['par_0']['value'] == 1234.5
+    assert [os.path.basename(f) for f in report.written] == ['params_table.tex']
+    assert [os.path.basename(f) for f in report.skipped] == ['macros.tex']   ## values are not part of macros
+
+    ## identical to a build from scratch
+    table = read_file(build.specs[0]['tex_file'])
+    os.remove(build.specs[0]['tex_file'])
+    dict2tex.ConfigBuild(config_file).build()
+    assert read_file(build.specs[0]['tex_file']) == table
+
+def test_update_after_adding_parameter(config_file):
+    build = dict2tex.ConfigBuild(config_file)
+    build.build()
+    params_file = os.path.join(os.path.dirname(config_file), 'params.json')
+    with open(params_file) as f:
+        pars = json.load(f)
+    pars['new'] = {'latex': '$n$', 'value': 1, 'unit': '', 'description': 'new parameter', 'section': 'synapse'}
+    with open(params_file, 'w') as f:
+        json.dump(pars, f)
+
+    build.update()
+    assert 'new' in build.pars
+    assert '$n$' in read_file(build.specs[0]['tex_file'])
@@ -0,0 +1,87 @@
+'''
+Tests of the on-disk cache of parsed parameter files.
+
+'''
+
+import json
+import os
+
+import dict2tex
+import dict2tex.cache
+
+from conftest import small_parameters
+
+##################################################
+
+def write_parameters(filename,pars):
+    with open(filename, 'w') as f:
+        json.dump(pars, f)
+
+def load(filename):
+    stats = dict2tex.BuildStats()
+    pars = dict2tex.load_parameters(filename, stats, cache=True)
+    return pars, stats.counters
+
+##################################################
+
+def test_cache_hit(tmp_path):
+    filename = str(tmp_path / 'params.json')
+    pars = small_parameters()
+    write_parameters(filename, pars)
+
+    assert load(filename) == (pars, {'files_opened': 1, 'cache_misses': 1})
+    assert os.path.exists(dict2tex.cache.cache_filename(filename))
+    pars_cached, counters = load(filename)
+    assert pars_cached == pars
+    assert counters['cache_hits'] == 1
+
+def test_cache_invalidated_by_modification(tmp_path):
+    filename = str(tmp_path / 'params.json')
+    pars = small_parameters()
+    write_parameters(filename, pars)
+    load(filename)
+
+    pars['par_1']['value'] = 'modified'
+    write_parameters(filename, pars)
+    pars_loaded, counters = load(filename)
+    assert pars_loaded == pars
+    assert counters['cache_misses'] == 1
+
+def test_cache_invalidated_with_same_size_and_time_stamp(tmp_path):
+    ## a modification within the resolution of the file system's time stamps is detected by the hash
+    filename = str(tmp_path / 'params.json')
+    pars = small_parameters()
+    write_parameters(filename, pars)
+    load(filename)
+    st = os.stat(filename)
+
+    pars['par_1']['description'] = 'parameter X'   ## same length as 'parameter 1'
+    write_parameters(filename, pars)
+    assert os.stat(filename).st_size == st.st_size
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    pars_loaded, counters = load(filename)
+    assert pars_loaded == pars
+    assert counters['cache_misses'] == 1
+
+def test_corrupt_cache_is_ignored(tmp_path):
+    filename = str(tmp_path / 'params.json')
+    pars = small_parameters()
+    write_parameters(filename, pars)
+    load(filename)
+    with open(dict2tex.cache.cache_filename(filename), 'r+b') as f:
+        f.truncate(10)
+
+    pars_loaded, counters = load(filename)
+    assert pars_loaded == pars
+    assert counters['cache_misses'] == 1
+    assert load(filename)[1]['cache_hits'] == 1   ## rewritten
+
+def test_cache_yaml(tmp_path):
+    filename = str(tmp_path / 'params.yml')
+    pars = small_parameters()
+    write_parameters(filename, pars)   ## json is valid yaml
+    assert load(filename)[0] == pars
+    pars_cached, counters = load(filename)
+    assert pars_cached == pars
+    assert counters['cache_hits'] == 1
@@ -0,0 +1,50 @@
+'''
+Tests of the command-line interface.
+
+'''
+
+import json
+import time
+
+import dict2tex.cli
+
+##################################################
+
+def test_watch_survives_malformed_configuration(config_file,capsys,monkeypatch):
+    with open(config_file) as f:
+        config = json.load(f)
+    config['params_table_columns'] = 3   ## wrong type (TypeError while rendering)
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
+
+    ## watch mode is stopped (as by Ctrl-C) after a few polling intervals
+    polls = []
+    def sleep(interval):
+        polls.append(interval)
+        if len(polls) > 3:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(time, 'sleep', sleep)
+
+    assert dict2tex.cli.main(['build', config_file, '--watch', '--interval', '0', '-q']) == 0
+    assert len(polls) == 4
+    assert 'TypeError' in capsys.readouterr().err
+
+def test_watch_survives_malformed_configuration_update(config_file,capsys,monkeypatch):
+    with open(config_file) as f:
+        config = json.load(f)
+
+    ## the configuration is broken after the first build, and watch mode is stopped after a few polls
+    polls = []
+    def sleep(interval):
+        polls.append(interval)
+        if len(polls) == 1:
+            config['params_table_columns'] = 3
+            with open(config_file, 'w') as f:
+                json.dump(config, f)
+        if len(polls) > 3:
+            raise KeyboardInterrupt
+    monkeypatch.setattr(time, 'sleep', sleep)
+
+    assert dict2tex.cli.main(['build', config_file, '--watch', '--interval', '0', '-q']) == 0
+    assert len(polls) == 4
+    assert capsys.readouterr().err.count('TypeError') == 1   ## not repeated before the next change
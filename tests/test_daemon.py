@@ -0,0 +1,150 @@
+'''
+Tests of the build daemon.
+
+'''
+
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+
+import pytest
+
+import dict2tex.daemon
+
+##################################################
+
+@pytest.fixture
+def short_tmp_dir():
+    ## socket paths are limited to about 100 characters
+    directory = tempfile.mkdtemp(prefix='d2t')
+    yield directory
+    shutil.rmtree(directory)
+
+@pytest.fixture
+def other_user(monkeypatch):
+    ## files created by the test appear to belong to another user
+    uid = os.getuid()
+    monkeypatch.setattr(os, 'getuid', lambda: uid + 1)
+
+@pytest.fixture
+def daemon(short_tmp_dir):
+    '''
+    Runs a daemon in a background thread, and returns the path of its socket.
+    '''
+
+    socket_path = os.path.join(short_tmp_dir, 'daemon.sock')
+    thread = threading.Thread(target=dict2tex.daemon.serve, args=(socket_path,), kwargs={'idle_timeout': 30.})
+    thread.start()
+    for attempt in range(500):
+        if dict2tex.daemon.ping(socket_path):
+            break
+        time.sleep(0.01)
+    yield socket_path
+    if dict2tex.daemon.ping(socket_path):
+        dict2tex.daemon.request({'command': 'shutdown'}, socket_path)
+    thread.join()
+
+def send_raw(socket_path,data):
+    ## sends data which is not necessarily a valid request, and returns the response
+    import json
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile('rwb') as stream:
+            stream.write(data)
+            stream.flush()
+            return json.loads(stream.readline())
+
+##################################################
+
+def test_default_socket_path_runtime_directory(tmp_path,monkeypatch):
+    monkeypatch.delenv(dict2tex.daemon.SOCKET_VARIABLE, raising=False)
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    assert dict2tex.daemon.default_socket_path() == os.path.join(str(tmp_path), 'dict2tex.sock')
+
+def test_default_socket_path_private_directory(tmp_path,monkeypatch):
+    monkeypatch.delenv(dict2tex.daemon.SOCKET_VARIABLE, raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    assert dict2tex.daemon.default_socket_path() == os.path.join(str(tmp_path), 'dict2tex-%d' % (os.getuid()), 'daemon.sock')
+
+def test_serve_creates_private_directory(short_tmp_dir,monkeypatch):
+    monkeypatch.delenv(dict2tex.daemon.SOCKET_VARIABLE, raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', short_tmp_dir)
+    dict2tex.daemon.serve(idle_timeout=0.01)
+    directory = os.path.join(short_tmp_dir, 'dict2tex-%d' % (os.getuid()))
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert not os.path.exists(os.path.join(directory, 'daemon.sock'))   ## removed on exit
+
+def test_serve_rejects_shared_private_directory(short_tmp_dir,monkeypatch):
+    monkeypatch.delenv(dict2tex.daemon.SOCKET_VARIABLE, raising=False)
+    monkeypatch.delenv('XDG_RUNTIME_DIR', raising=False)
+    monkeypatch.setattr(tempfile, 'tempdir', short_tmp_dir)
+    directory = os.path.join(short_tmp_dir, 'dict2tex-%d' % (os.getuid()))
+    os.mkdir(directory)
+    os.chmod(directory, 0o777)
+    with pytest.raises(PermissionError):
+        dict2tex.daemon.serve(idle_timeout=0.01)
+
+def test_client_rejects_socket_of_other_user(short_tmp_dir,other_user):
+    socket_path = os.path.join(short_tmp_dir, 'daemon.sock')
+    open(socket_path, 'w').close()
+    with pytest.raises(PermissionError):
+        dict2tex.daemon.request({'command': 'ping'}, socket_path)
+    assert not dict2tex.daemon.ping(socket_path)
+
+def test_serve_keeps_socket_of_other_user(short_tmp_dir,other_user):
+    socket_path = os.path.join(short_tmp_dir, 'daemon.sock')
+    open(socket_path, 'w').close()
+    with pytest.raises(PermissionError):
+        dict2tex.daemon.serve(socket_path, idle_timeout=0.01)
+    assert os.path.exists(socket_path)
+
+def test_build_requests(daemon,config_file):
+    response = dict2tex.daemon.request_build(config_file, daemon)
+    assert response['status'] == 0
+    assert sorted(os.path.basename(f) for f in response['report']['written']) == ['macros.tex', 'params_table.tex']
+    assert response['report']['skipped'] == []
+    ## the daemon keeps the build, and reports unchanged outputs as skipped
+    response = dict2tex.daemon.request_build(config_file, daemon)
+    assert response['status'] == 0
+    assert response['report']['written'] == []
+    assert sorted(os.path.basename(f) for f in response['report']['skipped']) == ['macros.tex', 'params_table.tex']
+    assert dict2tex.daemon.request({'command': 'ping'}, daemon)['configs'] == [os.path.abspath(config_file)]
+
+def test_invalid_requests(daemon):
+    assert send_raw(daemon, b"not json\n") == {'status': 1, 'error': "Malformed request."}
+    assert send_raw(daemon, b"{}\n") == {'status': 1, 'error': "Malformed request."}
+    assert dict2tex.daemon.request({'command': 'frobnicate'}, daemon) == {'status': 1, 'error': "Unknown command 'frobnicate'."}
+    response = dict2tex.daemon.request({'command': 'build', 'config': 'config.yml'}, daemon)
+    assert response['status'] == 1 and 'absolute path' in response['error']
+    response = dict2tex.daemon.request_build(os.path.join(os.path.dirname(daemon), 'missing.yml'), daemon)
+    assert response['status'] == 1
+    assert dict2tex.daemon.ping(daemon)
+
+def test_failed_build_keeps_daemon_running(daemon,config_file):
+    import json
+
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    config['params_table_columns'] = 3
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
+    response = dict2tex.daemon.request_build(config_file, daemon)
+    assert response['status'] == 1
+    assert response['error'].startswith('TypeError: ')
+    assert dict2tex.daemon.request({'command': 'ping'}, daemon)['configs'] == []
+
+def test_shutdown(daemon):
+    assert dict2tex.daemon.request({'command': 'shutdown'}, daemon) == {'status': 0}
+    for attempt in range(500):
+        if not os.path.exists(daemon):
+            break
+        time.sleep(0.01)
+    assert not os.path.exists(daemon)
+    assert not dict2tex.daemon.ping(daemon)
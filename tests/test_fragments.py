@@ -0,0 +1,73 @@
+'''
+Tests of the cache of rendered table sections (FragmentCache).
+
+'''
+
+import os
+
+import pytest
+
+import dict2tex
+
+from conftest import COLUMNS, small_parameters
+
+SECTIONS = [{'section': 'neuron', 'title': 'Neuron'}, {'section': 'synapse', 'title': 'Synapse'},
+            {'section': 'network', 'title': 'Network'}]
+
+##################################################
+
+def render(cache,pars):
+    stats = dict2tex.BuildStats()
+    table = cache.tex_table_string(pars, COLUMNS, SECTIONS, table='table', stats=stats)
+    assert table == dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
+    return stats.counters['sections_rendered'], stats.counters['sections_cached']
+
+@pytest.mark.parametrize('container', [dict, dict2tex.ParameterSet])
+def test_only_modified_sections_rerendered(container):
+    pars = container(small_parameters())
+    cache = dict2tex.FragmentCache()
+    assert render(cache, pars) == (3, 0)
+    assert render(cache, pars) == (0, 3)
+
+    pars['par_1'] = dict(pars['par_1'], value=-1)   ## section 'synapse'
+    assert render(cache, pars) == (1, 2)
+
+    del pars['par_0']   ## section 'neuron'
+    assert render(cache, pars) == (1, 2)
+
+def test_escaping_rules_part_of_cache_key():
+    pars = small_parameters()
+    pars['par_0']['description'] = 'text with $$'
+    cache = dict2tex.FragmentCache()
+    render(cache, pars)
+    try:
+        dict2tex.configure_escaping('description')   ## '$$' no longer removed
+        assert render(cache, pars) == (3, 0)
+    finally:
+        dict2tex.reset_escaping()
+
+def test_save_and_load(tmp_path):
+    filename = str(tmp_path / 'fragments.cache')
+    pars = small_parameters()
+    cache = dict2tex.FragmentCache(filename)
+    render(cache, pars)
+    cache.save()
+    assert render(dict2tex.FragmentCache(filename), pars) == (0, 3)
+
+def test_rebuild_leaves_unaffected_files_untouched(config_file):
+    build = dict2tex.ConfigBuild(config_file)
+    build.build()
+    table_file = build.specs[0]['tex_file']
+    mtime = os.stat(table_file).st_mtime_ns
+
+    ## parameter of section 'network', which is not shown in the table
+    params_file = build.params_file
+    with open(params_file) as f:
+        content = f.read()
+    with open(params_file, 'w') as f:
+        f.write(content.replace('"parameter 2"', '"parameter two"'))
+
+    report = build.update()
+    assert [os.path.basename(f) for f in report.written] == ['macros.tex']   ## all sections
+    assert os.stat(table_file).st_mtime_ns == mtime
+    assert build.update() is None   ## nothing changed since
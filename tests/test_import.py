@@ -0,0 +1,26 @@
+'''
+Tests of the import of dict2tex: heavy modules are imported on demand only (the import time
+is measured by benchmarks/bench_import.py).
+
+'''
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+## modules which must not be imported by "import dict2tex"
+HEAVY_MODULES = ['numpy', 'json', 'yaml', 'decimal', 'tempfile', 'hashlib']
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+##################################################
+
+@pytest.mark.parametrize('module', HEAVY_MODULES)
+def test_import_does_not_load_heavy_modules(module):
+    ## fresh interpreter, such that modules imported by pytest or other tests do not interfere
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in [PACKAGE_DIR, os.environ.get('PYTHONPATH')] if p))
+    code = "import dict2tex, sys; assert %r not in sys.modules, 'imported eagerly'" % (module)
+    result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
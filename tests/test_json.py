@@ -0,0 +1,43 @@
+'''
+Tests of the incremental json parser (iter_parameters_from_json()).
+
+'''
+
+import json
+
+import pytest
+
+import dict2tex
+
+## members with numbers (fractions, exponents, signs), literals, strings and nested values
+DOCUMENT = '''{"a": 1.5, "b": -20.25e-3, "c": 10, "d": 1E+5, "e": 0.125,
+ "f": {"latex": "$f$", "value": [1.5, -2e3, 7], "unit": "ms", "description": "x", "section": "s"},
+ "g": true, "h": null, "i": "1.5e3", "j" :-0.5 , "k": 3e2}
+'''
+
+##################################################
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 64])
+def test_chunk_boundaries(tmp_path,chunk_size):
+    filename = str(tmp_path / 'params.json')
+    with open(filename, 'w') as f:
+        f.write(DOCUMENT)
+    assert list(dict2tex.iter_parameters_from_json(filename, chunk_size)) == list(json.loads(DOCUMENT).items())
+
+def test_all_split_positions(tmp_path):
+    ## every position of the document falls on a chunk boundary for some chunk size
+    filename = str(tmp_path / 'params.json')
+    with open(filename, 'w') as f:
+        f.write(DOCUMENT)
+    expected = list(json.loads(DOCUMENT).items())
+    for chunk_size in range(1, len(DOCUMENT) + 1):
+        assert list(dict2tex.iter_parameters_from_json(filename, chunk_size)) == expected, chunk_size
+
+@pytest.mark.parametrize('document', ['{"a": 1.}', '{"a": 1e}', '{"a": 1', '{"a": 1,}', '{"a": 1} x'])
+def test_invalid_json(tmp_path,document):
+    filename = str(tmp_path / 'params.json')
+    with open(filename, 'w') as f:
+        f.write(document)
+    for chunk_size in [1, 4, 64]:
+        with pytest.raises(ValueError):
+            list(dict2tex.iter_parameters_from_json(filename, chunk_size))
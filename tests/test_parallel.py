@@ -0,0 +1,106 @@
+'''
+Tests of parallel builds: build_outputs_parallel() must write the same files, byte for byte,
+as the serial build_outputs() (timings are measured by benchmarks/bench_parallel.py).
+
+'''
+
+import os
+
+import pytest
+
+import dict2tex
+
+COLUMNS = [{'field': 'latex', 'title': 'Name'},
+           {'field': ['value', 'unit'], 'title': 'Value'},
+           {'field': 'description', 'title': 'Description'}]
+MACRO_COLUMNS = [{'field': 'latex', 'title': 'Name (LaTeX)'},
+                 {'field': 'key', 'title': 'Name (code)'},
+                 {'field': 'macro', 'title': 'Macro'}]
+SECTIONS = ['section_%d' % (i) for i in range(6)]
+
+##################################################
+
+def parameters(n_parameters=600):
+    pars = dict2tex.ParameterSet()
+    for i in range(n_parameters):
+        value = [1.5 * i, 'x_%d' % (i), i % 7, [i, i + 1]][i % 4]
+        pars['par_%d' % (i)] = {'latex': '$p_{%d}$' % (i), 'value': value, 'unit': ['', 'ms', 'mV'][i % 3],
+                                'description': 'parameter #%d & 100%% of _it_' % (i), 'section': SECTIONS[i % len(SECTIONS)]}
+    pars.derive('par_sum', lambda a, b: a + b, ['par_0', 'par_4'], 'ms', 'derived parameter', 'section_0', '$p_\\Sigma$')
+    return pars
+
+def output_specs(out_dir):
+    table_sections = [{'section': section, 'title': section.replace('_', ' ')} for section in SECTIONS]
+    return [{'type': 'macros', 'tex_file': os.path.join(out_dir, 'macros.tex'), 'macros_prefix': 'P'},
+            {'type': 'table', 'tex_file': os.path.join(out_dir, 'table_0.tex'), 'table_columns': COLUMNS,
+             'table_sections': table_sections, 'macro_prefix': 'P'},
+            {'type': 'table', 'tex_file': os.path.join(out_dir, 'table_1.tex'), 'table_columns': MACRO_COLUMNS,
+             'table_sections': table_sections[1::2], 'macro_prefix': 'P', 'table_column_widths': 'auto'},
+            {'type': 'table', 'tex_file': os.path.join(out_dir, 'table_sharded.tex'), 'table_columns': COLUMNS,
+             'table_sections': table_sections, 'macro_prefix': 'P', 'max_rows': 50},
+            {'type': 'macros', 'tex_file': os.path.join(out_dir, 'macros_by_section.tex'), 'macros_prefix': 'P',
+             'by_section': True}]
+
+def read_outputs(out_dir):
+    outputs = {}
+    for filename in sorted(os.listdir(out_dir)):
+        with open(os.path.join(out_dir, filename), 'rb') as f:
+            outputs[filename] = f.read()
+    return outputs
+
+##################################################
+
+def assert_parallel_identical_to_serial(out_dir,mode):
+    ## same output directory for both builds (its path is part of the \input lines of the macro files) for both builds (its path is part of the \input lines of the macro files)
+    pars = parameters()
+    specs = output_specs(out_dir)
+
+    serial_report = dict2tex.build_outputs(pars, specs)
+    serial = read_outputs(out_dir)
+    for filename in serial:
+        os.remove(os.path.join(out_dir, filename))
+    parallel_report = dict2tex.build_outputs_parallel(pars, specs, mode=mode, max_workers=3)
+    parallel = read_outputs(out_dir)
+
+    assert len(serial) > 5   ## shard and section files included
+    assert sorted(parallel) == sorted(serial)
+    for filename in serial:
+        assert parallel[filename] == serial[filename], filename
+    assert parallel_report.written == serial_report.written
+
+@pytest.mark.parametrize('mode', ['thread', 'process'])
+def test_parallel_outputs_identical_to_serial(tmp_path,mode):
+    assert_parallel_identical_to_serial(str(tmp_path), mode)
+
+@pytest.fixture
+def spawn_start_method():
+    ## worker processes start with a fresh interpreter (default on macOS), i.e., without the
+    ## state of the parent process
+    import multiprocessing
+
+    start_method = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method('spawn', force=True)
+    yield
+    multiprocessing.set_start_method(start_method, force=True)
+
+@pytest.fixture
+def custom_escaping():
+    dict2tex.configure_escaping('description', replace=dict2tex.TEX_SPECIAL_CHARACTERS)
+    dict2tex.configure_escaping('unit', replace={'m': 'M'})
+    dict2tex.configure_escaping('macro', delete='_.0')
+    yield
+    dict2tex.reset_escaping()
+
+def test_process_workers_apply_escaping_rules(tmp_path,spawn_start_method,custom_escaping):
+    assert_parallel_identical_to_serial(str(tmp_path), 'process')
+    with open(os.path.join(str(tmp_path), 'table_0.tex')) as f:
+        assert r'100\% of \_it\_' in f.read()
+
+@pytest.mark.parametrize('mode', ['thread', 'process'])
+def test_parallel_rebuild_leaves_files_untouched(tmp_path,mode):
+    pars = parameters()
+    specs = output_specs(str(tmp_path))
+    dict2tex.build_outputs(pars, specs)
+    report = dict2tex.build_outputs_parallel(pars, specs, mode=mode, max_workers=3)
+    assert not report.written
+    assert report.skipped
@@ -0,0 +1,68 @@
+'''
+Tests of per-section macro files (tex_macros_by_section()).
+
+'''
+
+import os
+
+import dict2tex
+
+from conftest import small_parameters
+
+##################################################
+
+def read_file(filename):
+    with open(filename) as f:
+        return f.read()
+
+def test_section_files_contain_macros(tmp_path):
+    pars = small_parameters()
+    index_file = str(tmp_path / 'macros.tex')
+    dict2tex.tex_macros_by_section(pars, index_file, lazy=False)
+
+    assert sorted(os.listdir(str(tmp_path))) == ['macros.tex', 'macros_network.tex', 'macros_neuron.tex', 'macros_synapse.tex']
+    for section in ['network', 'neuron', 'synapse']:
+        section_pars = {k: entry for k, entry in pars.items() if entry['section'] == section}
+        content = read_file(dict2tex.section_macros_filename(index_file, section))
+        assert content.endswith(dict2tex.tex_macros_string(section_pars))
+        assert "\\input{%s}" % (os.path.join(str(tmp_path), 'macros_%s.tex' % (section))) in read_file(index_file)
+
+def test_lazy_index_defines_stubs(tmp_path):
+    index_file = str(tmp_path / 'macros.tex')
+    dict2tex.tex_macros_by_section(small_parameters(), index_file, macros_sections=['neuron'])
+    index = read_file(index_file)
+    assert "\\def\\Ppar0{\\dicttex@load{%s}\\Ppar0}" % (os.path.join(str(tmp_path), 'macros_neuron.tex')) in index
+    assert '\\Ppar1{' not in index   ## section 'synapse'
+
+def test_filename_hash_suffix():
+    assert dict2tex.section_macros_filename('macros.tex', 'a_b') == 'macros_a_b.tex'
+    hashed = dict2tex.section_macros_filename('macros.tex', 'a.b')
+    assert hashed.startswith('macros_a_b_') and hashed.endswith('.tex') and hashed != 'macros_a_b.tex'
+    assert dict2tex.section_macros_filename('macros.tex', 'a b') not in (hashed, 'macros_a_b.tex')
+    assert dict2tex.section_macros_filename('macros.tex', 'a.b') == hashed   ## stable
+
+def test_colliding_section_names(tmp_path):
+    pars = {'x': {'latex': '$x$', 'value': 1, 'unit': '', 'description': 'x', 'section': 'a.b'},
+            'y': {'latex': '$y$', 'value': 2, 'unit': '', 'description': 'y', 'section': 'a_b'}}
+    index_file = str(tmp_path / 'macros.tex')
+    report = dict2tex.tex_macros_by_section(pars, index_file, macros_sections=['a.b', 'a_b', 'a.b'])
+    assert len(report.written) == 3
+    assert '\\Px' in read_file(dict2tex.section_macros_filename(index_file, 'a.b'))
+    assert '\\Py' in read_file(dict2tex.section_macros_filename(index_file, 'a_b'))
+
+def test_rebuild_and_stale_files(tmp_path):
+    pars = small_parameters()
+    index_file = str(tmp_path / 'macros.tex')
+    dict2tex.tex_macros_by_section(pars, index_file)
+
+    report = dict2tex.tex_macros_by_section(pars, index_file)
+    assert report.written == [] and report.removed == []
+
+    ## files of sections no longer defined are removed, other files are left alone
+    other_file = str(tmp_path / 'macros_notes.tex')
+    with open(other_file, 'w') as f:
+        f.write("% written by hand\n")
+    report = dict2tex.tex_macros_by_section(pars, index_file, macros_sections=['neuron', 'synapse'])
+    assert report.removed == [dict2tex.section_macros_filename(index_file, 'network')]
+    assert [os.path.basename(f) for f in report.written] == ['macros.tex']
+    assert os.path.exists(other_file)
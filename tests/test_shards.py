@@ -0,0 +1,66 @@
+'''
+Tests of sharded parameter tables.
+
+'''
+
+import os
+import re
+
+import dict2tex
+
+from conftest import COLUMNS, small_parameters
+
+SECTIONS = [{'section': 'neuron', 'title': 'Neuron'}, {'section': 'synapse', 'title': 'Synapse'},
+            {'section': 'network', 'title': 'Network'}]
+
+##################################################
+
+def resolve_inputs(master_file):
+    ## replaces the \input lines of the master file by the content of the shards
+    with open(master_file) as f:
+        master = f.read()
+    def shard(match):
+        with open(match.group(1)) as f:
+            return f.read()
+    return re.sub(r"\\input\{(.*)\}\n", shard, master)
+
+##################################################
+
+def test_table_shards_bounds():
+    ## sections are only split if they do not fit into a shard of their own
+    assert dict2tex.table_shards([[1, 1], [1, 1, 1], [1]], max_rows=4) == [[(0, 0, 2)], [(1, 0, 3), (2, 0, 1)]]
+    assert dict2tex.table_shards([[1] * 5], max_rows=2) == [[(0, 0, 2)], [(0, 2, 4)], [(0, 4, 5)]]
+    assert dict2tex.table_shards([[10, 10], [30]], max_bytes=25) == [[(0, 0, 2)], [(1, 0, 1)]]
+    assert dict2tex.table_shards([[]]) == [[(0, 0, 0)]]
+
+def test_shards_identical_to_unsharded_table(tmp_path):
+    pars = small_parameters()
+    master_file = str(tmp_path / 'table.tex')
+    report = dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=4)
+    assert len(report.written) == 1 + len(dict2tex.table_shards([[0] * 11, [0] * 11, [0] * 11], max_rows=4))
+    assert resolve_inputs(master_file) == dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
+
+def test_rebuild_rewrites_modified_shards_only(tmp_path):
+    pars = small_parameters()
+    master_file = str(tmp_path / 'table.tex')
+    dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=4)
+
+    report = dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=4)
+    assert report.written == [] and report.removed == []
+
+    pars['par_2'] = dict(pars['par_2'], value=-1)   ## section 'network'
+    report = dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=4)
+    assert len(report.written) == 1
+    assert re.search(r"_shard\d+\.tex$", report.written[0])
+    assert resolve_inputs(master_file) == dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
+
+def test_stale_shards_removed(tmp_path):
+    pars = small_parameters()
+    master_file = str(tmp_path / 'table.tex')
+    dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=4)
+    n_shards = len([f for f in os.listdir(str(tmp_path)) if '_shard' in f])
+
+    report = dict2tex.tex_table_sharded(pars, master_file, COLUMNS, SECTIONS, max_rows=40)
+    assert len(report.removed) == n_shards - 1
+    assert sorted(os.listdir(str(tmp_path))) == ['table.tex', 'table_shard001.tex']
+    assert resolve_inputs(master_file) == dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
@@ -0,0 +1,39 @@
+'''
+Tests of the build statistics (BuildStats, 'dict2tex build --stats').
+
+'''
+
+import dict2tex
+import dict2tex.cli
+
+from conftest import COLUMNS, small_parameters
+
+SECTIONS = [{'section': 'neuron', 'title': 'Neuron'}, {'section': 'synapse', 'title': 'Synapse'}]
+
+##################################################
+
+def test_build_stats_list_sections(config_file,capsys):
+    assert dict2tex.cli.main(['build', config_file, '--stats', '-q']) == 0
+    out = capsys.readouterr().out
+    for line in ['stage group', 'stage format', 'section neuron', 'section synapse', 'rows']:
+        assert line in out
+
+def test_plan_stats_sections_and_counters():
+    pars = small_parameters()
+    plan = dict2tex.BuildPlan()
+    plan.add_table('params_table.tex', COLUMNS, SECTIONS)
+    plan.add_macros('macros.tex')
+
+    stats = dict2tex.BuildStats()
+    assert plan.render(pars, stats) == plan.render(pars)
+    assert sorted(stats.sections) == ['neuron', 'synapse']
+    assert 'group' in stats.stages and 'format' in stats.stages
+    assert stats.counters['rows'] == 20
+    assert stats.counters['macros'] == len(pars)
+
+def test_plan_stats_iterator_input():
+    pars = small_parameters()
+    plan = dict2tex.BuildPlan()
+    plan.add_table('params_table.tex', COLUMNS, SECTIONS)
+    plan.add_macros('macros.tex')
+    assert plan.render(iter(pars.items()), dict2tex.BuildStats()) == plan.render(pars)
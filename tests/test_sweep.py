@@ -0,0 +1,66 @@
+'''
+Tests of TableSweep: rendering a variant must be identical to rendering it from scratch.
+
+'''
+
+import dict2tex
+
+COLUMNS = [{'field': 'latex', 'title': 'Symbol', 'format': '%s'},
+           {'field': 'value', 'title': 'Value', 'format': '%s'},
+           {'field': 'description', 'title': 'Description', 'format': '%s'}]
+SECTIONS = [{'section': 'network', 'title': 'Network'},
+            {'section': 'network_drvd', 'title': 'Derived parameters'}]
+
+##################################################
+
+def derived_parameters():
+    pars = dict2tex.ParameterSet()
+    pars['N'] = {'latex': '$N$', 'value': 1000, 'unit': '', 'description': 'network size', 'section': 'network'}
+    pars['gamma'] = {'latex': r'$\gamma$', 'value': 0.8, 'unit': '', 'description': 'fraction of E neurons', 'section': 'network'}
+    pars['K'] = {'latex': '$K$', 'value': 100, 'unit': '', 'description': 'in-degree', 'section': 'network'}
+    pars.derive('NE', lambda gamma, N: int(gamma*N), ['gamma', 'N'], '', 'size of E population', 'network_drvd', r'$N_\text{E}$')
+    pars.derive('NI', lambda NE, N: N - NE, ['NE', 'N'], '', 'size of I population', 'network_drvd', r'$N_\text{I}$')
+    return pars
+
+def from_scratch(overrides):
+    pars = derived_parameters()
+    for k, fields in overrides.items():
+        pars.set_value(k, fields['value'])
+    return dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
+
+def test_render_rerenders_derived_dependents():
+    sweep = dict2tex.TableSweep(derived_parameters(), COLUMNS, SECTIONS)
+    for overrides in [{}, {'N': {'value': 2000}}, {'gamma': {'value': 0.5}}, {'K': {'value': 50}},
+                      {'N': {'value': 10}, 'gamma': {'value': 0.1}}]:
+        table = sweep.render(overrides)
+        assert table == from_scratch(overrides)
+    assert '1600' in sweep.render({'N': {'value': 2000}})   ## NE = int(0.8*2000)
+
+def test_render_leaves_base_unchanged():
+    pars = derived_parameters()
+    sweep = dict2tex.TableSweep(pars, COLUMNS, SECTIONS)
+    base = sweep.render()
+    sweep.render({'N': {'value': 2000}})
+    assert pars['NE']['value'] == 800
+    assert sweep.render() == base == from_scratch({})
+
+def test_variant_evaluates_derived_dependents():
+    sweep = dict2tex.TableSweep(derived_parameters(), COLUMNS, SECTIONS)
+    variant = sweep.variant({'N': {'value': 2000}})
+    assert variant['NE']['value'] == 1600
+    assert variant['NI']['value'] == 400
+
+def test_new_parameter_falls_back_to_full_rendering():
+    sweep = dict2tex.TableSweep(derived_parameters(), COLUMNS, SECTIONS)
+    overrides = {'N': {'value': 2000},
+                 'J': {'latex': '$J$', 'value': 0.1, 'unit': 'mV', 'description': 'weight', 'section': 'network'}}
+    pars = derived_parameters()
+    pars.set_value('N', 2000)
+    pars['J'] = overrides['J']
+    assert sweep.render(overrides) == dict2tex.tex_table_string(pars, COLUMNS, SECTIONS)
+
+def test_render_variant_plain_dictionaries():
+    pars = derived_parameters().to_dict()
+    sweep = dict2tex.TableSweep(pars, COLUMNS, SECTIONS)
+    pars_variant = dict(pars, K=dict(pars['K'], value=7))
+    assert sweep.render_variant(pars_variant) == dict2tex.tex_table_string(pars_variant, COLUMNS, SECTIONS)
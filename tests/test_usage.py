@@ -0,0 +1,70 @@
+'''
+Tests of the scan of LaTeX sources for used macros, and of macro files restricted to them.
+
+'''
+
+import os
+import warnings
+
+import pytest
+
+import dict2tex
+
+##################################################
+
+MANUSCRIPT = r'''\documentclass{article}
+\input{macros.tex}
+\begin{document}
+The network has $\PN$ neurons and in-degree \PK{}. % \PJ is commented out
+Escaped percent \% \PTau, line break \\PEta is text, $\Phi$ is Greek.
+\def\PDefined{1}
+\PUndefined
+\end{document}
+'''
+
+PARS = {key: {'latex': '$%s$' % (key), 'value': 1, 'unit': '', 'description': key, 'section': 'network'}
+        for key in ['N', 'K', 'J', 'Tau', 'Eta', 'Defined', 'g_1']}
+
+def write_manuscript(directory):
+    os.makedirs(os.path.join(directory, 'sections'))
+    with open(os.path.join(directory, 'main.tex'), 'w') as f:
+        f.write(MANUSCRIPT)
+    with open(os.path.join(directory, 'sections', 'methods.tex'), 'w') as f:
+        f.write(r"The coupling is \PJ." + "\n")
+
+##################################################
+
+def test_scan_macro_usage(tmp_path):
+    directory = str(tmp_path)
+    write_manuscript(directory)
+    main = os.path.join(directory, 'main.tex')
+    assert dict2tex.scan_macro_usage(main) == {'PN', 'PK', 'PTau', 'PUndefined', 'Phi'}
+    assert 'PJ' in dict2tex.scan_macro_usage(directory)   ## directories are searched recursively
+    assert dict2tex.scan_macro_usage(os.path.join(directory, '*.tex')) == dict2tex.scan_macro_usage(main)
+    assert dict2tex.scan_macro_usage(directory, exclude=[os.path.join(directory, 'sections', 'methods.tex')]) == \
+        dict2tex.scan_macro_usage(main)
+
+def test_missing_source(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        dict2tex.scan_macro_usage(str(tmp_path / 'missing.tex'))
+
+def test_macros_restricted_to_used(tmp_path):
+    directory = str(tmp_path)
+    write_manuscript(directory)
+    with pytest.warns(UserWarning, match=r"1 macro\(s\).*\\PUndefined$"):
+        macros = dict2tex.tex_macros_string(PARS, sources=directory)
+    ## macros whose names are not control words ('Pg1' contains a digit) cannot be detected, and are kept
+    used = dict((k, PARS[k]) for k in ['N', 'K', 'J', 'Tau', 'g_1'])
+    assert macros == dict2tex.tex_macros_string(used)
+
+def test_plan_restricted_to_used(tmp_path):
+    directory = str(tmp_path)
+    write_manuscript(directory)
+    plan = dict2tex.BuildPlan()
+    plan.add_macros(os.path.join(directory, 'macros.tex'), sources=directory)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert plan.render(PARS) == [dict2tex.tex_macros_string(PARS, sources=directory)]
+
+def test_undefined_macros():
+    assert dict2tex.undefined_macros({'PN', 'PX', 'Phi', 'Pi'}, {'PN'}) == ['PX']